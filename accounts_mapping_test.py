@@ -0,0 +1,154 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from test_helpers.mgs_validation_helpers import mgs_mapping_helpers
+from test_helpers.mgs_validation_helpers.mgs_mapping_helpers import \
+    BackendSnapshotStore, ReferencesAccountsMapping
+
+ACCOUNTS = [{"accountId": "1", "instType": "ADP"},
+            {"accountId": "2", "instType": "ADP"},
+            {"accountId": "1", "instType": "ADP"},
+            {"accountId": "3", "instType": "BANK"}]
+
+
+class TotalsMapping(ReferencesAccountsMapping):
+    requested = []
+    _requested_lock = threading.Lock()
+
+    def prepare_account_change(self, account_id=None):
+        account_id = account_id or self.current_acct.accountId
+        with self._requested_lock:
+            TotalsMapping.requested.append(account_id)
+        return {"TodaysGainLoss": account_id}
+
+    def select(self, account_id):
+        self._current_acct = SimpleNamespace(accountId=account_id)
+        return self
+
+
+@pytest.fixture(autouse=True)
+def snapshots():
+    TotalsMapping.requested = []
+    BackendSnapshotStore.invalidate()
+    BackendSnapshotStore.reset_stats()
+    ttl = BackendSnapshotStore.ttl
+    yield BackendSnapshotStore
+    BackendSnapshotStore.ttl = ttl
+    BackendSnapshotStore.invalidate()
+    BackendSnapshotStore.reset_stats()
+
+
+def test_totals_are_kept_per_account():
+    mapping = TotalsMapping("user")
+    assert mapping.select("1").GetPortfolioTotals == {"TodaysGainLoss": "1"}
+    assert mapping.select("2").GetPortfolioTotals == {"TodaysGainLoss": "2"}
+    assert mapping.select("1").GetPortfolioTotals == {"TodaysGainLoss": "1"}
+    assert TotalsMapping.requested == ["1", "2"]
+
+
+def test_warm_up_requests_every_brokerage_account_once(snapshots):
+    mapping = TotalsMapping("user")
+    mapping.warm_up_portfolio_totals(ACCOUNTS)
+    assert sorted(TotalsMapping.requested) == ["1", "2"]
+    assert mapping.select("2").GetPortfolioTotals == {"TodaysGainLoss": "2"}
+    assert snapshots.report("user") == {
+        "user": {"calls_made": 2, "calls_saved": 0}}
+
+
+def test_warm_up_reuses_snapshots_of_same_user(snapshots):
+    TotalsMapping("user").warm_up_portfolio_totals(ACCOUNTS)
+    mapping = TotalsMapping("user")
+    mapping.warm_up_portfolio_totals(ACCOUNTS)
+    assert sorted(TotalsMapping.requested) == ["1", "2"]
+    assert mapping.select("1").GetPortfolioTotals == {"TodaysGainLoss": "1"}
+    assert snapshots.report("user")["user"]["calls_saved"] == 2
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Monotonic clock of snapshots, moved by tests"""
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(mgs_mapping_helpers, "time",
+                        SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def fetcher(calls, data):
+    def fetch():
+        calls.append(data)
+        return data
+    return fetch
+
+
+class TestBackendSnapshotStore(object):
+    def test_snapshot_reused_until_ttl(self, snapshots, clock):
+        snapshots.configure(ttl=10)
+        calls = []
+        assert snapshots.get("user", "GetAllBalances",
+                             fetcher(calls, "first")) == "first"
+        clock.now += 9.9
+        assert snapshots.get("user", "GetAllBalances",
+                             fetcher(calls, "second")) == "first"
+        clock.now += 0.1
+        assert snapshots.get("user", "GetAllBalances",
+                             fetcher(calls, "third")) == "third"
+        assert calls == ["first", "third"]
+        assert snapshots.report("user") == {
+            "user": {"calls_made": 2, "calls_saved": 1}}
+
+    def test_snapshots_kept_per_user_and_source(self, snapshots, clock):
+        calls = []
+        for user, source in [("a", "AcctCommonGet"), ("a", "GetAllBalances"),
+                             ("b", "AcctCommonGet"), ("a", "AcctCommonGet")]:
+            snapshots.get(user, source, fetcher(calls, (user, source)))
+        assert calls == [("a", "AcctCommonGet"), ("a", "GetAllBalances"),
+                         ("b", "AcctCommonGet")]
+        assert snapshots.report() == {
+            "a": {"calls_made": 2, "calls_saved": 1},
+            "b": {"calls_made": 1, "calls_saved": 0}}
+
+    def test_configure_drops_snapshots(self, snapshots, clock):
+        snapshots.put("user", "GetAllBalances", {})
+        snapshots.configure(ttl=60)
+        assert snapshots.ttl == 60
+        assert snapshots.missing("user", ["GetAllBalances"]) == \
+            ["GetAllBalances"]
+
+    def test_missing(self, snapshots, clock):
+        snapshots.configure(ttl=10)
+        snapshots.put("user", "AcctCommonGet", {})
+        clock.now += 5
+        snapshots.put("user", "GetAllBalances", {})
+        sources = ["AcctCommonGet", "GetAllBalances", "SPUserBalances"]
+        assert snapshots.missing("user", sources) == ["SPUserBalances"]
+        clock.now += 5
+        assert snapshots.missing("user", sources) == \
+            ["AcctCommonGet", "SPUserBalances"]
+        assert snapshots.missing("other", sources) == sources
+
+    def test_invalidate_source(self, snapshots, clock):
+        snapshots.put("user", "AcctCommonGet", {})
+        snapshots.put("user", "GetAllBalances", {})
+        snapshots.invalidate("user", "AcctCommonGet")
+        assert snapshots.missing(
+            "user", ["AcctCommonGet", "GetAllBalances"]) == ["AcctCommonGet"]
+
+    def test_invalidate_user(self, snapshots, clock):
+        snapshots.put("a", "AcctCommonGet", {})
+        snapshots.put("b", "AcctCommonGet", {})
+        snapshots.invalidate("a")
+        assert snapshots.missing("a", ["AcctCommonGet"]) == ["AcctCommonGet"]
+        assert snapshots.missing("b", ["AcctCommonGet"]) == []
+        snapshots.invalidate()
+        assert snapshots.missing("b", ["AcctCommonGet"]) == ["AcctCommonGet"]
+
+    def test_invalidate_keeps_stats(self, snapshots, clock):
+        snapshots.get("user", "AcctCommonGet", dict)
+        snapshots.get("user", "AcctCommonGet", dict)
+        snapshots.invalidate()
+        assert snapshots.report("user") == {
+            "user": {"calls_made": 1, "calls_saved": 1}}
+        snapshots.reset_stats()
+        assert snapshots.report() == {}
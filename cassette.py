@@ -0,0 +1,302 @@
+"""
+Record/replay of MGS and S2 traffic.
+In record mode request/response pairs are stored to cassette file, in
+replay mode responses are served from cassette without network.
+Requests are intercepted twice:
+- explicitly by cassette.serve in mgs_post, mgs_get and shared transport,
+  so keys are built from url/body as callers pass them;
+- by requests.adapters.HTTPAdapter.send, while cassette is active, for
+  every other call made with requests: backend helpers (get_portfolio_info,
+  get_stock_plan_user_balances, AccountsBackendDataHelper,
+  PortfolioBackendDataHelper), client login.
+In replay mode a request missing in cassette raises CassetteMissError,
+nothing made with requests reaches network.
+Cassette is gzip compressed json: {request key: [response,..]}, request key
+is sha1 of method, normalized url and normalized body. Same request sent
+several times is replayed in recorded order, last response is repeated.
+Streamed responses (stream=True) are recorded when their body is read to
+the end by response.iter_content, chunks are passed to the caller as they
+arrive.
+Under pytest-xdist every worker records to its own shard file
+(path + '.' + worker id), shards are merged into path by controller.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from functools import partial
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import stream_decode_response_unicode
+
+
+class CassetteMode(object):
+    OFF = 'off'
+    RECORD = 'record'
+    REPLAY = 'replay'
+
+    ALL = (OFF, RECORD, REPLAY)
+
+
+class CassetteMissError(LookupError):
+    """Request is not found in cassette in replay mode"""
+
+
+def normalize_url(url: str) -> str:
+    """Lowercase scheme and host, sorted query parameters"""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(),
+                       parts.path, query, ''))
+
+
+def normalize_body(body) -> str:
+    """Json bodies are dumped with sorted keys, others are kept as is"""
+    if body is None:
+        return ''
+    if isinstance(body, bytes):
+        body = body.decode('utf-8', errors='replace')
+    if isinstance(body, (dict, list)):
+        return json.dumps(body, sort_keys=True, separators=(',', ':'))
+    try:
+        return json.dumps(json.loads(body), sort_keys=True,
+                          separators=(',', ':'))
+    except ValueError:
+        return body.strip()
+
+
+def request_key(method, url, body=None) -> str:
+    normalized = '\n'.join([method.upper(), normalize_url(url),
+                            normalize_body(body)])
+    return hashlib.sha1(normalized.encode()).hexdigest()
+
+
+def response_to_record(response: requests.Response, content=None) -> dict:
+    """:param content: body bytes of streamed response, already read"""
+    if content is None:
+        text = response.text
+    else:
+        text = content.decode(response.encoding or 'utf-8', errors='replace')
+    return {"status_code": response.status_code,
+            "url": response.url,
+            "headers": dict(response.headers),
+            "encoding": response.encoding,
+            "text": text}
+
+
+def record_to_response(record: dict, method, url,
+                       body=None) -> requests.Response:
+    """Build requests.Response, response.request is filled as well"""
+    response = requests.Response()
+    response.status_code = record["status_code"]
+    response.url = record["url"] or url
+    response.headers = CaseInsensitiveDict(record["headers"])
+    response.encoding = record["encoding"] or 'utf-8'
+    response._content = record["text"].encode(response.encoding)
+    response.reason = 'Replayed from cassette'
+    prepared = requests.PreparedRequest()
+    prepared.method = method.upper()
+    prepared.url = url
+    prepared.body = body
+    response.request = prepared
+    return response
+
+
+class Cassette(object):
+    """
+    cassette.configure(mode=CassetteMode.REPLAY, path='run.cassette.gz')
+    response = cassette.serve("POST", url, body,
+                              partial(client.post, url=url, data=body))
+    cassette.save()  # record mode only
+    """
+    mode = CassetteMode.OFF
+    path = 'mgs.cassette.json.gz'
+    worker_id = None
+
+    def __init__(self):
+        self._records = {}
+        self._replayed = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._adapter_send = None
+        self.stats = {"recorded": 0, "replayed": 0, "missed": 0}
+
+    @property
+    def active(self) -> bool:
+        return self.mode != CassetteMode.OFF
+
+    def configure(self, mode=None, path=None, worker_id=None):
+        """
+        :param worker_id: pytest-xdist worker id, recorded traffic is saved
+            to worker's shard file, see shard_path
+        """
+        mode = mode or CassetteMode.OFF
+        if mode not in CassetteMode.ALL:
+            raise ValueError(f"Unknown cassette mode: {mode}, "
+                             f"expected one of {CassetteMode.ALL}")
+        self.mode = mode
+        self.path = path or self.path
+        self.worker_id = worker_id
+        self._records = {}
+        self._replayed = {}
+        if mode == CassetteMode.REPLAY:
+            self.load()
+        if self.active:
+            self.intercept()
+        else:
+            self.release()
+
+    def intercept(self):
+        """Route all HTTPAdapter.send calls through serve_adapter"""
+        if self._adapter_send is not None:
+            return
+        self._adapter_send = HTTPAdapter.send
+        cassette_ = self
+
+        def send(adapter, request, **kwargs):
+            return cassette_.serve_adapter(adapter, request, **kwargs)
+
+        HTTPAdapter.send = send
+
+    def release(self):
+        if self._adapter_send is not None:
+            HTTPAdapter.send = self._adapter_send
+        self._adapter_send = None
+
+    def serve(self, method, url, body, send,
+              stream=False) -> requests.Response:
+        """
+        Return response for request: recorded one in replay mode,
+        otherwise result of send(), which is recorded in record mode
+        :param send: callable without arguments, sends request to network
+        :param stream: True if send() requests with stream=True, body is
+            recorded while caller reads it, see record_streamed
+        """
+        if self.mode == CassetteMode.REPLAY:
+            return self.replay(method, url, body)
+        self._local.serving = True
+        try:
+            response = send()
+        finally:
+            self._local.serving = False
+        if self.mode == CassetteMode.RECORD:
+            if stream:
+                self.record_streamed(method, url, body, response)
+            else:
+                self.record(method, url, body, response)
+        return response
+
+    def serve_adapter(self, adapter, request: requests.PreparedRequest,
+                      **kwargs) -> requests.Response:
+        """
+        HTTPAdapter.send replacement: requests already served by serve()
+        are sent as is, others are recorded/replayed by prepared request
+        """
+        send = partial(self._adapter_send, adapter, request, **kwargs)
+        if getattr(self._local, 'serving', False):
+            return send()
+        return self.serve(request.method, request.url, request.body, send,
+                          stream=kwargs.get('stream', False))
+
+    def record(self, method, url, body, response, content=None):
+        key = request_key(method, url, body)
+        with self._lock:
+            self._records.setdefault(key, []).append(
+                response_to_record(response, content))
+            self.stats["recorded"] += 1
+
+    def record_streamed(self, method, url, body, response):
+        """
+        Wrap response.iter_content: chunks are kept while caller reads
+        them, response is recorded after the last one. Body is not read
+        here, so streaming is not turned into one big read
+        """
+        iter_content = response.iter_content
+
+        def chunks(chunk_size):
+            read = []
+            for chunk in iter_content(chunk_size=chunk_size):
+                read.append(chunk)
+                yield chunk
+            self.record(method, url, body, response, b''.join(read))
+
+        def tee(chunk_size=1, decode_unicode=False):
+            if decode_unicode:
+                return stream_decode_response_unicode(chunks(chunk_size),
+                                                      response)
+            return chunks(chunk_size)
+
+        response.iter_content = tee
+
+    def replay(self, method, url, body) -> requests.Response:
+        key = request_key(method, url, body)
+        with self._lock:
+            responses = self._records.get(key)
+            if not responses:
+                self.stats["missed"] += 1
+                raise CassetteMissError(
+                    f"Cassette {self.path} has no response for "
+                    f"{method} {url}\nRequest body: {body}")
+            position = self._replayed.get(key, 0)
+            self._replayed[key] = position + 1
+            self.stats["replayed"] += 1
+            record = responses[min(position, len(responses) - 1)]
+        return record_to_response(record, method, url, body)
+
+    def load(self):
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"Cassette not found: {self.path}")
+        self._records = self.read(self.path)
+        logging.info(f"Cassette: loaded {len(self._records)} requests "
+                     f"from {self.path}")
+
+    def shard_path(self, worker_id) -> str:
+        return f"{self.path}.{worker_id}"
+
+    def save(self) -> str:
+        """
+        Save recorded traffic (record mode only) to path, or to worker's
+        shard file if worker_id is configured
+        :return: saved file path, None if nothing is saved
+        """
+        if self.mode != CassetteMode.RECORD:
+            return None
+        path = self.path if self.worker_id is None \
+            else self.shard_path(self.worker_id)
+        self.write(path, self._records)
+        return path
+
+    def merge_shard(self, path, shard_path):
+        """
+        pytest-xdist controller: add worker's recorded shard to cassette
+        path and remove shard file. Responses of same request recorded by
+        different workers are kept in merge order
+        """
+        records = {}
+        if os.path.exists(path):
+            records = self.read(path)
+        for key, responses in self.read(shard_path).items():
+            records.setdefault(key, []).extend(responses)
+        self.write(path, records)
+        os.remove(shard_path)
+
+    @staticmethod
+    def read(path) -> dict:
+        with gzip.open(path, 'rt', encoding='utf-8') as cassette_file:
+            return json.load(cassette_file)
+
+    @staticmethod
+    def write(path, records):
+        cassette_dir = os.path.dirname(path)
+        if cassette_dir:
+            os.makedirs(cassette_dir, exist_ok=True)
+        with gzip.open(path, 'wt', encoding='utf-8') as cassette_file:
+            json.dump(records, cassette_file, separators=(',', ':'))
+        logging.info(f"Cassette: saved {len(records)} requests to {path}")
+
+cassette = Cassette()
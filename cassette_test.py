@@ -0,0 +1,152 @@
+import threading
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from test_helpers.mgs_service_helpers.cassette import Cassette, \
+    CassetteMissError, CassetteMode, request_key
+
+
+class CountingHandler(BaseHTTPRequestHandler):
+    hits = 0
+
+    def do_POST(self):
+        CountingHandler.hits += 1
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+        content = b'{"echo": ' + (body or b'null') + b', "hit": ' + \
+            str(CountingHandler.hits).encode() + b'}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    CountingHandler.hits = 0
+    http_server = ThreadingHTTPServer(('127.0.0.1', 0), CountingHandler)
+    thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{http_server.server_address[1]}"
+    http_server.shutdown()
+    http_server.server_close()
+
+
+@pytest.fixture
+def cassette(tmp_path):
+    cassette = Cassette()
+    cassette.path = str(tmp_path / 'test.cassette.json.gz')
+    yield cassette
+    cassette.configure(mode=CassetteMode.OFF)
+
+
+def test_request_key_normalization():
+    assert request_key('post', 'HTTPS://Host/path?b=2&a=1', '{"b":1,"a":2}') \
+        == request_key('POST', 'https://host/path?a=1&b=2',
+                       b'{"a": 2, "b": 1}')
+    assert request_key('POST', 'https://host/path', '{"a":1}') != \
+        request_key('POST', 'https://host/path', '{"a":2}')
+
+
+def test_unknown_mode(cassette):
+    with pytest.raises(ValueError):
+        cassette.configure(mode='rewind')
+
+
+def test_replay_without_network(cassette, server):
+    url = f"{server}/v1/accounts/accountList"
+    cassette.configure(mode=CassetteMode.RECORD, path=cassette.path)
+    recorded = [requests.post(url, data='{"n": 1}').json() for _ in range(2)]
+    cassette.save()
+    assert cassette.stats["recorded"] == 2
+
+    cassette.configure(mode=CassetteMode.REPLAY)
+    replayed = [requests.post(url, data='{"n":1}').json() for _ in range(3)]
+    assert replayed == recorded + recorded[-1:]
+    assert CountingHandler.hits == 2
+
+
+def test_replay_miss_is_loud(cassette, server):
+    url = f"{server}/v1/accounts/accountList"
+    cassette.configure(mode=CassetteMode.RECORD)
+    requests.post(url, data='{"n": 1}')
+    cassette.save()
+
+    cassette.configure(mode=CassetteMode.REPLAY)
+    with pytest.raises(CassetteMissError):
+        requests.post(url, data='{"n": 2}')
+    assert CountingHandler.hits == 1
+    assert cassette.stats["missed"] == 1
+
+
+def test_worker_shards_are_merged(cassette, server, tmp_path):
+    url = f"{server}/v1/accounts/accountList"
+    path = cassette.path
+    shards = []
+    for worker_id, bodies in (('gw0', ['{"n": 1}', '{"n": 2}']),
+                              ('gw1', ['{"n": 1}'])):
+        cassette.configure(mode=CassetteMode.RECORD, path=path,
+                           worker_id=worker_id)
+        for body in bodies:
+            requests.post(url, data=body)
+        shards.append(cassette.save())
+    assert shards == [f"{path}.gw0", f"{path}.gw1"]
+    assert not (tmp_path / 'test.cassette.json.gz').exists()
+
+    controller = Cassette()
+    for shard in shards:
+        controller.merge_shard(path, shard)
+    assert sorted(item.name for item in tmp_path.iterdir()) == \
+        ['test.cassette.json.gz']
+
+    cassette.configure(mode=CassetteMode.REPLAY, path=path)
+    hits = [requests.post(url, data=body).json()["hit"]
+            for body in ('{"n": 1}', '{"n": 1}', '{"n": 2}')]
+    assert hits == [1, 3, 2]
+    assert CountingHandler.hits == 3
+
+
+def test_serve_is_recorded_once(cassette, server):
+    url = f"{server}/v1/portfolio/allBrokerage"
+    session = requests.Session()
+    cassette.configure(mode=CassetteMode.RECORD)
+    response = cassette.serve('POST', url, '{}',
+                              partial(session.post, url, data='{}'))
+    assert response.json()["hit"] == 1
+    assert cassette.stats["recorded"] == 1
+
+
+def test_off_mode_releases_adapter(cassette, server):
+    send = requests.adapters.HTTPAdapter.send
+    cassette.configure(mode=CassetteMode.RECORD)
+    assert requests.adapters.HTTPAdapter.send is not send
+    cassette.configure(mode=CassetteMode.OFF)
+    assert requests.adapters.HTTPAdapter.send is send
+    requests.post(f"{server}/v1", data='{}')
+    assert cassette.stats["recorded"] == 0
+
+
+def test_streamed_response_is_recorded_after_last_chunk(cassette, server):
+    url = f"{server}/v1/portfolio/completeView"
+    session = requests.Session()
+    cassette.configure(mode=CassetteMode.RECORD)
+    response = cassette.serve('POST', url, '{"n": 1}',
+                              partial(session.post, url, data='{"n": 1}',
+                                      stream=True), stream=True)
+    chunks = response.iter_content(chunk_size=4)
+    first = next(chunks)
+    assert cassette.stats["recorded"] == 0
+    body = first + b''.join(chunks)
+    assert cassette.stats["recorded"] == 1
+    cassette.save()
+
+    cassette.configure(mode=CassetteMode.REPLAY)
+    assert requests.post(url, data='{"n":1}').content == body
+    assert CountingHandler.hits == 1
@@ -21,7 +21,8 @@ class TestCompleteView(CompleteViewHelper):
         :param pict_case_args: arguments from the pict file
         """
         self.mobile_authenticate(username=pict_case_args[Header.USERNAME],
-                                 password=pict_case_args[Header.PASSWORD])
+                                 password=pict_case_args[Header.PASSWORD],
+                                 pooled=True)
         self.complete_view_request()
         self.verify_views_references_objects_types()
         logging.info('\tChecking views objects tags.')
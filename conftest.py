@@ -1,13 +1,19 @@
+import logging
 import os
 import sys
 
 import pytest
 
 from test_helpers import pict_utils
+from test_helpers.mgs_service_helpers.cassette import cassette
+from test_helpers.mgs_service_helpers.mgs_base_services import \
+    ServiceMetadataStore, SessionPool
 from test_helpers.mgs_backend_service_helpers.s2_client import S2Client
 from test_helpers.mgs_validation_helpers.references import values_formats
 from test_helpers.mgs_validation_helpers.references.values_formats import \
     AccountType
+from test_helpers.mgs_validation_helpers.mgs_mapping_helpers import \
+    BackendSnapshotStore
 from test_helpers.pict_utils import get_user_from_config
 from test_helpers.tag_coverage import MgsContext, tag_coverage_report
 
@@ -50,10 +56,64 @@ def instrument_type(request) -> str:
     return instrument_type
 
 
+@pytest.fixture(autouse=True)
+def backend_snapshots():
+    """
+    s2 accounts snapshots are shared inside one test only,
+    dropped after the test to keep validations on fresh backend data
+    """
+    yield BackendSnapshotStore
+    logging.info(f"s2 snapshots usage: {BackendSnapshotStore.report()}")
+    BackendSnapshotStore.invalidate()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def traffic_cassette(request):
+    """
+    --cassette_mode record: MGS and S2 responses are saved to --cassette_path
+    --cassette_mode replay: responses are served from --cassette_path
+    pytest-xdist workers record to own shards, merged by controller
+    """
+    workerinput = getattr(request.config, 'workerinput', None)
+    cassette.configure(mode=request.config.getoption('--cassette_mode'),
+                       path=request.config.getoption('--cassette_path'),
+                       worker_id=workerinput and workerinput['workerid'])
+    yield cassette
+    shard_path = cassette.save()
+    if workerinput is not None and shard_path:
+        request.config.workeroutput['cassette'] = {
+            "path": cassette.path, "shard_path": shard_path}
+    cassette.release()
+    if cassette.active:
+        logging.info(f"cassette {cassette.mode} usage: {cassette.stats}")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def session_pool():
+    """Clients of mobile_authenticate(pooled=True) are shared by all tests"""
+    yield SessionPool
+    logging.info(f"session pool usage: {SessionPool.report()}")
+    SessionPool.clear()
+
+
 # ---------------------------------standard session
 # fixtures----------------------------------------
 
 
+def pytest_addoption(parser):
+    parser.addoption("--comments_verbosity", action="store", type=int,
+                     default=None,
+                     help="Comments verbosity: 0 - failed checks only, "
+                          "1 - summary per validated list(default), "
+                          "2 - every passed check")
+    parser.addoption("--cassette_mode", action="store", default="off",
+                     choices=["off", "record", "replay"],
+                     help="record - save MGS/S2 traffic to cassette, "
+                          "replay - serve responses from cassette")
+    parser.addoption("--cassette_path", action="store", default=None,
+                     help="Cassette file, mgs.cassette.json.gz by default")
+
+
 def pytest_generate_tests(metafunc):
     if 'pict_case_args' in metafunc.fixturenames:
         pict_fixture = pict_utils.get_fixture_for_test_cases(metafunc)
@@ -64,6 +124,29 @@ def pytest_generate_tests(metafunc):
         metafunc.parametrize('mvp_case_args', list(pict_fixture.params))
 
 
+def pytest_sessionfinish(session):
+    ServiceMetadataStore.close()
+    workeroutput = getattr(session.config, 'workeroutput', None)
+    if workeroutput is not None:
+        workeroutput['tag_coverage'] = MgsContext.references_tag.shard()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """
+    pytest-xdist controller: merge tag coverage and cassette shards of
+    finished worker
+    """
+    workeroutput = getattr(node, 'workeroutput', {})
+    shard = workeroutput.get('tag_coverage')
+    if shard:
+        MgsContext.references_tag.merge_shard(shard)
+    cassette_shard = workeroutput.get('cassette')
+    if cassette_shard:
+        cassette.merge_shard(cassette_shard['path'],
+                             cassette_shard['shard_path'])
+
+
 def pytest_terminal_summary(terminalreporter, exitstatus, config):
     if "tests/references" in config.args[0]:
         tag_coverage_report(terminalreporter)
@@ -0,0 +1,70 @@
+"""
+Deferred Comments and assertion messages.
+Message can be passed as str or as callable without arguments,
+callable is called only if message is going to be used:
+check is failed, or comments verbosity level allows this comment.
+"""
+from dash_core.core.common.dash_assert.dash_assert import Assert
+from dash_core.utils.common.context import ConfigVars
+
+from test_helpers.mgs_validation_helpers.comments import Comments
+
+
+class Verbosity(object):
+    FAILURES = 0  # only failed checks messages
+    SUMMARY = 1  # plus one comment per validated list/object
+    VERBOSE = 2  # plus comment for every passed check
+
+    DEFAULT = SUMMARY
+
+
+def get_verbosity_from_options() -> int:
+    """
+    Parse pytest's ConfigVars for --comments_verbosity option
+    If not success, returns Verbosity.DEFAULT
+    """
+    try:
+        verbosity = ConfigVars.config.getoption('--comments_verbosity')
+    except (ValueError, AttributeError):
+        verbosity = None
+    return Verbosity.DEFAULT if verbosity is None else int(verbosity)
+
+
+def materialize(message) -> str:
+    return message() if callable(message) else message
+
+
+class DeferredComments(object):
+    """
+    DeferredComments.add(lambda: f"validated {key}: {value}")
+    DeferredComments.log_assert(a == b, lambda: f"expected: {a}, actual: {b}")
+    """
+    level = None
+
+    @classmethod
+    def verbosity(cls) -> int:
+        if cls.level is None:
+            cls.level = get_verbosity_from_options()
+        return cls.level
+
+    @classmethod
+    def set_verbosity(cls, level):
+        cls.level = level
+
+    @classmethod
+    def enabled(cls, level=Verbosity.VERBOSE) -> bool:
+        return cls.verbosity() >= level
+
+    @classmethod
+    def add(cls, message, level=Verbosity.VERBOSE):
+        if cls.enabled(level):
+            Comments.add_comments(materialize(message))
+
+    @classmethod
+    def log_assert(cls, condition, message='', level=Verbosity.VERBOSE):
+        """
+        Assert.log_assert with message built only for failed check,
+        passed checks are logged only if verbosity level allows
+        """
+        if not condition or cls.enabled(level):
+            Assert.log_assert(condition, materialize(message))
@@ -0,0 +1,56 @@
+import pytest
+
+from test_helpers.mgs_validation_helpers import deferred_comments
+from test_helpers.mgs_validation_helpers.deferred_comments import \
+    DeferredComments, Verbosity
+
+
+@pytest.fixture
+def logged(monkeypatch):
+    logged = {"comments": [], "asserts": []}
+    monkeypatch.setattr(deferred_comments.Comments, 'add_comments',
+                        logged["comments"].append)
+    monkeypatch.setattr(deferred_comments.Assert, 'log_assert',
+                        lambda condition, message:
+                        logged["asserts"].append((condition, message)))
+    monkeypatch.setattr(DeferredComments, 'level', None)
+    return logged
+
+
+def fail(*args):
+    raise AssertionError("message should not be built")
+
+
+class TestDeferredComments(object):
+    def test_add_is_not_built_below_level(self, logged):
+        DeferredComments.set_verbosity(Verbosity.FAILURES)
+        DeferredComments.add(fail)
+        DeferredComments.add(fail, Verbosity.SUMMARY)
+        assert logged["comments"] == []
+
+    def test_add_at_level(self, logged):
+        DeferredComments.set_verbosity(Verbosity.SUMMARY)
+        DeferredComments.add(lambda: "summary", Verbosity.SUMMARY)
+        DeferredComments.add("text", Verbosity.SUMMARY)
+        DeferredComments.add(fail)
+        assert logged["comments"] == ["summary", "text"]
+
+    def test_passed_assert_is_skipped(self, logged):
+        DeferredComments.set_verbosity(Verbosity.FAILURES)
+        DeferredComments.log_assert(True, fail)
+        assert logged["asserts"] == []
+
+    def test_failed_assert_is_always_logged(self, logged):
+        DeferredComments.set_verbosity(Verbosity.FAILURES)
+        DeferredComments.log_assert(False, lambda: "expected: 1")
+        assert logged["asserts"] == [(False, "expected: 1")]
+
+    def test_passed_assert_logged_when_verbose(self, logged):
+        DeferredComments.set_verbosity(Verbosity.VERBOSE)
+        DeferredComments.log_assert(True, lambda: "passed")
+        assert logged["asserts"] == [(True, "passed")]
+
+    def test_default_verbosity_without_option(self, logged, monkeypatch):
+        monkeypatch.setattr(deferred_comments.ConfigVars, 'config', None,
+                            raising=False)
+        assert DeferredComments.verbosity() == Verbosity.DEFAULT
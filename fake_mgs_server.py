@@ -0,0 +1,414 @@
+"""
+Local stand-in of MGS, S2 order and S2 portfolio services for offline
+load/latency runs.
+Responses are built from saved fixtures (completeView_json_response.py,
+DollarTopGainer), payload can be scaled to N accounts, M positions per
+account and L tax lots per position, latency and errors are injected by
+FakeScenario.
+
+    with FakeMGSServer(FakeScenario(accounts=50, positions=20,
+                                    latency=0.05)) as server:
+        server.apply_to_config(Context.config)
+        MGSRedesignService().complete_view_request()
+
+apply_to_config also sends requests to S2 hosts (order counts, portfolio
+info), which urls are not taken from config, to the fake server.
+
+or from command line:
+    python fake_mgs_server.py --port 8080 --accounts 50 --positions 20
+"""
+import argparse
+import copy
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, urlunsplit
+from xml.sax.saxutils import escape
+
+from requests.adapters import HTTPAdapter
+
+FIXTURES_DIR = os.path.dirname(os.path.abspath(__file__))
+COMPLETE_VIEW_FIXTURE = os.path.join(FIXTURES_DIR,
+                                     'completeView_json_response.py')
+DOLLAR_TOP_GAINER_FIXTURE = os.path.join(FIXTURES_DIR, 'DollarTopGainer')
+
+SAVED_ORDERS_XML = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<OrderETS_ViewOrderPreparedResponse><PreparedResponse>'
+    '<PrepOrderCount>{count}</PrepOrderCount>'
+    '</PreparedResponse></OrderETS_ViewOrderPreparedResponse>')
+OPEN_ORDERS_XML = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<OrderETS_GetOpenOrderCountResponse><Response>'
+    '<TotalOrderCount>{count}</TotalOrderCount>'
+    '</Response></OrderETS_GetOpenOrderCountResponse>')
+PORTFOLIO_INFO_XML = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">'
+    '<soap:Body><GetPortfolioInfoResponse><Output>{positions}</Output>'
+    '</GetPortfolioInfoResponse></soap:Body></soap:Envelope>')
+
+TAX_LOT_TEMPLATE = {
+    "price": "$10.00", "termCode": "Long", "daysGain": "$0.00",
+    "daysGainPct": "0.00%", "marketValue": "$100.00", "totalCost": "$100.00",
+    "totalCostForGainPct": "$100.00", "totalGain": "$0.00",
+    "totalGainPct": "0.00%", "lotSourceCode": "1", "originalQty": "10",
+    "remainingQty": "10", "availableQty": "10", "orderNo": "1", "legNo": "1",
+    "acquiredDate": "1577836800000", "locationCode": "1",
+    "exchangeRate": "1", "settlementCurrency": "USD",
+    "paymentCurrency": "USD", "adjPrice": "$10.00", "commPerShare": "$0.00",
+    "feesPerShare": "$0.00", "shortType": "0"}
+
+
+def load_fixture(path) -> dict:
+    """Json following 'Response:' line of saved request/response dump"""
+    with open(path) as fixture:
+        text = fixture.read()
+    response_part = text[text.index('Response:') + len('Response:'):]
+    response, _ = json.JSONDecoder().raw_decode(
+        response_part[response_part.index('{'):])
+    return response
+
+
+class FakeScenario(object):
+    """
+    accounts/positions - payload size, fixture data is used if None
+    lots - tax lots per position of taxLots response
+    latency/jitter - seconds added to every response
+    error_rate - part of requests answered with error_code
+    orders_count - value of S2 saved/open orders count responses
+    """
+
+    def __init__(self, accounts=None, positions=None, latency=0.0, jitter=0.0,
+                 error_rate=0.0, error_code=500, orders_count=0, seed=None,
+                 lots=1):
+        self.accounts = accounts
+        self.positions = positions
+        self.lots = lots
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_code = error_code
+        self.orders_count = orders_count
+        self.random = random.Random(seed)
+
+    def delay(self) -> float:
+        return max(0.0, self.latency + self.random.uniform(-self.jitter,
+                                                           self.jitter))
+
+    def is_failed(self) -> bool:
+        return self.error_rate > 0 and self.random.random() < self.error_rate
+
+
+def references_of(mgs_res, reference_type) -> dict:
+    for reference in mgs_res['mobile_response']['references']:
+        if reference['type'] == reference_type:
+            return reference
+    reference = {"type": reference_type, "data": []}
+    mgs_res['mobile_response']['references'].append(reference)
+    return reference
+
+
+def scale_accounts(mgs_res, accounts) -> dict:
+    """Clone first account (and its account_summary view) to accounts items"""
+    if accounts is None:
+        return mgs_res
+    mgs_res = copy.deepcopy(mgs_res)
+    accounts_ref = references_of(mgs_res, 'accounts')
+    template = accounts_ref['data'][0]
+    views = mgs_res['mobile_response']['views']
+    view_template = next((view for view in views
+                          if view['type'] == 'account_summary'), None)
+    views[:] = [view for view in views if view['type'] != 'account_summary']
+
+    accounts_ref['data'] = []
+    for index in range(accounts):
+        account_id = str(int(template['accountId']) + index)
+        account_uuid = f"{template['accountUuid']}{index:04d}"
+        account = dict(template, accountId=account_id,
+                       accountUuid=account_uuid,
+                       accountShortName=f"{template['acctDesc']} "
+                                        f"-{account_id[-4:]}")
+        accounts_ref['data'].append(account)
+        if view_template is not None:
+            view = copy.deepcopy(view_template)
+            view['data']['account_uuid'] = account_uuid
+            view['data']['account_name'] = account['accountShortName']
+            views.append(view)
+    for view in views:
+        if 'account_uuids' in view['data']:
+            view['data']['account_uuids'] = [
+                account['accountUuid'] for account in accounts_ref['data']]
+    return mgs_res
+
+
+def scale_positions(mgs_res, positions) -> dict:
+    """positions generated positions (and instruments) for every account"""
+    if positions is None:
+        return mgs_res
+    mgs_res = copy.deepcopy(mgs_res)
+    accounts = references_of(mgs_res, 'accounts')['data']
+    positions_ref = references_of(mgs_res, 'positions')
+    instruments_ref = references_of(mgs_res, 'instruments')
+    positions_ref['data'] = []
+    instruments_ref['data'] = []
+    for index in range(positions):
+        symbol = f"SYM{index}"
+        instruments_ref['data'].append({
+            "symbol": symbol, "productType": "EQ", "typeCode": "EQ",
+            "price": f"{10 + index}.00"})
+    for account in accounts:
+        for index in range(positions):
+            positions_ref['data'].append({
+                "accountId": account['accountId'],
+                "accountUuid": account['accountUuid'],
+                "positionId": f"{account['accountId']}{index:05d}",
+                "symbol": f"SYM{index}",
+                "quantity": "100",
+                "marketValue": f"${(10 + index) * 100:,.2f}",
+                "daysGain": "$0.00",
+                "totalGain": "$0.00"})
+    return mgs_res
+
+
+def tax_lots_response(position, lots) -> dict:
+    """taxLots response of one position with lots tax lots"""
+    return {"mobile_response": {
+        "views": [],
+        "references": [
+            {"type": "positions", "data": [position]},
+            {"type": "instruments", "data": [{
+                "positionId": position['positionId'],
+                "symbol": position.get('symbol'), "productType": "EQ",
+                "typeCode": "EQ", "price": "$10.00"}]},
+            {"type": "taxlots", "data": [
+                dict(TAX_LOT_TEMPLATE, positionId=position['positionId'],
+                     positionLotId=f"{position['positionId']}{index:03d}")
+                for index in range(lots)]}]}}
+
+
+def portfolio_info_xml(positions) -> str:
+    """S2 portfolio info: one PositionList element per position"""
+    fields = (('AccountId', 'accountId'), ('PositionId', 'positionId'),
+              ('Symbol', 'symbol'), ('Qty', 'quantity'),
+              ('MarketValue', 'marketValue'))
+    position_lists = ''.join(
+        '<PositionList>' + ''.join(
+            f"<{tag}>{escape(str(position.get(key, '')))}</{tag}>"
+            for tag, key in fields) + '</PositionList>'
+        for position in positions)
+    return PORTFOLIO_INFO_XML.format(positions=position_lists)
+
+
+def request_field(body, key, default=None):
+    """Field of json request body, default for not json bodies"""
+    try:
+        return json.loads(body).get(key, default)
+    except (ValueError, AttributeError):
+        return default
+
+
+class FakeMGSServer(object):
+    """Threaded http server, routes by last url segment (request name)"""
+
+    def __init__(self, scenario=None, host='127.0.0.1', port=0):
+        self.scenario = scenario or FakeScenario()
+        self.host = host
+        self.port = port
+        self.hits = Counter()
+        self._server = None
+        self._thread = None
+        self._payloads = {}
+        self._positions = None
+        self._adapter_send = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def payloads(self) -> dict:
+        """Scaled mgs responses, built once per server start"""
+        if not self._payloads:
+            complete_view = scale_positions(
+                scale_accounts(load_fixture(COMPLETE_VIEW_FIXTURE),
+                               self.scenario.accounts),
+                self.scenario.positions)
+            accounts_only = copy.deepcopy(complete_view)
+            accounts_only['mobile_response']['views'] = []
+            self._positions = references_of(complete_view, 'positions')['data']
+            self._payloads = {
+                'completeView': json.dumps(complete_view),
+                'accountList': json.dumps(accounts_only),
+                'allBrokerage': json.dumps(complete_view),
+                'PortfolioInfo': portfolio_info_xml(self._positions),
+                'dollarTopGainer': json.dumps(
+                    load_fixture(DOLLAR_TOP_GAINER_FIXTURE)),
+            }
+        return self._payloads
+
+    def tax_lots(self, body) -> str:
+        """taxLots response of requested (or first) position"""
+        self.payloads()
+        position_id = request_field(body, 'positionId')
+        position = next((position for position in self._positions
+                         if position.get('positionId') == position_id),
+                        self._positions[0] if self._positions else
+                        {"positionId": position_id or '0'})
+        return json.dumps(tax_lots_response(position, self.scenario.lots))
+
+    def respond(self, path, body) -> tuple:
+        """:return: (status code, content type, response text)"""
+        if body.lstrip().startswith('<'):
+            if 'Prepared' in body:
+                route, xml = 'PreparedOrders', SAVED_ORDERS_XML.format(
+                    count=self.scenario.orders_count)
+            elif 'Portfolio' in body or 'Position' in body:
+                route, xml = 'PortfolioInfo', self.payloads()['PortfolioInfo']
+            else:
+                route, xml = 'OpenOrders', OPEN_ORDERS_XML.format(
+                    count=self.scenario.orders_count)
+            self.hits[route] += 1
+            return 200, 'text/xml', xml
+
+        route = urlsplit(path).path.rstrip('/').split('/')[-1]
+        self.hits[route] += 1
+        if route == 'taxLots':
+            return 200, 'application/json', self.tax_lots(body)
+        payload = self.payloads().get(route)
+        if payload is None:
+            return 404, 'application/json', json.dumps(
+                {"error": f"Not supported by fake server: {route}"})
+        return 200, 'application/json', payload
+
+    def handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _serve(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length).decode('utf-8', 'replace')
+                time.sleep(server.scenario.delay())
+                if server.scenario.is_failed():
+                    server.hits['errors'] += 1
+                    code, content_type, text = \
+                        server.scenario.error_code, 'application/json', \
+                        json.dumps({"error": "Injected by fake server"})
+                else:
+                    code, content_type, text = server.respond(self.path, body)
+                content = text.encode('utf-8')
+                self.send_response(code)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = _serve
+            do_POST = _serve
+
+            def log_message(self, format, *args):
+                logging.debug(f"FakeMGSServer: {format % args}")
+
+        return Handler
+
+    def start(self):
+        self._server = ThreadingHTTPServer((self.host, self.port),
+                                           self.handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+        logging.info(f"FakeMGSServer: started on {self.url}")
+        return self
+
+    def stop(self):
+        self.release_backends()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+        self._server = None
+        self._thread = None
+        logging.info(f"FakeMGSServer: stopped, hits: {dict(self.hits)}")
+
+    def wait(self):
+        """Block until server is stopped"""
+        if self._thread is not None:
+            self._thread.join()
+
+    def apply_to_config(self, config: dict):
+        """
+        Point 'mobile_url'/'base_url' (used by build_url) to fake server,
+        S2 services are redirected by redirect_backends
+        """
+        config['mobile_url'] = self.url
+        config['base_url'] = self.url
+        self.redirect_backends()
+
+    def redirect_backends(self):
+        """
+        Urls of S2 order and portfolio services are built by service classes
+        and backend helpers, not from config, so every request made with
+        requests to other host is sent to fake server, path and body are kept.
+        Redirect is removed by release_backends or stop
+        """
+        if self._adapter_send is not None:
+            return
+        self._adapter_send = HTTPAdapter.send
+        server = self
+        netloc = f"{self.host}:{self.port}"
+
+        def send(adapter, request, **kwargs):
+            parts = urlsplit(request.url)
+            if parts.netloc != netloc:
+                request = request.copy()
+                request.url = urlunsplit(('http', netloc, parts.path,
+                                          parts.query, ''))
+            return server._adapter_send(adapter, request, **kwargs)
+
+        HTTPAdapter.send = send
+
+    def release_backends(self):
+        if self._adapter_send is not None:
+            HTTPAdapter.send = self._adapter_send
+        self._adapter_send = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--accounts', type=int, default=None)
+    parser.add_argument('--positions', type=int, default=None)
+    parser.add_argument('--lots', type=int, default=1)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error_rate', type=float, default=0.0)
+    parser.add_argument('--error_code', type=int, default=500)
+    parser.add_argument('--orders_count', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    scenario = FakeScenario(args.accounts, args.positions, args.latency,
+                            args.jitter, args.error_rate, args.error_code,
+                            args.orders_count, args.seed, args.lots)
+    server = FakeMGSServer(scenario, args.host, args.port).start()
+    try:
+        server.wait()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
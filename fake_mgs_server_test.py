@@ -0,0 +1,57 @@
+import json
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+from fake_mgs_server import FakeMGSServer, FakeScenario
+
+
+@pytest.fixture
+def server():
+    send = HTTPAdapter.send
+    with FakeMGSServer(FakeScenario(accounts=2, positions=3, lots=2,
+                                    orders_count=4)) as server:
+        yield server
+    assert HTTPAdapter.send is send
+
+
+def references(response) -> dict:
+    return {reference['type']: reference['data']
+            for reference in response.json()['mobile_response']['references']}
+
+
+class TestFakeMGSServer(object):
+    def test_scaled_positions(self, server):
+        config = {}
+        server.apply_to_config(config)
+        response = requests.post(f"{config['mobile_url']}/v1/portfolio/"
+                                 f"completeView", data='{}')
+        positions = references(response)['positions']
+        assert len(positions) == 6
+        assert all(position['accountId'] for position in positions)
+
+    def test_tax_lots_per_position(self, server):
+        complete_view = requests.post(f"{server.url}/v1/portfolio/"
+                                      f"completeView", data='{}')
+        position_id = references(complete_view)['positions'][4]['positionId']
+        response = requests.post(f"{server.url}/v1/portfolio/taxLots",
+                                 data=json.dumps({"positionId": position_id}))
+        tax_lots = references(response)['taxlots']
+        assert [lot['positionId'] for lot in tax_lots] == [position_id] * 2
+        assert len({lot['positionLotId'] for lot in tax_lots}) == 2
+
+    def test_s2_services_redirected(self, server):
+        server.apply_to_config({})
+        saved = requests.post('https://s2.invalid/OrderETS',
+                              data='<ViewOrderPrepared/>')
+        portfolio = requests.post('https://s2.invalid/Portfolio',
+                                  data='<GetPortfolioInfo/>')
+        assert '<PrepOrderCount>4</PrepOrderCount>' in saved.text
+        assert portfolio.text.count('<PositionList>') == 6
+        assert server.hits['PreparedOrders'] == 1
+        assert server.hits['PortfolioInfo'] == 1
+
+    def test_not_supported_route(self, server):
+        response = requests.post(f"{server.url}/v1/unknown", data='{}')
+        assert response.status_code == 404
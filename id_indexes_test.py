@@ -0,0 +1,52 @@
+import pytest
+
+from test_helpers import utils
+from test_helpers.mgs_validation_helpers.mgs_mapping_helpers import \
+    PositionsInstrumentsMap, ReferencesTaxLotMap
+from test_helpers.utils import cached_index
+from validation_benchmark import s2_payloads
+
+
+@pytest.fixture(autouse=True)
+def id_indexes():
+    utils._id_indexes.clear()
+    yield utils._id_indexes
+    utils._id_indexes.clear()
+
+
+def test_index_is_built_once_per_payload():
+    payload, built = {"Output": []}, []
+
+    def build():
+        built.append(1)
+        return {"index": len(built)}
+
+    first = cached_index(payload, 'PositionId', build)
+    assert cached_index(payload, 'PositionId', build) is first
+    assert cached_index(payload, 'PositionLotId', build) is not first
+    assert cached_index({"Output": []}, 'PositionId', build) is not first
+    assert len(built) == 3
+
+
+def test_latest_indexes_are_kept(monkeypatch, id_indexes):
+    monkeypatch.setattr(utils, 'ID_INDEXES_MAX_SIZE', 2)
+    payloads = [{"n": n} for n in range(3)]
+    for payload in payloads:
+        cached_index(payload, 'Id', dict)
+    assert [key[0] for key in id_indexes] == [id(payload)
+                                              for payload in payloads[1:]]
+
+
+def test_maps_share_index_of_same_response():
+    payloads = s2_payloads(3)
+    portfolio_info, lots_info = payloads["portfolio_info"], \
+        payloads["lots_info"]
+    position_ids = [position["PositionId"] for position
+                    in portfolio_info["Output"]["PositionList"]]
+    lot_ids = [lot["Lot"]["PositionLotId"] for lot
+               in lots_info["Output"]["PositionList"]["LotList"]]
+    position_maps = [PositionsInstrumentsMap(portfolio_info, position_id)
+                     for position_id in position_ids]
+    lot_maps = [ReferencesTaxLotMap(lots_info, lot_id) for lot_id in lot_ids]
+    assert len({id(mapping.position_by_id) for mapping in position_maps}) == 1
+    assert len({id(mapping.lot_by_position) for mapping in lot_maps}) == 1
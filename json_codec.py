@@ -0,0 +1,62 @@
+"""
+JSON encode/decode for requests bodies and responses.
+orjson is used when it is installed, stdlib json otherwise:
+
+    body = dumps({"accountUuid": uuid})
+    mgs_res = response_json(response)
+"""
+import json
+import re
+
+try:
+    import orjson
+except ImportError:  # stdlib json is used
+    orjson = None
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+# 20+ digits: may be out of 64 bit range, orjson turns such integers to float
+_long_digits = re.compile('[0-9]{20,}')
+_long_digits_bytes = re.compile(b'[0-9]{20,}')
+
+
+def _has_long_digits(text) -> bool:
+    if isinstance(text, str):
+        return _long_digits.search(text) is not None
+    return _long_digits_bytes.search(text) is not None
+
+
+def dumps(obj) -> str:
+    """
+    Compact json, ASCII only: str body is encoded with latin-1 by
+    http.client, so non-ASCII output of orjson is redone with json.dumps,
+    which escapes it
+    """
+    if orjson is not None:
+        try:
+            text = orjson.dumps(obj).decode('utf-8')
+        except TypeError:  # not supported by orjson types, like int keys
+            pass
+        else:
+            if text.isascii():
+                return text
+    return json.dumps(obj)
+
+
+def loads(text):
+    """
+    :param text: str or bytes
+    NaN/Infinity are rejected by orjson and integers out of 64 bit range
+    lose precision, such documents are decoded with json.loads
+    """
+    if orjson is not None and not _has_long_digits(text):
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(text)
+
+
+def response_json(response):
+    """response.json() replacement, decodes raw body bytes"""
+    return loads(response.content)
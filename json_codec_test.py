@@ -0,0 +1,36 @@
+import json
+
+import pytest
+
+from test_helpers.mgs_service_helpers import json_codec
+
+
+def test_dumps_is_ascii():
+    body = json_codec.dumps({"name": "Café €"})
+    assert body.isascii()
+    body.encode('latin-1')
+    assert json.loads(body) == {"name": "Café €"}
+
+
+def test_dumps_not_supported_by_orjson_types():
+    assert json.loads(json_codec.dumps({1: "a"})) == {"1": "a"}
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('{"a": 1}', {"a": 1}),
+    (b'{"a": [1.5, null]}', {"a": [1.5, None]}),
+    ('{"big": 123456789012345678901234567890}',
+     {"big": 123456789012345678901234567890}),
+])
+def test_loads(text, expected):
+    assert json_codec.loads(text) == expected
+
+
+def test_loads_nan():
+    value = json_codec.loads('{"value": NaN}')["value"]
+    assert value != value
+
+
+def test_loads_broken_json_raises():
+    with pytest.raises(ValueError):
+        json_codec.loads('{"a": ')
@@ -0,0 +1,196 @@
+"""
+Incremental walking of mobile_response json.
+Views and references data objects are parsed one by one from chunks of
+text/bytes (file, response.iter_content), so checks can run as each object
+arrives and only current object is kept in memory:
+
+    for obj in iter_mobile_response(response.iter_content(CHUNK_SIZE)):
+        obj.section  # 'views' or 'references'
+        obj.type  # view type or references type: 'positions', 'accounts',..
+        obj.data  # view object or one item of references 'data' list
+"""
+import codecs
+import json
+import re
+
+CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+_whitespace = re.compile(r'[ \t\n\r]*')
+
+
+class StreamedObject(object):
+    __slots__ = ('section', 'type', 'data', 'index')
+
+    def __init__(self, section, type_, data, index):
+        self.section = section
+        self.type = type_
+        self.data = data
+        self.index = index
+
+    def __repr__(self):
+        return f"StreamedObject({self.section}, {self.type}, #{self.index})"
+
+
+class JsonChunksReader(object):
+    """
+    Json tokens reader over iterable of str/bytes chunks.
+    Consumed part of buffer is dropped, buffer keeps only not parsed text
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._bytes_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _read_more(self) -> bool:
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self.eof = True
+            return False
+        if isinstance(chunk, bytes):
+            chunk = self._bytes_decoder.decode(chunk)
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _error(self, message):
+        return json.JSONDecodeError(message, self.buffer, self.pos)
+
+    def peek(self) -> str:
+        """Next not whitespace char, '' at the end of stream"""
+        while True:
+            self.pos = _whitespace.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._read_more():
+                return ''
+
+    def expect(self, chars) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise self._error(f"Expecting one of '{chars}'")
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Parse whole next json value"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._read_more():
+                    continue
+                raise
+            # number at the end of buffer can be continued in next chunk
+            if end == len(self.buffer) and not self.eof and self._read_more():
+                continue
+            self.pos = end
+            return value
+
+    def members(self):
+        """Keys of object (after '{'), caller consumes every key's value"""
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            if self.expect(',}') == '}':
+                return
+
+    def items(self):
+        """Indexes of array (after '['), caller consumes every item"""
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        index = 0
+        while True:
+            yield index
+            index += 1
+            if self.expect(',]') == ']':
+                return
+
+
+def _walk_views(reader):
+    if reader.peek() != '[':
+        view = reader.value()
+        if isinstance(view, dict):
+            yield StreamedObject('views', view.get('type'), view, 0)
+        return
+    reader.expect('[')
+    for index in reader.items():
+        view = reader.value()
+        yield StreamedObject('views', view.get('type')
+                             if isinstance(view, dict) else None, view, index)
+
+
+def _walk_reference(reader):
+    """Items of one references object, 'data' before 'type' is buffered"""
+    if reader.peek() != '{':
+        reader.value()
+        return
+    reader.expect('{')
+    reference_type = None
+    pending = []
+    for key in reader.members():
+        if key == 'type':
+            reference_type = reader.value()
+            for index, item in pending:
+                yield StreamedObject('references', reference_type, item, index)
+            pending = []
+        elif key == 'data' and reader.peek() == '[':
+            reader.expect('[')
+            for index in reader.items():
+                item = reader.value()
+                if reference_type is None:
+                    pending.append((index, item))
+                else:
+                    yield StreamedObject('references', reference_type,
+                                         item, index)
+        else:
+            reader.value()
+    for index, item in pending:
+        yield StreamedObject('references', reference_type, item, index)
+
+
+def _walk_mobile_response(reader):
+    reader.expect('{')
+    for key in reader.members():
+        if key == 'views':
+            yield from _walk_views(reader)
+        elif key == 'references' and reader.peek() == '[':
+            reader.expect('[')
+            for _ in reader.items():
+                yield from _walk_reference(reader)
+        else:
+            reader.value()
+
+
+def iter_mobile_response(chunks):
+    """
+    StreamedObject for every view and every references data item
+    :param chunks: iterable of str or bytes
+    """
+    reader = JsonChunksReader(chunks)
+    reader.expect('{')
+    for key in reader.members():
+        if key == 'mobile_response':
+            yield from _walk_mobile_response(reader)
+        else:
+            reader.value()
+
+
+def iter_file_chunks(file_path, chunk_size=CHUNK_SIZE):
+    with open(file_path, 'rb') as json_file:
+        for chunk in iter(lambda: json_file.read(chunk_size), b''):
+            yield chunk
+
+
+def iter_response_chunks(response, chunk_size=CHUNK_SIZE):
+    """requests.Response body chunks, response.raw is read if stream=True"""
+    return response.iter_content(chunk_size=chunk_size)
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from test_helpers.mgs_service_helpers.json_stream import JsonChunksReader, \
+    iter_mobile_response
+
+RESPONSE = {"mobile_response": {
+    "views": [{"type": "net_assets_summary", "data": {"value": "$1.00"}},
+              {"type": "account_summary", "data": {"value": "$2.00"}}],
+    "references": [
+        {"type": "accounts", "data": [{"accountId": "1"},
+                                      {"accountId": "2"}]},
+        {"data": [{"positionId": 10, "quantity": 12345.678}],
+         "type": "positions"},
+        {"type": "instruments", "data": []}]}}
+VIEWS = RESPONSE["mobile_response"]["views"]
+
+
+def chunked(text, size):
+    return [text[start:start + size] for start in range(0, len(text), size)]
+
+
+def objects(chunks):
+    return [(obj.section, obj.type, obj.data, obj.index)
+            for obj in iter_mobile_response(chunks)]
+
+
+EXPECTED = [
+    ('views', 'net_assets_summary', VIEWS[0], 0),
+    ('views', 'account_summary', VIEWS[1], 1),
+    ('references', 'accounts', {"accountId": "1"}, 0),
+    ('references', 'accounts', {"accountId": "2"}, 1),
+    ('references', 'positions', {"positionId": 10, "quantity": 12345.678}, 0)]
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64, 100000])
+def test_objects_do_not_depend_on_chunk_size(size):
+    text = json.dumps(RESPONSE, indent=1)
+    assert objects(chunked(text, size)) == EXPECTED
+    assert objects(chunked(text.encode(), size)) == EXPECTED
+
+
+def test_multibyte_chars_split_between_chunks():
+    view = {"type": "v", "data": "é€"}
+    data = json.dumps({"mobile_response": {"views": [view]}},
+                      ensure_ascii=False).encode('utf-8')
+    assert objects(chunked(data, 1)) == [('views', 'v', view, 0)]
+
+
+def test_number_at_chunk_end_is_not_cut():
+    reader = JsonChunksReader(['[123', '45]'])
+    reader.expect('[')
+    assert reader.value() == 12345
+
+
+def test_other_keys_are_skipped():
+    text = json.dumps({"status": {"code": 0},
+                       "mobile_response": {"header": [1, 2], "views": {}}})
+    assert objects(chunked(text, 5)) == [('views', None, {}, 0)]
+
+
+def test_broken_json_raises():
+    with pytest.raises(json.JSONDecodeError):
+        objects(chunked('{"mobile_response": {"views": [{"type": ', 4))
@@ -1,12 +1,23 @@
-import os
 import argparse
 import logging
 import json
 import datetime
-import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from os import path, makedirs
 
+try:
+    from test_helpers.mgs_service_helpers.json_stream import iter_file_chunks, JsonChunksReader
+except ImportError:
+    try:
+        # stand-alone run: json_stream.py is next to this script
+        from json_stream import iter_file_chunks, JsonChunksReader
+    except ImportError:
+        # --stream is not available
+        iter_file_chunks = JsonChunksReader = None
+
 # All the key nodes of json file are constants.
 # Example: "mobile_response", "views", "type", "data", "references"
 # The values nodes of json may differ:
@@ -15,246 +26,372 @@ from os import path, makedirs
 # Exmaple 3: "timeString2": "11/5/2021, 04:10 PM ET" should be this format and "percentChange": "+26.47%" should be either + or - decimal percentage
 
 def verify_string(data):
-
+    return isinstance(data, str)
 
 
 def verify_symbol_existence_in_the_list(data):
+    # Every symbol of "views" "data" "symbols" should be one of the "references" instruments
+    errors = []
+    symbols = data['mobile_response']['views']['data']['symbols']
+    instruments = {instrument.get("symbol") for instrument in data['mobile_response']['references'][0]['data']}
+    for symbol in symbols:
+        if symbol not in instruments:
+            errors.append("Error: symbol " + str(symbol) + " is not found in references instruments")
+    return errors
 
 
-def check_data_references_values(data):
-    # Values to check for keys
-    # "symbol", "productType", "exchangeCode", "exchangeName", "exchangeDesc", "typeName", "typeDesc", "symbolDescription";
-    # "low", "fastMktFlag", "asksize", "price", "bid", "bidsize", "quoteType", "quoteStatus", "newsFlag", "close", "high", "timeZone";
-    # "ask", "volume", "open", "quoteExchangeCode", "quoteSymbol", "timeStamp", "haltedFlag", "change", "timeString", "timeString2", "percentChange"
-
-###verify symbol
-    if "symbol" in data:
-        if type(data["symbol"]) != str:
-            print("Data Reference Value Error. The value pair of the key 'symbol' is not a string")
-###verify productType
-    if "productType" in data:
-        if type(data["productType"]) != str:
-            print("Data Reference Value Error. The value pair of the key 'productType' is not a string")
-###verify exchangeCode
-    if "exchangeCode" in data:
-        if type(data["exchangeCode"]) != str:
-            print("Data Reference Value Error. The value pair of the key 'exchangeCode' is not a string")
-###verify exchangeName
-    if "exchangeName" in data:
-        if type(data["exchangeName"]) != str:
-            print("Data Reference Value Error. The value pair of the key 'exchangeName' is not a string")
-###verify exchangeDesc
-    if "exchangeDesc" in data:
-        ö
-    if "typeName" in data:
-        if type(data["typeName"]) != str:
-            print("Data Reference Value Error. The value pair of the key 'typeName' is not a string")
-###verify typeDesc
-    if "typeDesc" in data:
-        if type(data["typeDesc"]) != str:
-            print("Data Reference Value Error. The value pair of the key 'typeDesc' is not a string")
-###verify symbolDescription
-    if "symbolDescription" in data:
-        if type(data["symbolDescription"]) != str:
-            print("Data Reference Value Error. The value pair of the key 'symbolDescription' is not a string")
-###verify low
-    if "low" in data:
-        if data["low"].isdecimal() == True:
-                print("Data Reference Value Error. The value pair of the key 'low' is not a float" + data["low"])
-        try:
-            float(data["low"])
-        except:
-            print("Data Reference Value Error. The value pair of the key 'low' is not a float" + data["low"])
-###verify fastMktFlag
-    if "fastMktFlag" in data:
-        if type(data["fastMktFlag"]) != int:
-                print("Data Reference Value Error. The value pair of the key 'fastMktFlag' is not a integer")
-###verify asksize
-    if "asksize" in data:
-        if type(data["asksize"]) != int:
-                print("Data Reference Value Error. The value pair of the key 'asksize' is not a integer")
-###verify price
-    if "price" in data:
-        if data["price"].isdecimal() == True:
-            print("Data Reference Value Error. The value pair of the key 'price' is not a float" + data["price"])
-        try:
-            float(data["price"])
-        except:
-            print("Data Reference Value Error. The value pair of the key 'price' is not a float" + data["price"])
-###verify bid
-    if "bid" in data:
-        if data["bid"].isdecimal() == True:
-            print("Data Reference Value Error. The value pair of the key 'bid' is not a float" + "It is: " + data["bid"])
-        try:
-            float(data["bid"])
-        except:
-            print("Data Reference Value Error. The value pair of the key 'bid' is not a float" + "It is: " + data["bid"])
-###verify bidsize
-    if "bidsize" in data:
-        if type(data["bidsize"]) != int:
-                print("Data Reference Value Error. The value pair of the key 'bidsize' is not a integer" + "It is: " + data["bidsize"])
-###verify quoteType
-    if "quoteType" in data:
-        if type(data["quoteType"]) != str:
-            print("Data Reference Value Error. The value pair of the key 'quoteType' is not a string" + "It is: " + data["quoteType"])
-###verify quoteStatus
-    if "quoteStatus" in data:
-        if type(data["quoteStatus"]) != int:
-            print("Data Reference Value Error. The value pair of the key 'quoteStatus' is not a integer" + "It is: " + data["quoteType"])
-###verify newsFlag
-    if "newsFlag" in data:
-        if type(data["newsFlag"]) != bool:
-            print("Data Reference Value Error. The value pair of the key 'newsFlag' is not a boolean" + "It is: " + data["newsFlag"])
-###verify close
-    if "close" in data:
-        if data["close"].isdecimal() == True:
-            print("Data Reference Value Error. The value pair of the key 'close' is not a float" + "It is: " + data["close"])
-        try:
-            float(data["close"])
-        except:
-            print("Data Reference Value Error. The value pair of the key 'close' is not a float" + "It is: " + data["close"])
-###verify high
-    if "high" in data:
-        if data["high"].isdecimal() == True:
-            print("Data Reference Value Error. The value pair of the key 'high' is not a float" + "It is: " + data["high"])
-        try:
-            float(data["high"])
-        except:
-            print("Data Reference Value Error. The value pair of the key 'high' is not a float" + "It is: " + data["high"])
-###verify timeZone
-    if "timeZone" in data:
-        if data["timeZone"] != "EST":
-            print("Data Reference Value Error. The value pair of the key 'timeZone' is not a EST" + "It is: " + data["timeZone"])
-###verify ask
-    if "ask" in data:
-        if data["ask"].isdecimal() == True:
-            print("Data Reference Value Error. The value pair of the key 'ask' is not a float" + "It is: " + data["ask"])
-        try:
-            float(data["ask"])
-        except:
-            print("Data Reference Value Error. The value pair of the key 'ask' is not a float" + "It is: " + data["ask"])
-###verify volume
-    if "volume" in data:
-        val = data["volume"].split(",")
-        for item in val:
-            if item.isdigit() != True:
-                print("Data Reference Value Error. The value pair of the key 'volume' is not a digit" + "It is: " + data["volume"])
-###verify open
-    if "open" in data:
-        if data["open"].isdecimal() == True:
-            print("Data Reference Value Error. The value pair of the key 'open' is not a float" + "It is: " + data["open"])
-        try:
-            float(data["open"])
-        except:
-            print("Data Reference Value Error. The value pair of the key 'open' is not a float" + "It is: " + data["open"])
-###verify quoteExchangeCode
-    if "quoteExchangeCode" in data:
-        if type(data["quoteExchangeCode"]) != str:
-            print("Data Reference Value Error. The value pair of the key 'quoteExchangeCode' is not a string" + "It is: " + data["quoteExchangeCode"])
-###verify quoteSymbol
-    if "quoteSymbol" in data:
-        if type(data["quoteSymbol"]) != str:
-            print("Data Reference Value Error. The value pair of the key 'quoteSymbol' is not a string" + "It is: " + data["quoteSymbol"])
-###verify timeStamp
-    if "timeStamp" in data:
-        val = data["timeStamp"][0:-7]
-        try:
-            datetime.datetime.strptime(val, "%B %d, %Y, %H:%M")
-        except:
-            print("Data Reference Value Error. The value pair of the key 'timeStamp' is not in proper format" + "It is: " + data["timeStamp"])
-###haltedFlag
-    if "haltedFlag" in data:
-        if type(data["haltedFlag"]) != int:
-            print("Data Reference Value Error. The value pair of the key 'haltedFlag' is not a integer" + "It is: " + data["haltedFlag"])
-###verify change
-    if "change" in data:
-        #if data["change"].startswith("+") or data["change"].startswith("-"):
-            #print("True")
-        if (data["change"][0] != "+") and (data["change"][0] != "-"):
-            print("Data Reference Value Error. The value pair of the key 'change' first value is not +/- a modulous float.. " + "It is: " + data["change"])
-        if data["change"][1:].isdecimal() == True:
-            print("Data Reference Value Error. The value pair of the key 'change' is not a modulous float" + "It is: " + data["change"])
-        try:
-            float(data["change"][1:])
-        except:
-            print("Data Reference Value Error. The value pair of the key 'change' is not a modulous float" + "It is: " + data["change"])
-###verify timeString
-    if "timeString" in data:
-        val = data["timeString"][0:-7]
-        try:
-            datetime.datetime.strptime(val, "%B %d, %Y, %H:%M")
-        except:
-            print("Data Reference Value Error. The value pair of the key 'timeString' is not in proper format" + "It is: " + data["timeString"])
-###verify timeString2
-    if "timeString2" in data:
-        val = data["timeString2"][0:-6]
-        try:
-            datetime.datetime.strptime(val, "%d/%m/%Y, %H:%M")
-        except:
-            print("Data Reference Value Error. The value pair of the key 'timeString2' is not in proper format" + "It is: " + data["timeString2"])
-###verify percentChange
-    if "percentChange" in data:
-        if (data["percentChange"][0] != "+") and (data["percentChange"][0] != "-"):
-            print("Data Reference Value Error. The value pair of the key 'percentChange' is not a modulous float percentage" + "It is: " + data["percentChange"])
-        if data["percentChange"][-1] != "%":
-            print("No '%'. Data Reference Value Error. The value pair of the key 'percentChange' is not a modulous float percentage" + "It is: " + data["percentChange"])
-        if data["percentChange"][1:-1].isdecimal() == True:
-            print("Data Reference Value Error. The value pair of the key 'percentChange' is not a modulous float percentage" + "It is: " + data["percentChange"])
-        try:
-            float(data["percentChange"][1:-1])
-        except:
-            print("Data Reference Value Error. The value pair of the key 'percentChange' is not a modulous float percentage" + "It is: " + data["percentChange"])
+class RuleError(object):
+    # One failed field rule: index of record in references list, key, rule name, actual value
+    __slots__ = ("index", "key", "rule", "value")
 
+    def __init__(self, index, key, rule, value):
+        self.index = index
+        self.key = key
+        self.rule = rule
+        self.value = value
 
+    @property
+    def message(self):
+        return ("Data Reference Value Error. The value pair of the key '" + self.key + "' is not " +
+                RULE_DESCRIPTIONS[self.rule] + ". It is: " + str(self.value))
+
+    def as_dict(self):
+        return {"index": self.index, "key": self.key, "rule": self.rule, "value": self.value,
+                "message": self.message}
 
-def json_automate(out_file_path):
-    # Json parsing and comparison
-    with open(out_file_path + "/dollar_top_gain.json") as f:
-        hil_flow_control_packets = json.load(f)
 
-    # now verify the flow control values:
-    #mobile_reponse_type = hil_flow_control_packets['mobile_response']['views']['type']
-    #print("resp_type: " + mobile_reponse_type)
+@lru_cache(maxsize=4096)
+def _is_date(value, date_format, suffix_length):
+    try:
+        datetime.datetime.strptime(value[0:-suffix_length], date_format)
+    except ValueError:
+        return False
+    return True
+
+
+def _is_decimal_string(value):
+    # "15.43": float number as string, but not integer digits only string.
+    # Number rule is float(), as in original checks and in value_parsing.to_float of test helpers,
+    # which is not imported here, main.py runs stand-alone
+    if not isinstance(value, str) or value.isdecimal():
+        return False
+    try:
+        float(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _is_signed_decimal(value):
+    # "+1.25", "-0.5"
+    return isinstance(value, str) and value[:1] in ("+", "-") and _is_decimal_string(value[1:])
+
+
+def _is_signed_percent(value):
+    # "+26.47%", "-3.1%"
+    return isinstance(value, str) and value[-1:] == "%" and _is_signed_decimal(value[:-1])
+
+
+def _is_digits_groups(value):
+    # "1,234,567"
+    return isinstance(value, str) and all(item.isdigit() for item in value.split(","))
+
+
+# rule name: (check, description for error message)
+RULE_CHECKS = {
+    "string": (lambda value: isinstance(value, str), "a string"),
+    "int": (lambda value: type(value) == int, "a integer"),
+    "bool": (lambda value: type(value) == bool, "a boolean"),
+    "decimal": (_is_decimal_string, "a float"),
+    "signed_decimal": (_is_signed_decimal, "a modulous float"),
+    "signed_percent": (_is_signed_percent, "a modulous float percentage"),
+    "digits": (_is_digits_groups, "a digit"),
+    "est": (lambda value: value == "EST", "a EST"),
+    # "November 5, 2021, 03:10 PM EST"
+    "time_string": (lambda value: isinstance(value, str) and _is_date(value, "%B %d, %Y, %H:%M", 7),
+                    "in proper format"),
+    # "11/5/2021, 04:10 PM ET"
+    "time_string2": (lambda value: isinstance(value, str) and _is_date(value, "%d/%m/%Y, %H:%M", 6),
+                     "in proper format"),
+}
+RULE_DESCRIPTIONS = {rule: description for rule, (_, description) in RULE_CHECKS.items()}
+
+# Values rules of dollarTopGainer "references" instruments, key: rule name
+INSTRUMENT_RULES = {
+    "symbol": "string",
+    "productType": "string",
+    "exchangeCode": "string",
+    "exchangeName": "string",
+    "exchangeDesc": "string",
+    "typeName": "string",
+    "typeDesc": "string",
+    "symbolDescription": "string",
+    "low": "decimal",
+    "fastMktFlag": "int",
+    "asksize": "int",
+    "price": "decimal",
+    "bid": "decimal",
+    "bidsize": "int",
+    "quoteType": "string",
+    "quoteStatus": "int",
+    "newsFlag": "bool",
+    "close": "decimal",
+    "high": "decimal",
+    "timeZone": "est",
+    "ask": "decimal",
+    "volume": "digits",
+    "open": "decimal",
+    "quoteExchangeCode": "string",
+    "quoteSymbol": "string",
+    "timeStamp": "time_string",
+    "haltedFlag": "int",
+    "change": "signed_decimal",
+    "timeString": "time_string",
+    "timeString2": "time_string2",
+    "percentChange": "signed_percent",
+}
+
+
+class RecordValidator(object):
+    # Rules spec compiled once to (key, rule, check) list, keys missing in record are not checked
+
+    def __init__(self, rules):
+        self.rules = [(key, rule, RULE_CHECKS[rule][0]) for key, rule in rules.items()]
+
+    def validate(self, record, index=0):
+        errors = []
+        for key, rule, check in self.rules:
+            if key in record:
+                value = record[key]
+                if not check(value):
+                    errors.append(RuleError(index, key, rule, value))
+        return errors
+
+    def validate_column(self, records):
+        # Same rules checked key by key over whole list, errors are sorted by record index
+        errors = []
+        for key, rule, check in self.rules:
+            for index, record in enumerate(records):
+                if key in record:
+                    value = record[key]
+                    if not check(value):
+                        errors.append(RuleError(index, key, rule, value))
+        errors.sort(key=lambda error: error.index)
+        return errors
+
+
+INSTRUMENT_VALIDATOR = RecordValidator(INSTRUMENT_RULES)
+
+
+def check_data_references_values(data):
+    return [error.message for error in INSTRUMENT_VALIDATOR.validate(data)]
+
+
+def validate_dollar_top_gainer(hil_flow_control_packets, references_errors=None):
+    # Returns list of all the errors found in one dollarTopGainer response
+    # references_errors: RuleError list of references instruments, if they were checked while file was streamed
+    errors = []
     try:
         if hil_flow_control_packets['mobile_response']['views']['type'] != "dollartopgainer_list":
-            print("Error: " + "mobile_response_type error. " + "it is not what is intended to be")
+            errors.append("Error: " + "mobile_response_type error. " + "it is not what is intended to be")
     except:
-        print("mobile_reponse_type fetch error. Some problem in json file format")
-
-    #print("resp_data_symbols: " + str(resp_data_symbols))
+        errors.append("mobile_reponse_type fetch error. Some problem in json file format")
 
     try:
         resp_data_symbols = hil_flow_control_packets['mobile_response']['views']['data']['symbols']
         # if all the items in the list of response_data_symbols are not string then throw error
-        if all(isinstance(item, str) for item in resp_data_symbols) == False:
-            print("Error: " + "mobile_response_data_symbols are not strings.")
+        if all(verify_string(item) for item in resp_data_symbols) == False:
+            errors.append("Error: " + "mobile_response_data_symbols are not strings.")
     except:
-        print("mobile_reponse data symbols fetch error. Some problem in json file format")
-
+        errors.append("mobile_reponse data symbols fetch error. Some problem in json file format")
 
     try:
         if hil_flow_control_packets['mobile_response']['references'][0]['type'] != "instruments":
-            print("Error: " + "mobile_response_references_type error. " + "it is not what is intended to be")
+            errors.append("Error: " + "mobile_response_references_type error. " + "it is not what is intended to be")
+        references_data = hil_flow_control_packets['mobile_response']['references'][0]['data']
+    except:
+        errors.append("mobile_reponse_references_type fetch error. Some problem in json file format")
+        return errors
+
+    try:
+        errors.extend(verify_symbol_existence_in_the_list(hil_flow_control_packets))
     except:
-        print("mobile_reponse_references_type fetch error. Some problem in json file format")
+        errors.append("mobile_reponse symbols existence check error. Some problem in json file format")
+
+    if references_errors is None:
+        references_errors = INSTRUMENT_VALIDATOR.validate_column(references_data)
+    errors.extend(error.message for error in references_errors)
+    return errors
+
+
+def json_automate(out_file_path):
+    # Json parsing and comparison
+    with open(out_file_path + "/dollar_top_gain.json") as f:
+        hil_flow_control_packets = json.load(f)
+
+    for error in validate_dollar_top_gainer(hil_flow_control_packets):
+        print(error)
+
+
+def validate_file(file_path):
+    # Validation result of one captured response, runs in worker process.
+    # Any failure is reported as error of this file, other files are still validated
+    try:
+        with open(file_path) as f:
+            errors = validate_dollar_top_gainer(json.load(f))
+    except (OSError, ValueError) as error:
+        errors = ["File read error. " + repr(error)]
+    except Exception as error:
+        errors = ["Validation error. Some problem in json file format: " + repr(error)]
+    return {"file": str(file_path), "errors_count": len(errors), "errors": errors}
+
+
+class StreamedInstruments(object):
+    # Records of 1st references "data" list are checked one by one while file is read,
+    # only {"symbol": ..} of every record is kept for symbols existence check
+
+    def __init__(self):
+        self.errors = None
+
+    def read_records(self, reader):
+        self.errors = []
+        records = []
+        for index in reader.items():
+            record = reader.value()
+            self.errors.extend(INSTRUMENT_VALIDATOR.validate(record, index))
+            records.append({"symbol": record.get("symbol")} if isinstance(record, dict) else record)
+        return records
+
+    def read_references(self, reader):
+        # 1st references object is walked, others and not expected shapes are loaded as they are
+        if reader.peek() != "[":
+            return reader.value()
+        reader.expect("[")
+        references = []
+        for index in reader.items():
+            if index or reader.peek() != "{":
+                references.append(reader.value())
+                continue
+            reader.expect("{")
+            reference = {}
+            for key in reader.members():
+                if key == "data" and reader.peek() == "[":
+                    reader.expect("[")
+                    reference[key] = self.read_records(reader)
+                else:
+                    reference[key] = reader.value()
+            references.append(reference)
+        return references
+
+    def read(self, chunks):
+        # Response with references instruments records replaced by symbols stubs,
+        # same document shape as json.load gives, so same checks report same errors
+        reader = JsonChunksReader(chunks)
+        if reader.peek() != "{":
+            document = reader.value()
+        else:
+            reader.expect("{")
+            document = {}
+            for key in reader.members():
+                if key == "mobile_response" and reader.peek() == "{":
+                    reader.expect("{")
+                    response = document[key] = {}
+                    for response_key in reader.members():
+                        if response_key == "references":
+                            response[response_key] = self.read_references(reader)
+                        else:
+                            response[response_key] = reader.value()
+                else:
+                    document[key] = reader.value()
+        if reader.peek():
+            raise json.JSONDecodeError("Extra data", reader.buffer, reader.pos)
+        return document
+
+
+def validate_file_streaming(file_path):
+    # Same checks and results as validate_file, but instruments are checked while file is read,
+    # whole references list is not loaded
+    instruments = StreamedInstruments()
+    try:
+        document = instruments.read(iter_file_chunks(file_path))
+        errors = validate_dollar_top_gainer(document, instruments.errors)
+    except (OSError, ValueError) as error:
+        errors = ["File read error. " + repr(error)]
+    except Exception as error:
+        errors = ["Validation error. Some problem in json file format: " + repr(error)]
+    return {"file": str(file_path), "errors_count": len(errors), "errors": errors}
+
+
+def collect_files(inputs, pattern="*.json"):
+    # inputs are files, directories (searched recursively for pattern) or globs,
+    # FileNotFoundError if some of inputs matches no files
+    files, not_matched = [], []
+    for item in inputs:
+        item_path = Path(item)
+        if item_path.is_dir():
+            matched = sorted(item_path.rglob(pattern))
+        elif item_path.is_file():
+            matched = [item_path]
+        else:
+            anchor = Path(item_path.anchor)
+            relative = str(item_path.relative_to(anchor)) if item_path.is_absolute() else item
+            matched = sorted(path_ for path_ in anchor.glob(relative) if path_.is_file())
+        if not matched:
+            not_matched.append(item)
+        files.extend(matched)
+    if not_matched:
+        raise FileNotFoundError("No files found for: " + ", ".join(not_matched))
+    return list(dict.fromkeys(files))
 
-    #print("references_type: " + references_type)
 
-    for packet in hil_flow_control_packets['mobile_response']['references'][0]['data']:
-        check_data_references_values(packet)
-        #print("references_data_packet_1: " + str(references_data_packet_1))
+def validate_files(files, workers=None, chunk_size=16, stream=False):
+    # Files are validated across process pool, results are in files order
+    validate = validate_file_streaming if stream else validate_file
+    if workers == 1 or len(files) <= 1:
+        return [validate(file_path) for file_path in files]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(validate, files, chunksize=chunk_size))
 
 
-    #if self.hil_overflow > 0:
-        #self.log.info("Overflow flag is set. Replay data error!")
-        #print("\nOverflow flag error in Replay data in Frame number:{}".format(
-            #packet['_source']['layers']['frame']['frame.number']))
-        #print(
-            #"\nFor more information about frame and hil flow control values where it went wrong, please check the hil_flow_control.json file generated in the input_folder path given by you")
-        #exit()
+def summarize(results):
+    return {"files": len(results),
+            "failed_files": sum(1 for result in results if result["errors_count"]),
+            "errors": sum(result["errors_count"] for result in results),
+            "results": results}
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Validate captured dollarTopGainer responses")
+    parser.add_argument("inputs", nargs="+", help="json files, directories or glob patterns")
+    parser.add_argument("--pattern", default="*.json", help="files pattern inside of directories")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, cpu count by default")
+    parser.add_argument("--chunk_size", type=int, default=16, help="files sent to worker at once")
+    parser.add_argument("--output", default="-", help="summary json path, '-' for stdout")
+    parser.add_argument("--stream", action="store_true", help="check objects while reading, for very big files")
+    parser.add_argument("--errors_only", action="store_true", help="keep only failed files in summary")
+    options = parser.parse_args(args)
+
+    if options.stream and JsonChunksReader is None:
+        parser.error("--stream needs json_stream module (test_helpers package or json_stream.py next to main.py)")
+    try:
+        files = collect_files(options.inputs, options.pattern)
+    except FileNotFoundError as error:
+        parser.error(str(error))
+    logging.info("Validating %s files", len(files))
+    summary = summarize(validate_files(files, options.workers, options.chunk_size, options.stream))
+    if options.errors_only:
+        summary["results"] = [result for result in summary["results"] if result["errors_count"]]
 
+    if options.output == "-":
+        print(json.dumps(summary, indent=2))
+    else:
+        output_dir = path.dirname(options.output)
+        if output_dir:
+            makedirs(output_dir, exist_ok=True)
+        with open(options.output, "w") as f:
+            json.dump(summary, f, indent=2)
+    return 1 if summary["errors"] else 0
 
 
-# Press the green button in the gutter to run the script.
 if __name__ == '__main__':
-    json_automate("C:/Test/json_test")
\ No newline at end of file
+    sys.exit(main())
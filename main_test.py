@@ -0,0 +1,290 @@
+import copy
+import datetime
+import json
+from pathlib import Path
+
+import pytest
+
+import main
+
+CAPTURE = Path(__file__).parent / "DollarTopGainer"
+
+
+def captured_response() -> dict:
+    """Response json of bundled dollarTopGainer capture"""
+    text = CAPTURE.read_text()
+    start = text.index("{", text.index("Response:"))
+    return json.JSONDecoder().raw_decode(text, start)[0]
+
+
+RESPONSE = captured_response()
+VIEWS = RESPONSE["mobile_response"]["views"]
+
+
+def broken_values() -> dict:
+    response = copy.deepcopy(RESPONSE)
+    response["mobile_response"]["references"][0]["data"][1]["price"] = "abc"
+    response["mobile_response"]["views"]["data"]["symbols"].append("NOPE")
+    return response
+
+
+CLEAN = {"mobile_response": {"views": VIEWS, "references": [
+    {"type": "instruments",
+     "data": [{"symbol": symbol} for symbol in VIEWS["data"]["symbols"]]}]}}
+DOCUMENTS = {
+    "captured": RESPONSE,
+    "clean": CLEAN,
+    "broken_values": broken_values(),
+    "empty_mobile_response": {"mobile_response": {}},
+    "not_object": [1],
+    "no_references": {"mobile_response": {"views": VIEWS}},
+    "no_references_type": {"mobile_response": {
+        "views": VIEWS, "references": [{"data": [{"symbol": "X"}]}]}},
+    "data_not_list": {"mobile_response": {
+        "views": VIEWS, "references": [{"type": "instruments",
+                                        "data": {"symbol": "X"}}]}},
+    "wrong_types": {"mobile_response": {
+        "views": {"type": "list", "data": {"symbols": [1]}},
+        "references": [{"type": "quotes", "data": [{"symbol": "X",
+                                                    "low": "1"}]},
+                       {"type": "instruments", "data": []}]}},
+    "not_object_record": {"mobile_response": {
+        "views": VIEWS, "references": [{"type": "instruments",
+                                        "data": [5]}]}},
+}
+TEXTS = {
+    "broken_json": '{"mobile_response": {"views": ',
+    "extra_data": '{} {}',
+}
+
+
+@pytest.fixture
+def write_file(tmp_path):
+    def write(name, text):
+        file_path = tmp_path / f"{name}.json"
+        file_path.write_text(text)
+        return file_path
+    return write
+
+
+@pytest.fixture(params=sorted(DOCUMENTS) + sorted(TEXTS))
+def response_file(request, write_file):
+    text = TEXTS.get(request.param) or json.dumps(DOCUMENTS.get(
+        request.param), indent=1)
+    return write_file(request.param, text)
+
+
+def test_streaming_results_are_same(response_file):
+    assert main.validate_file_streaming(response_file) == \
+        main.validate_file(response_file)
+
+
+def test_missing_sections_are_reported(write_file):
+    file_path = write_file("empty", '{"mobile_response": {}}')
+    for validate in (main.validate_file, main.validate_file_streaming):
+        assert validate(file_path)["errors_count"] == 3
+
+
+def test_broken_values_are_reported(write_file):
+    file_path = write_file("broken", json.dumps(broken_values()))
+    errors = main.validate_file_streaming(file_path)["errors"]
+    assert "Data Reference Value Error. The value pair of the key 'price' " \
+           "is not a float. It is: abc" in errors
+    assert "Error: symbol NOPE is not found in references instruments" \
+        in errors
+
+
+@pytest.fixture
+def responses_dir(tmp_path):
+    """captured/ok.json, captured/nested/bad.json and a not json file"""
+    root = tmp_path / "captured"
+    (root / "nested").mkdir(parents=True)
+    (root / "ok.json").write_text(json.dumps(CLEAN))
+    (root / "nested" / "bad.json").write_text(json.dumps(broken_values()))
+    (root / "notes.txt").write_text("not checked")
+    return root
+
+
+class TestCollectFiles(object):
+    def test_directory_is_searched_recursively(self, responses_dir):
+        assert main.collect_files([str(responses_dir)]) == [
+            responses_dir / "nested" / "bad.json", responses_dir / "ok.json"]
+
+    def test_files_and_globs_without_duplicates(self, responses_dir):
+        files = main.collect_files([str(responses_dir / "ok.json"),
+                                    str(responses_dir / "*.json"),
+                                    str(responses_dir / "**" / "*.json")])
+        assert files == [responses_dir / "ok.json",
+                         responses_dir / "nested" / "bad.json"]
+
+    def test_pattern(self, responses_dir):
+        assert main.collect_files([str(responses_dir)], "*.txt") == [
+            responses_dir / "notes.txt"]
+
+    def test_not_matched_input_raises(self, responses_dir):
+        with pytest.raises(FileNotFoundError, match="missing"):
+            main.collect_files([str(responses_dir),
+                                str(responses_dir / "missing*.json")])
+
+
+class TestValidateFiles(object):
+    def files(self, write_file, count):
+        documents = [RESPONSE, broken_values(), {"mobile_response": {}}]
+        return [write_file(f"response_{index}",
+                           json.dumps(documents[index % len(documents)]))
+                for index in range(count)]
+
+    @pytest.mark.parametrize('stream', [False, True])
+    def test_process_pool_keeps_files_order(self, write_file, stream):
+        files = self.files(write_file, 7)
+        expected = [main.validate_file(file_path) for file_path in files]
+        assert main.validate_files(files, workers=2, chunk_size=3,
+                                   stream=stream) == expected
+
+    def test_one_worker_runs_in_process(self, write_file, monkeypatch):
+        def no_pool(*args, **kwargs):
+            raise AssertionError("process pool is not expected")
+
+        monkeypatch.setattr(main, 'ProcessPoolExecutor', no_pool)
+        files = self.files(write_file, 3)
+        assert [result["file"] for result in main.validate_files(
+            files, workers=1)] == [str(file_path) for file_path in files]
+
+
+def test_summarize():
+    results = [{"file": "a", "errors_count": 0, "errors": []},
+               {"file": "b", "errors_count": 2, "errors": ["x", "y"]}]
+    assert main.summarize(results) == {"files": 2, "failed_files": 1,
+                                       "errors": 2, "results": results}
+
+
+class TestMain(object):
+    def test_failed_files_exit_code_and_output(self, responses_dir, tmp_path):
+        output = tmp_path / "out" / "summary.json"
+        assert main.main([str(responses_dir), "--workers", "1",
+                          "--errors_only", "--output", str(output)]) == 1
+        summary = json.loads(output.read_text())
+        assert (summary["files"], summary["failed_files"]) == (2, 1)
+        assert [result["file"] for result in summary["results"]] == [
+            str(responses_dir / "nested" / "bad.json")]
+
+    def test_no_errors_exit_code(self, write_file, capsys):
+        file_path = write_file("clean", json.dumps(CLEAN))
+        assert main.main([str(file_path), "--stream"]) == 0
+        assert json.loads(capsys.readouterr().out)["errors"] == 0
+
+    def test_not_matched_input_is_usage_error(self, tmp_path):
+        with pytest.raises(SystemExit) as exit_info:
+            main.main([str(tmp_path / "missing.json")])
+        assert exit_info.value.code == 2
+
+    def test_stream_without_json_stream(self, responses_dir, monkeypatch):
+        monkeypatch.setattr(main, 'JsonChunksReader', None)
+        with pytest.raises(SystemExit) as exit_info:
+            main.main([str(responses_dir), "--stream"])
+        assert exit_info.value.code == 2
+
+
+def legacy_failed(rule, value):
+    """
+    Failed condition of hard-coded per key checks, which RULE_CHECKS replaced;
+    None where old check raised instead of reporting (not str values)
+    """
+    def not_float(text):
+        try:
+            float(text)
+        except ValueError:
+            return True
+        return text.isdecimal()
+
+    def not_date(text, date_format):
+        try:
+            datetime.datetime.strptime(text, date_format)
+        except ValueError:
+            return True
+        return False
+
+    if rule == "string":
+        return type(value) != str
+    if rule == "int":
+        return type(value) != int
+    if rule == "bool":
+        return type(value) != bool
+    if rule == "est":
+        return value != "EST"
+    if not isinstance(value, str) or not value:
+        return None
+    if rule == "decimal":
+        return not_float(value)
+    if rule == "digits":
+        return any(not item.isdigit() for item in value.split(","))
+    if rule == "time_string":
+        return not_date(value[0:-7], "%B %d, %Y, %H:%M")
+    if rule == "time_string2":
+        return not_date(value[0:-6], "%d/%m/%Y, %H:%M")
+    if rule == "signed_decimal":
+        return value[0] not in "+-" or not_float(value[1:])
+    if rule == "signed_percent":
+        return value[0] not in "+-" or value[-1] != "%" or \
+            not_float(value[1:-1])
+    raise ValueError(rule)
+
+
+SAMPLES = ["15.43", "15", "abc", "1e5", " 2.5", "+1.25", "-0.5", "+15",
+           "+26.47%", "-3.1%", "26.47%", "+5%", "+x%", "1,234,567", "12a,3",
+           "EST", "est", "November 5, 2021, 03:10 PM EST",
+           "November 35, 2021, 03:10 PM EST", "11/5/2021, 04:10 PM ET",
+           "5/13/2021, 04:10 PM ET", "", 0, 5, True, False, 1.5, None]
+# old message wording of every rule: "... the key 'low' is not a float"
+LEGACY_WORDS = {"string": "a string", "int": "a integer", "bool": "a boolean",
+                "decimal": "a float", "signed_decimal": "a modulous float",
+                "signed_percent": "a modulous float percentage",
+                "digits": "a digit", "est": "a EST",
+                "time_string": "in proper format",
+                "time_string2": "in proper format"}
+
+
+class TestInstrumentRules(object):
+    @pytest.mark.parametrize('key, rule',
+                             sorted(main.INSTRUMENT_RULES.items()))
+    def test_same_decisions_as_legacy_checks(self, key, rule):
+        for value in SAMPLES:
+            failed = legacy_failed(rule, value)
+            errors = main.INSTRUMENT_VALIDATOR.validate({key: value})
+            if failed is None:  # old check raised, now value is reported
+                assert len(errors) == 1, value
+            else:
+                assert bool(errors) == failed, value
+
+    @pytest.mark.parametrize('key, rule',
+                             sorted(main.INSTRUMENT_RULES.items()))
+    def test_messages(self, key, rule):
+        failing = next(value for value in SAMPLES
+                       if legacy_failed(rule, value))
+        assert main.check_data_references_values({key: failing}) == [
+            f"Data Reference Value Error. The value pair of the key '{key}' "
+            f"is not {LEGACY_WORDS[rule]}. It is: {failing}"]
+
+    def test_not_listed_and_missing_keys_are_not_checked(self):
+        assert main.check_data_references_values({"other": None}) == []
+
+    def test_rule_error(self):
+        error = main.RuleError(3, "price", "decimal", "abc")
+        assert error.as_dict() == {
+            "index": 3, "key": "price", "rule": "decimal", "value": "abc",
+            "message": "Data Reference Value Error. The value pair of the key"
+                       " 'price' is not a float. It is: abc"}
+
+    def test_validate_column_same_as_records(self):
+        records = [{"price": "1", "bid": "x", "symbol": 1},
+                   {"price": "2.5"},
+                   {"volume": "1,2a", "price": "x"}]
+        expected = [error.as_dict() for index, record in enumerate(records)
+                    for error in main.INSTRUMENT_VALIDATOR.validate(record,
+                                                                     index)]
+        assert [error.as_dict() for error in
+                main.INSTRUMENT_VALIDATOR.validate_column(records)] == \
+            expected
+        assert [(error["index"], error["key"]) for error in expected] == [
+            (0, "symbol"), (0, "price"), (0, "bid"), (2, "price"),
+            (2, "volume")]
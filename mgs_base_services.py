@@ -1,5 +1,15 @@
+import asyncio
+import copy
+import gzip
+import hashlib
 import json
 import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 import pytest
 import requests
@@ -17,27 +27,64 @@ from dash_common.service_requests.mobile_gateway.portfolionews_services \
 from dash_core.conftest import Context
 
 from test_helpers import utils
+from test_helpers.mgs_service_helpers.cassette import cassette
 from test_helpers.mgs_service_helpers.client.api_client import BaseAPIClient
 from test_helpers.mgs_service_helpers.client.constants import Req
+from test_helpers.mgs_service_helpers.json_codec import dumps, response_json
+from test_helpers.mgs_service_helpers.json_stream import CHUNK_SIZE, \
+    iter_mobile_response, iter_response_chunks
+from test_helpers.mgs_service_helpers.mgs_transport import transport
 from test_helpers.mgs_validation_helpers.references.mgs_objects import \
     MobileResponse
 from test_helpers.mgs_validation_helpers.uuid_mixin import UuidMixin
 from test_helpers.utils import build_url
 
 MAX_TO_FETCH = 1
+MGS_CONCURRENCY = 8
+PARSE_CACHE_MAX_SIZE = 8
 
 
 class MGSRedesignService(UuidMixin):
     prepared_request = None
     received_response = None
     client = BaseAPIClient()
+    _parse_cache = None
+    _parse_cache_stats = None
 
     @property
     def _uid(self):
         return self.client.user.user_id
 
-    def mobile_authenticate(self, *args, **kwargs):
-        return self.client.mobile_authenticate(*args, **kwargs)
+    @property
+    def parse_cache(self) -> OrderedDict:
+        """
+        Parsed responses of current service instance:
+        {id(mgs_res): (mgs_res, MobileResponse(mgs_res)),..}
+        Only PARSE_CACHE_MAX_SIZE latest parsed responses are kept.
+        Raw response object is kept in entry, so id can't be reused while
+        entry is alive
+        """
+        if self._parse_cache is None:
+            self._parse_cache = OrderedDict()
+        return self._parse_cache
+
+    @property
+    def parse_cache_stats(self) -> dict:
+        if self._parse_cache_stats is None:
+            self._parse_cache_stats = {"hits": 0, "misses": 0}
+        return self._parse_cache_stats
+
+    def mobile_authenticate(self, *args, pooled=False, **kwargs):
+        """
+        pooled=True - authenticated clients are shared by SessionPool per
+        (env, username, password), so repeated logins of the same user
+        reuse tokens/cookies of pooled client. Pooled client is set to
+        self.client of this instance only, class client is not changed
+        """
+        if not pooled:
+            return self.client.mobile_authenticate(*args, **kwargs)
+        self.client, result = SessionPool.authenticate(*args, **kwargs)
+        return result
 
     def parse_response(self, mgs_res: dict = None):
         """
@@ -50,9 +97,40 @@ class MGSRedesignService(UuidMixin):
         fetch needed objects from list with keyword=value
         self.parse_response().references.accounts(accountId=321): return
         SearchList([{accountId:321}])
+
+        Parsed object is cached by identity of mgs_res, so repeated calls
+        for the same response return the same MobileResponse instance.
+        Cache is cleared each time response_caching stores a new response
+        and is bounded by PARSE_CACHE_MAX_SIZE for responses passed as
+        mgs_res.
         """
         mgs_res = mgs_res or self.received_response
-        return MobileResponse(mgs_res)
+        key = id(mgs_res)
+        cached = self.parse_cache.get(key)
+        if cached and cached[0] is mgs_res:
+            self.parse_cache_stats["hits"] += 1
+            self.parse_cache.move_to_end(key)
+            return cached[1]
+
+        self.parse_cache_stats["misses"] += 1
+        parsed = MobileResponse(mgs_res)
+        self.parse_cache[key] = (mgs_res, parsed)
+        if len(self.parse_cache) > PARSE_CACHE_MAX_SIZE:
+            self.parse_cache.popitem(last=False)
+        return parsed
+
+    def parse_cache_info(self) -> dict:
+        """
+        Hits/misses counters of parse_response cache and its current size
+        :return: dict
+        """
+        info = dict(self.parse_cache_stats)
+        info["size"] = len(self.parse_cache)
+        return info
+
+    def clear_parse_cache(self):
+        """Drop parsed responses, hits/misses counters are kept"""
+        self.parse_cache.clear()
 
     def get_et_auth_details(self):
         """
@@ -84,8 +162,8 @@ class MGSRedesignService(UuidMixin):
         path = node + service.get_service_name() + request.get_name()
         request_body = request.as_json()
         headers = self.get_node_headers()
-        response = requests.post(url=path, data=request_body, headers=headers,
-                                 verify=False)
+        response = transport.post(url=path, data=request_body,
+                                  headers=headers, verify=False)
         response_text = response.text
 
         return response_text
@@ -104,13 +182,107 @@ class MGSRedesignService(UuidMixin):
         :param code_expected: 200 by default
         :return: requests.Response
         """
-        self.prepare_request_parameters(service, request, params)
-        response = self.client.post(data=request.as_json(), **params)
-        service_metadata_update(service, request, response, params)
+        body = request.as_json()
+        self.prepare_request_parameters(service, request, params, body)
+        response = cassette.serve('POST', params[Req.URL], body,
+                                  partial(self.client.post, data=body,
+                                          **params))
+        service_metadata_update(service, request, response, params, body)
         self.response_basic_validation(response, error_expected, code_expected)
         self.response_caching(request, response, cache_response)
         return response
 
+    def mgs_post_streaming(self, service, request,
+                           error_expected=False,
+                           code_expected=200,
+                           chunk_size=CHUNK_SIZE, **params):
+        """Opt-in variant of mgs_post for big responses.
+
+        Response is requested with stream=True and is not loaded with
+        response.json(): views and references data objects are parsed
+        one by one while body is read, so checks can start before
+        whole body is received. received_response and services metadata
+        are not updated.
+        :return: iterator of json_stream.StreamedObject
+        """
+        body = request.as_json()
+        self.prepare_request_parameters(service, request, params, body)
+        response = cassette.serve('POST', params[Req.URL], body,
+                                  partial(self.client.post, data=body,
+                                          stream=True, **params),
+                                  stream=True)
+        if not response.ok or response.status_code != code_expected:
+            self.response_basic_validation(response, error_expected,
+                                           code_expected)
+        return iter_mobile_response(iter_response_chunks(response,
+                                                         chunk_size))
+
+    async def mgs_post_async(self, service, request, semaphore, executor,
+                             error_expected=False,
+                             code_expected=200, **params) -> requests.Response:
+        """Async variant of mgs_post, used by mgs_gather.
+
+        Request parameters/headers are prepared and body is serialized
+        before waiting on semaphore, so later changes of shared request
+        object will not affect this call. Blocking client.post is run in
+        executor. Response caching is left to the caller.
+        :return: requests.Response
+        """
+        body = request.as_json()
+        self.prepare_request_parameters(service, request, params, body)
+        async with semaphore:
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(
+                executor, partial(cassette.serve, 'POST', params[Req.URL],
+                                  body, partial(self.client.post, data=body,
+                                                **params)))
+        service_metadata_update(service, request, response, params, body)
+        self.response_basic_validation(response, error_expected, code_expected)
+        return response
+
+    async def mgs_gather_async(self, calls, concurrency=None,
+                               cache_response=True) -> list:
+        """
+        Send many MGS requests concurrently, not more than concurrency
+        requests at once.
+        :param calls: list of (service, request, mgs_post kwargs) tuples
+        :param concurrency: int, MGS_CONCURRENCY by default
+        :param cache_response: if True, responses are cached in calls order,
+            so prepared_request/received_response are left same as after
+            sequential mgs_post calls
+        :return: list of requests.Response in calls order
+        """
+        concurrency = concurrency or MGS_CONCURRENCY
+        semaphore = asyncio.Semaphore(concurrency)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            responses = await asyncio.gather(*[
+                self.mgs_post_async(service, request, semaphore, executor,
+                                    **{key: value
+                                       for key, value in params.items()
+                                       if key != 'cache_response'})
+                for service, request, params in calls])
+
+        for (_, request, params), response in zip(calls, responses):
+            cache_flag = params.get('cache_response', cache_response)
+            self.response_caching(request, response, cache_flag)
+        return responses
+
+    def mgs_gather(self, calls, concurrency=None, cache_response=True) -> list:
+        """
+        Blocking entry point to mgs_gather_async.
+        If called from a running event loop (async test or fixture),
+        asyncio.run can't be used in this thread, so gathering runs in own
+        loop of a separate thread
+        """
+        gather = partial(asyncio.run, self.mgs_gather_async(
+            calls, concurrency, cache_response))
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:  # no running loop in this thread
+            return gather()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(gather).result()
+
     def mgs_get(self, path):
         """GET to MGS services on regular purpose
 
@@ -119,16 +291,20 @@ class MGSRedesignService(UuidMixin):
         """
         host = Context.config['mobile_url'] + "/"
         url = host + path
-        response: requests.Response = self.client.get(url=url)
+        response: requests.Response = cassette.serve(
+            'GET', url, None, partial(self.client.get, url=url))
         return response
 
-    def prepare_request_parameters(self, service, request, params):
+    def prepare_request_parameters(self, service, request, params,
+                                   body=None):
         """Parse, check and prepare necessary request parameters.
         Basic needed request parameters  are:
          1."url" - build via  build_url with help of service, request objects
          2."headers" -  if this keyword is specified,
                         will use value(must be a dict) untouched as headers
                         if no - will try to get value from build_headers method
+        body is already serialized request, if not passed
+        request.as_json() is called for logging
         """
         logging.info(f"{':'*10}{request.get_name()} starts {':'*10}")
 
@@ -142,7 +318,8 @@ class MGSRedesignService(UuidMixin):
         if Req.HEADERS not in params:
             params[Req.HEADERS] = self.build_headers(platform, node, params)
         logging.info(f"mgs_post:Prepared request: {request.get_name()}")
-        logging.info(f"mgs_post:Prepared request body: {request.as_json()}")
+        logging.info(f"mgs_post:Prepared request body: "
+                     f"{body if body is not None else request.as_json()}")
         logging.info(f"mgs_post:Request parameters: {params}")
 
     @staticmethod
@@ -164,10 +341,13 @@ class MGSRedesignService(UuidMixin):
     def response_caching(self, request, response, cache_response_flag):
         if cache_response_flag is True:
             try:
-                json_to_cache = response.json()
+                json_to_cache = response_json(response)
                 self.prepared_request = request
                 logging.info(f"Received response: {json_to_cache.keys()}")
                 self.received_response = json_to_cache
+                self.clear_parse_cache()
+                logging.debug(f"parse_response cache: "
+                              f"{self.parse_cache_info()}")
             except Exception as error:
                 invalid_json = response.text
                 pytest.fail(f"Failed to parse response json with {error}:\n"
@@ -247,16 +427,44 @@ class MGSRedesignService(UuidMixin):
 
         return request, response
 
+    def tax_lots_requests(self, account_position_pairs, api_v=1,
+                          concurrency=None, **kwargs):
+        """Get lots responses for many (account_uuid, position_id) pairs
+        concurrently
+        :return: list of (request, response)
+        """
+        calls = []
+        for account_uuid, position_id in account_position_pairs:
+            service = portfolio_services.LotsService()
+            request = copy.deepcopy(service.request)
+            request.accountUuid = account_uuid
+            request.positionId = position_id
+            calls.append((service, request, dict(api_v=api_v, **kwargs)))
+        responses = self.mgs_gather(calls, concurrency)
+        return [(request, response)
+                for (_, request, _), response in zip(calls, responses)]
+
     def get_account_and_position_pairs(self, max_=MAX_TO_FETCH):
-        request_all, response_all = self.all_brokerage_request()
-        positions = self.parse_response(
-            response_all.json()).references.positions
+        self.all_brokerage_request()
+        # all_brokerage_request caches response, stored received_response
+        # is parsed once and shared with following parse_response() calls
+        positions = self.parse_response().references.positions
         account_uuids = [(position['accountUuid'], position['positionId']) for
                          position in positions]
         if max_:
             account_uuids = account_uuids[:max_]
         return account_uuids
 
+    def get_positions_tax_lots(self, max_=MAX_TO_FETCH, concurrency=None,
+                               **kwargs):
+        """Lots responses of positions from get_account_and_position_pairs,
+        requested concurrently instead of tax_lots_request per pair
+        :return: list of (request, response)
+        """
+        return self.tax_lots_requests(
+            self.get_account_and_position_pairs(max_),
+            concurrency=concurrency, **kwargs)
+
     # Account services:
     def account_list_request(self, api_v=1, **kwargs):
         """Get account list API response"""
@@ -286,6 +494,24 @@ class MGSRedesignService(UuidMixin):
 
         return request, response
 
+    def account_overview_requests(self, acc_uuids, api_v=1,
+                                  concurrency=None, **kwargs):
+        """Get account overview responses for many accounts concurrently
+        :return: list of (request, response)
+        """
+        extended_hours = not market_hours_check(market_session="extended")
+        calls = []
+        for acc_uuid in acc_uuids:
+            service = accounts_services.AccountOverviewService()
+            request = copy.deepcopy(service.request)
+            request.accountUuid = acc_uuid
+            if extended_hours:
+                request.extendedHours = True
+            calls.append((service, request, dict(api_v=api_v, **kwargs)))
+        responses = self.mgs_gather(calls, concurrency)
+        return [(request, response)
+                for (_, request, _), response in zip(calls, responses)]
+
     def complete_view_request(self, api_v=1, **kwargs):
         """Get complete_view API response."""
         service = accounts_services.CompleteViewService()
@@ -315,6 +541,17 @@ class MGSRedesignService(UuidMixin):
             uuids = uuids[:max_]
         return uuids
 
+    def get_users_brokerage_overviews(self, max_=MAX_TO_FETCH,
+                                      concurrency=None, **kwargs):
+        """Account overview responses of get_users_brokerage_accounts,
+        requested concurrently instead of account_overview_request per
+        account
+        :return: list of (request, response)
+        """
+        return self.account_overview_requests(
+            self.get_users_brokerage_accounts(max_),
+            concurrency=concurrency, **kwargs)
+
         # Home Widget services:
 
     def unauthenticated_users_widget_request(self, symbol=None, api_v=1, **kwargs):
@@ -341,10 +578,10 @@ class MGSRedesignService(UuidMixin):
         transfer_activity_endpoint = "https://mm-restapi.%s.etrade.com/movemoney/fundingcard-transfer-activity" % env
         body = {"transactionFilter": "ALL", "transferTypeFilter": "ACH,RETIREMENT,INTERNAL", "userId": user_id}
         headers = {"Content-Type": "application/json", }
-        response = requests.request("POST", transfer_activity_endpoint, headers=headers, data=json.dumps(body),
-                                    verify=False)
+        response = transport.request("POST", transfer_activity_endpoint, headers=headers, data=dumps(body),
+                                     verify=False)
 
-        return response.json()
+        return response_json(response)
 
     def get_saved_orders_request(self, account_id, user_id):
         service = mgs_backend_s2_services.SavedOrderServices()
@@ -355,8 +592,8 @@ class MGSRedesignService(UuidMixin):
         request.PreparedRequest.UserId = user_id
         headers = {"Content-Type": HeaderContentTypes.CONTENT_TYPE_TEXT_XML}
 
-        response = requests.request("POST", s2_endpoint_url, headers=headers, data=request.as_xml(),
-                                    verify=False)
+        response = transport.request("POST", s2_endpoint_url, headers=headers, data=request.as_xml(),
+                                     verify=False)
 
         return response
 
@@ -368,8 +605,8 @@ class MGSRedesignService(UuidMixin):
         request.Request.Accounts = account_id
         headers = {"Content-Type": HeaderContentTypes.CONTENT_TYPE_TEXT_XML}
 
-        response = requests.request("POST", s2_endpoint_url, headers=headers, data=request.as_xml(),
-                                    verify=False)
+        response = transport.request("POST", s2_endpoint_url, headers=headers, data=request.as_xml(),
+                                     verify=False)
 
         return response
 
@@ -422,28 +659,204 @@ class MGSRedesignService(UuidMixin):
         return request, response
 
 
-def service_metadata_update(service, request, response, params):
+class SessionPool(object):
+    """
+    Authenticated BaseAPIClient per (Context.env, username, password sha1),
+    kept for the whole session of current process:
+    - hit: pooled client is returned without login
+    - miss: new client is created and authenticated
+    - refresh: pooled client logs in again, refresh_margin seconds before
+      its session expires: earliest expiry of login cookies, login time +
+      ttl if cookies have no expiry
+    Only successful logins are pooled, failed ones are returned to caller
+    and next call logs in again
+    """
+    ttl = 20 * 60
+    refresh_margin = 60
+    _sessions = {}  # {key: [client, login_result, expires_at]}
+    _locks = {}
+    _lock = threading.Lock()
+    stats = {"hits": 0, "misses": 0, "refreshes": 0, "failures": 0}
+
+    @staticmethod
+    def session_key(*args, **kwargs) -> tuple:
+        """
+        mobile_authenticate arguments: username, password are 1st/2nd
+        positional or keyword arguments; password is kept as sha1 only
+        """
+        username = kwargs.get('username', args[0] if args else None)
+        password = kwargs.get('password',
+                              args[1] if len(args) > 1 else None)
+        password_hash = hashlib.sha1(str(password).encode()).hexdigest()
+        return Context.env, username, password_hash
+
+    @staticmethod
+    def logged_in(client, result) -> bool:
+        """Login result is not failed response/False and client has token"""
+        if isinstance(result, requests.Response):
+            return result.ok
+        if result is False:
+            return False
+        user = getattr(client, 'user', None)
+        return bool(user and getattr(user, 'token', None))
+
+    @classmethod
+    def expires_at(cls, client, result) -> float:
+        """Earliest expiry of login response/client session cookies"""
+        expires = []
+        for owner in (result, getattr(client, 'session', None)):
+            cookies = getattr(owner, 'cookies', None)
+            if isinstance(cookies, requests.cookies.RequestsCookieJar):
+                expires.extend(cookie.expires for cookie in cookies
+                               if cookie.expires)
+        return min(expires) if expires else time.time() + cls.ttl
+
+    @classmethod
+    def login(cls, client, *args, **kwargs):
+        """:return: (login_result, expires_at), expires_at None if failed"""
+        result = client.mobile_authenticate(*args, **kwargs)
+        if not cls.logged_in(client, result):
+            cls.stats["failures"] += 1
+            return result, None
+        return result, cls.expires_at(client, result)
+
+    @classmethod
+    def authenticate(cls, *args, **kwargs) -> tuple:
+        """
+        :param args: mobile_authenticate arguments
+        :return: (client, login_result)
+        """
+        key = cls.session_key(*args, **kwargs)
+        with cls._lock:
+            key_lock = cls._locks.setdefault(key, threading.Lock())
+        with key_lock:
+            session = cls._sessions.pop(key, None)
+            if session is None:
+                cls.stats["misses"] += 1
+                client = BaseAPIClient()
+            elif time.time() >= session[2] - cls.refresh_margin:
+                cls.stats["refreshes"] += 1
+                client = session[0]
+            else:
+                cls.stats["hits"] += 1
+                cls._sessions[key] = session
+                return session[0], session[1]
+            result, expires_at = cls.login(client, *args, **kwargs)
+            if expires_at is not None:
+                cls._sessions[key] = [client, result, expires_at]
+            return client, result
+
+    @classmethod
+    def report(cls) -> dict:
+        return dict(cls.stats, sessions=len(cls._sessions))
+
+    @classmethod
+    def clear(cls):
+        cls._sessions.clear()
+        cls._locks.clear()
+        for counter in cls.stats:
+            cls.stats[counter] = 0
+
+
+class ServiceMetadataStore(object):
+    """
+    Bounded store of services requests/responses samples in
+    Context.cache['services'][service_id]:
+    - 'hits' counter of all calls
+    - 'request'/'response' - lists of last samples_in_memory unique samples
+    - 'hashes' - {request and response content hash: hits}, identical
+      request/response pairs are stored once
+    Older samples are appended to gzip-compressed json lines file
+    spill_path by one writer opened on first spill, not stored at all if
+    spill_path is None (default)
+    """
+    samples_in_memory = 5
+    spill_path = None
+    _spill_file = None
+
+    @classmethod
+    def configure(cls, samples_in_memory=None, spill_path=''):
+        """
+        :param samples_in_memory: int, 0 - all samples are spilled
+        :param spill_path: str, None - older samples are dropped,
+            '' - current path is kept
+        """
+        if samples_in_memory is not None:
+            cls.samples_in_memory = samples_in_memory
+        if spill_path != '' and spill_path != cls.spill_path:
+            cls.close()
+            cls.spill_path = spill_path
+
+    @classmethod
+    def new_record(cls, service_name, endpoint, outcome) -> dict:
+        return dict(
+            service=service_name,
+            request=[],
+            response=[],
+            hashes={},
+            spilled=0,
+            outcome=outcome,
+            hits=0,
+            endpoint=endpoint)
+
+    @classmethod
+    def add_sample(cls, service_id, record, request_json, text):
+        record['hits'] += 1
+        content_hash = hashlib.sha1(request_json.encode())
+        content_hash.update(b'\0')
+        content_hash.update(text.encode())
+        content_hash = content_hash.hexdigest()
+        if content_hash in record['hashes']:
+            record['hashes'][content_hash] += 1
+            return
+        record['hashes'][content_hash] = 1
+
+        record['request'].append(request_json)
+        record['response'].append(text)
+        excess = len(record['response']) - max(cls.samples_in_memory, 0)
+        if excess <= 0:
+            return
+        for old_request, old_response in zip(record['request'][:excess],
+                                             record['response'][:excess]):
+            cls.spill(service_id, old_request, old_response)
+        del record['request'][:excess]
+        del record['response'][:excess]
+        record['spilled'] += excess
+
+    @classmethod
+    def spill(cls, service_id, request_json, text):
+        if not cls.spill_path:
+            return
+        if cls._spill_file is None:
+            spill_dir = os.path.dirname(cls.spill_path)
+            if spill_dir:
+                os.makedirs(spill_dir, exist_ok=True)
+            cls._spill_file = gzip.open(cls.spill_path, 'at',
+                                        encoding='utf-8')
+        cls._spill_file.write(dumps({"service_id": service_id,
+                                     "request": request_json,
+                                     "response": text}) + '\n')
+
+    @classmethod
+    def close(cls):
+        """Finish spill file, next spill appends new gzip member to it"""
+        if cls._spill_file is not None:
+            cls._spill_file.close()
+        cls._spill_file = None
+
+
+def service_metadata_update(service, request, response, params, body=None):
     api_v, service_name, endpoint = params['url'].split('/')[-3:]
     service_id = f'{api_v}-{service_name}/{endpoint}'
-    text = response.text
     cache_service_metadata: dict = Context.cache['services'].get(service_id)
     if not cache_service_metadata:
         logging.info(f"service_metadata_update:Not found yet {service_id}")
-        Context.cache['services'][service_id] = {}
-        collect_responses = [text]
-        collect_requests = [request.as_json()]
-        new_service_metadata = dict(
-            service=service_name,
-            request=collect_requests,
-            response=collect_responses,
-            outcome=response.ok,
-            hits=1,
-            endpoint=endpoint)
+        cache_service_metadata = ServiceMetadataStore.new_record(
+            service_name, endpoint, response.ok)
+        Context.cache['services'][service_id] = cache_service_metadata
     else:
         logging.info(f"service_metadata_update: Found record for {service_id}")
-        new_service_metadata = cache_service_metadata.copy()
-        new_service_metadata['hits'] = cache_service_metadata['hits'] + 1
-        new_service_metadata['response'].append(text)
-        new_service_metadata['request'].append(request.as_json())
-    Context.cache['services'][service_id].update(new_service_metadata)
+    ServiceMetadataStore.add_sample(service_id, cache_service_metadata,
+                                    body if body is not None
+                                    else request.as_json(), response.text)
     logging.info(f"service_metadata_update: \n {service_id}")
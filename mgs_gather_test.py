@@ -0,0 +1,185 @@
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from test_helpers.mgs_service_helpers import mgs_base_services
+from test_helpers.mgs_service_helpers.mgs_base_services import \
+    MGSRedesignService
+
+URL = 'https://mgs/v1/portfolio/lots'
+PARAMS = {'url': URL, 'headers': {}}
+
+
+class FakeRequest(object):
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+    def get_name(self):
+        return 'lots'
+
+    def as_json(self):
+        return json.dumps(self.__dict__, sort_keys=True)
+
+
+class FakeResponse(object):
+    ok = True
+    status_code = 200
+    url = URL
+
+    def __init__(self, body):
+        self.content = json.dumps({'echo': json.loads(body)}).encode()
+        self.text = self.content.decode()
+        self.request = SimpleNamespace(body=body)
+
+
+class FakeClient(object):
+    """Echoes request body, earlier requests are answered later, so
+    completion order is reverse of calls order"""
+
+    def __init__(self, calls):
+        self.calls = calls
+        self.active = 0
+        self.max_active = 0
+        self.threads = set()
+        self.lock = threading.Lock()
+
+    def post(self, data, **params):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.threads.add(threading.current_thread().name)
+        time.sleep(0.01 * (self.calls - (json.loads(data)['index'] or 0)))
+        with self.lock:
+            self.active -= 1
+        return FakeResponse(data)
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    monkeypatch.setattr(mgs_base_services.Context, 'cache',
+                        {'services': {}}, raising=False)
+
+
+def service(calls):
+    mgs = MGSRedesignService()
+    mgs.client = FakeClient(calls)
+    return mgs
+
+
+def gather_calls(count, **params):
+    return [(None, FakeRequest(index=index), dict(PARAMS, **params))
+            for index in range(count)]
+
+
+def echoed(responses):
+    return [json.loads(response.text)['echo']['index']
+            for response in responses]
+
+
+class TestMgsGather(object):
+    def test_responses_in_calls_order(self):
+        mgs = service(6)
+        responses = mgs.mgs_gather(gather_calls(6), concurrency=6)
+        assert echoed(responses) == list(range(6))
+        assert mgs.client.max_active > 1
+
+    @pytest.mark.parametrize('concurrency', [1, 2, 3])
+    def test_concurrency_limit(self, concurrency):
+        mgs = service(8)
+        mgs.mgs_gather(gather_calls(8), concurrency=concurrency)
+        assert mgs.client.max_active == concurrency
+
+    def test_default_concurrency(self, monkeypatch):
+        monkeypatch.setattr(mgs_base_services, 'MGS_CONCURRENCY', 2)
+        mgs = service(5)
+        mgs.mgs_gather(gather_calls(5))
+        assert mgs.client.max_active == 2
+
+    def test_last_call_is_cached(self):
+        mgs = service(4)
+        calls = gather_calls(4)
+        mgs.mgs_gather(calls)
+        assert mgs.prepared_request is calls[-1][1]
+        assert mgs.received_response == {'echo': {'index': 3}}
+
+    def test_cache_response_per_call(self):
+        mgs = service(4)
+        calls = gather_calls(3) + gather_calls(1, cache_response=False)
+        mgs.mgs_gather(calls)
+        assert mgs.prepared_request is calls[2][1]
+        assert mgs.received_response == {'echo': {'index': 2}}
+
+    def test_cache_response_off(self):
+        mgs = service(2)
+        calls = gather_calls(1) + gather_calls(1, cache_response=True)
+        mgs.mgs_gather(calls, cache_response=False)
+        assert mgs.prepared_request is calls[1][1]
+        mgs.mgs_gather(gather_calls(2), cache_response=False)
+        assert mgs.prepared_request is calls[1][1]
+
+    def test_cached_response_is_parsed_again(self):
+        mgs = service(2)
+        mgs.received_response = {'mobile_response': {'references': []}}
+        mgs.parse_response()
+        mgs.mgs_gather(gather_calls(2))
+        assert mgs.parse_cache_info()['size'] == 0
+
+    def test_failed_response(self, monkeypatch):
+        mgs = service(2)
+        monkeypatch.setattr(FakeResponse, 'ok', False)
+        with pytest.raises(pytest.fail.Exception):
+            mgs.mgs_gather(gather_calls(2))
+
+    def test_running_event_loop(self):
+        mgs = service(3)
+        calling_thread = threading.current_thread().name
+
+        async def async_test():
+            return mgs.mgs_gather(gather_calls(3))
+
+        assert echoed(asyncio.run(async_test())) == [0, 1, 2]
+        assert calling_thread not in mgs.client.threads
+
+
+class TestFanOut(object):
+    @pytest.fixture
+    def lots_service(self, monkeypatch):
+        monkeypatch.setattr(
+            mgs_base_services.portfolio_services, 'LotsService',
+            lambda: SimpleNamespace(request=FakeRequest(index=None)),
+            raising=False)
+
+    def test_tax_lots_requests(self, lots_service):
+        mgs = service(3)
+        pairs = [('uuid0', 'p0'), ('uuid1', 'p1'), ('uuid2', 'p2')]
+        results = mgs.tax_lots_requests(pairs, **PARAMS)
+        assert [(request.accountUuid, request.positionId)
+                for request, _ in results] == pairs
+        assert [json.loads(response.text)['echo']['accountUuid']
+                for _, response in results] == ['uuid0', 'uuid1', 'uuid2']
+
+    def test_positions_tax_lots(self, lots_service, monkeypatch):
+        mgs = service(2)
+        pairs = [('uuid0', 'p0'), ('uuid1', 'p1')]
+        monkeypatch.setattr(mgs, 'get_account_and_position_pairs',
+                            lambda max_: pairs[:max_])
+        results = mgs.get_positions_tax_lots(max_=2, concurrency=2,
+                                             **PARAMS)
+        assert [request.positionId for request, _ in results] == ['p0', 'p1']
+        assert mgs.prepared_request is results[-1][0]
+
+    def test_users_brokerage_overviews(self, monkeypatch):
+        monkeypatch.setattr(
+            mgs_base_services.accounts_services, 'AccountOverviewService',
+            lambda: SimpleNamespace(request=FakeRequest(index=None)),
+            raising=False)
+        mgs = service(2)
+        monkeypatch.setattr(mgs, 'get_users_brokerage_accounts',
+                            lambda max_: ['uuid0', 'uuid1'][:max_])
+        results = mgs.get_users_brokerage_overviews(max_=2, **PARAMS)
+        assert [json.loads(response.text)['echo']['accountUuid']
+                for _, response in results] == ['uuid0', 'uuid1']
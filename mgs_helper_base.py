@@ -1,9 +1,7 @@
 import json
 import logging
-import re
+from concurrent.futures import ThreadPoolExecutor
 
-import xmltodict
-import requests
 from dash_common.constants.mgs_mobile_gateway_constants import \
     FrequentlyUsedTags, MgsViews, ReferencesObjectTypes, \
     ValuesValidationConstants, MsUserPreferenceReferenceTags, \
@@ -20,19 +18,30 @@ from test_helpers.mgs_backend_service_helpers.portfolio_backend_data_helper \
     PortfolioBackendDataHelper
 from test_helpers.mgs_service_helpers.mgs_base_services import \
     MGSRedesignService
+from test_helpers.mgs_service_helpers.json_codec import dumps, \
+    response_json
+from test_helpers.mgs_service_helpers.mgs_transport import transport
+from test_helpers.mgs_service_helpers.xml_extract import extract_text
 from test_helpers.mgs_validation_helpers.comments import Comments
+from test_helpers.mgs_validation_helpers.deferred_comments import \
+    DeferredComments, Verbosity
 from test_helpers.mgs_validation_helpers.mgs_mapping_helpers import \
     PositionsInstrumentsMap, ReferencesAccountsMapping, \
     ReferencesTaxLotMap
-from test_helpers.mgs_validation_helpers.mgs_tag_helper import ReferencesTags
-from test_helpers.mgs_validation_helpers.references.values_formats import \
-    handle_value_formatting
+from test_helpers.mgs_validation_helpers.mgs_tag_helper import \
+    CompiledTagSchema, ReferencesTags
+from test_helpers.mgs_validation_helpers.references.value_parsing import \
+    find_dollar_amount, format_value, format_values, NotNumber, to_float
 from test_helpers.mgs_validation_helpers.uuid_mixin import \
     decode_account_uuid, \
     UuidMixin
+from test_helpers.mgs_validation_helpers.values_comparator import \
+    collect_values_mismatches
 from test_helpers.utils import get_ids_message
 
 Tag = FrequentlyUsedTags
+SAVED_ORDERS_COUNT_PATH = ('OrderETS_ViewOrderPreparedResponse', 'PreparedResponse', 'PrepOrderCount')
+OPEN_ORDERS_COUNT_PATH = ('OrderETS_GetOpenOrderCountResponse', 'Response', 'TotalOrderCount')
 
 
 class MGSHelperBase(MGSRedesignService, UuidMixin):
@@ -41,6 +50,11 @@ class MGSHelperBase(MGSRedesignService, UuidMixin):
     view_types = None
     reference_types = None
     expected_tags = None
+    portfolio_info_workers = 8
+    # references are kept by verify_response_tags_streaming for
+    # special_tags_verifications, helpers without such checks switch it off
+    streaming_keeps_references = True
+    _portfolio_info_cache = None
 
     @log_assertion()
     def verify_assertions_fail_list(self):
@@ -83,6 +97,102 @@ class MGSHelperBase(MGSRedesignService, UuidMixin):
         """
         pass
 
+    @log_assertion()
+    def verify_response_tags_streaming(self, objects) -> int:
+        """
+        Streaming variant of verify_response_tags for big responses.
+        References tags are checked as every object arrives,
+        views/references types are checked after the last one.
+        Only objects with missing tags are kept: brokerage accounts are
+        reported at the end, when linked stock plan accounts are known.
+        Views (and references, if streaming_keeps_references) are
+        collected to self.received_response, then verify_views_tags and
+        special_tags_verifications run as in verify_response_tags
+        :param objects: iterable of json_stream.StreamedObject,
+            self.mgs_post_streaming(service, request)
+        :return: number of checked objects
+        """
+        logging.info('Checking streamed response tags:')
+        view_types, reference_types = set(), set()
+        stock_plan_ids, failed_brokerage = set(), []
+        views, references = [], {}
+        checked = 0
+        for streamed in objects:
+            checked += 1
+            if streamed.section == 'views':
+                view_types.add(streamed.type)
+                views.append(streamed.data)
+                continue
+            reference_types.add(streamed.type)
+            data = streamed.data
+            if self.streaming_keeps_references:
+                references.setdefault(streamed.type, []).append(data)
+            if streamed.type == ReferencesObjectTypes.ACCOUNTS and \
+                    data.get('acctType') == 'ESP':
+                stock_plan_ids.add(data.get('accountId'))
+
+            for expected_tags in self.get_streamed_reference_tags(streamed):
+                if CompiledTagSchema.compile(expected_tags).is_valid(data):
+                    continue
+                if streamed.type == ReferencesObjectTypes.ACCOUNTS and \
+                        data.get('instType') == 'ADP':
+                    failed_brokerage.append(data)
+                    continue
+                self.check_tags(data, expected_tags, streamed.type)
+
+        for account in failed_brokerage:
+            if account.get('accountId') not in stock_plan_ids:
+                self.check_tags(account, self.get_brokerage_expected_tags(),
+                                ReferencesObjectTypes.ACCOUNTS)
+        for type_value in self.view_types or ():
+            Assert.log_assert(type_value in view_types,
+                              f"No {type_value} in response views")
+        for type_value in self.reference_types or ():
+            Assert.log_assert(type_value in reference_types,
+                              f"No {type_value} in response references")
+
+        self.received_response = {"mobile_response": {
+            "views": views,
+            "references": [{"type": type_value, "data": data}
+                           for type_value, data in references.items()]}}
+        logging.info('\tChecking views objects tags.')
+        self.verify_views_tags()
+        self.special_tags_verifications()
+        DeferredComments.add(lambda: f"Streamed response: {checked} objects "
+                                     f"tags validated", Verbosity.SUMMARY)
+        logging.info(f'Streamed response tags check complete: {checked}')
+        return checked
+
+    def get_streamed_reference_tags(self, streamed) -> tuple:
+        """
+        Expected tags sets of one references object, same sets as
+        verify_references_*_tags use; empty if object is not checked.
+        BOND position without maturity is checked with both position and
+        position_bond tags, as verify_references_positions_tags does
+        """
+        data = streamed.data
+        if streamed.type == ReferencesObjectTypes.ACCOUNTS:
+            if data.get('acctType') == 'Bank':
+                return self.get_bank_expected_tags(),
+            if data.get('acctType') == 'ESP':
+                return self.get_stock_plan_expected_tags(),
+            if data.get('instType') == 'ADP':
+                return self.get_brokerage_expected_tags(),
+            return ()
+        if streamed.type == ReferencesObjectTypes.POSITIONS:
+            expected = () if data.get('maturity') else \
+                (ReferencesTags.position,)
+            if data.get('typeCode') == 'BOND':
+                expected += (ReferencesTags.position_bond,)
+            return expected
+        if streamed.type == ReferencesObjectTypes.INSTRUMENTS:
+            if data.get('maturity'):
+                return ReferencesTags.account_instrument_bond,
+            return ReferencesTags.account_instrument,
+        if streamed.type == ReferencesObjectTypes.TAXLOTS:
+            return ReferencesTags.tax_lot,
+        return ()
+
     def verify_references_tags(self):
         logging.info('\tChecking accounts tags.')
         self.verify_references_accounts_tags()
@@ -275,6 +385,9 @@ class MGSHelperBase(MGSRedesignService, UuidMixin):
         mapping = ReferencesAccountsMapping(self._uid)
         accounts = self.parse_response().references.accounts(
             acctType=account_type)
+        brokerage_tags = getattr(self.expected_tags, 'brokerage_account', None)
+        if brokerage_tags and brokerage_tags.is_change_need():
+            mapping.warm_up_portfolio_totals(accounts)
 
         for account in accounts:
             uuid = account['accountUuid']
@@ -296,23 +409,52 @@ class MGSHelperBase(MGSRedesignService, UuidMixin):
             else:
                 self.check_values(mgs_data=account, s2_data=s2_account)
 
+    def prefetch_portfolio_info(self, account_ids) -> dict:
+        """
+        Fetch AccountETS_GetPortfolioInfo for every distinct account
+        concurrently, before values validation starts.
+        Results are kept for current self.received_response,
+        so positions and instruments checks share them
+        :param account_ids: iterable of account ids
+        :return: dict {account_id: portfolio_info}
+        """
+        cached_for, by_account = self._portfolio_info_cache or (None, {})
+        if cached_for is not self.received_response:
+            by_account = {}
+        missing = [account_id for account_id in dict.fromkeys(account_ids)
+                   if account_id not in by_account]
+        if missing:
+            user_id = self._uid
+            logging.info(f'Prefetching GetPortfolioInfo for '
+                         f'{len(missing)} accounts..')
+            workers = min(self.portfolio_info_workers, len(missing))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                portfolios = executor.map(
+                    lambda acc_id: get_portfolio_info(acc_id, user_id),
+                    missing)
+                by_account.update(zip(missing, portfolios))
+        self._portfolio_info_cache = (self.received_response, by_account)
+        return by_account
+
     @log_assertion()
-    def verify_references_tax_lots_values(self, mgs_lots=None):
+    def verify_references_tax_lots_values(self, mgs_lots=None, s2_data=None):
         """
         If no mgs_lots provided, will try to fetch
         lots from self.received_response
+        If no s2_data provided,
         Method Makes call to AccountETS_GetPortfolioInfo
         with current user_id ,account_id, and position_id params.
         For lot in  mgs 'lots':
             Create mapping (by position_id) of mgs keys to s2 values
             Call check_values(mgs_lot, s2_lot) method
         :param mgs_lots: dict
+        :param s2_data: dict, parsed s2 response with LotList
         :return: None
         """
         logging.info('Checking tax lots values..')
-        s2_lot_list = {}
+        s2_lot_list = s2_data or {}
         lots = mgs_lots or self.parse_response().references.taxlots
-        if lots:
+        if lots and not s2_data:
             account_id = self.get_account_id_from_uuid(
                 self.prepared_request.accountUuid)
             position_id = self.prepared_request.positionId
@@ -320,11 +462,13 @@ class MGSHelperBase(MGSRedesignService, UuidMixin):
             s2_lot_list = PortfolioBackendDataHelper().get_lots_data(
                 account_id, user_id, position_id)
 
+        pairs = []
         for lot in lots:
             lot_id = lot['positionLotId']
             mapping = ReferencesTaxLotMap(s2_lot_list, lot_id)
             s2_lot = mapping.get_tax_lot()
-            self.check_values(lot, s2_lot)
+            pairs.append((lot, s2_lot))
+        self.check_values_batch(pairs)
         logging.info(f'Tax Lots({len(lots)}) values verifying complete')
 
     @log_assertion()
@@ -336,7 +480,8 @@ class MGSHelperBase(MGSRedesignService, UuidMixin):
         will try to fetch positions from self.received_response
         If no s2_data provided,
         Method Makes call to AccountETS_GetPortfolioInfo
-        with current user_id and account_id params.
+        with current user_id for every account of positions,
+        calls are made concurrently by prefetch_portfolio_info.
         For position in  mgs 'positions':
             Create mapping (by position_id) of mgs keys to s2 values
             Call check_values(mgs_position, s2_position) method
@@ -348,18 +493,21 @@ class MGSHelperBase(MGSRedesignService, UuidMixin):
         logging.info('Checking positions values..')
         positions = mgs_positions or self.parse_response().references.positions
 
+        s2_by_account = {}
         if positions and not s2_data:
-            user_id = self._uid
-            account_id = positions[0]['accountId']
-            s2_data = get_portfolio_info(account_id, user_id)
+            s2_by_account = self.prefetch_portfolio_info(
+                [position['accountId'] for position in positions])
 
+        pairs = []
         for position in positions:
             position_id = position['positionId']
+            position_s2_data = s2_data or s2_by_account[position['accountId']]
 
-            mapping = PositionsInstrumentsMap(s2_data, position_id)
+            mapping = PositionsInstrumentsMap(position_s2_data, position_id)
             s2_position = mapping.get_position()
 
-            self.check_values(position, s2_position)
+            pairs.append((position, s2_position))
+        self.check_values_batch(pairs)
         logging.info(f'Positions({len(positions)}) values verifying ends here')
 
     @log_assertion()
@@ -373,6 +521,8 @@ class MGSHelperBase(MGSRedesignService, UuidMixin):
         If no s2_data provided,
         Method Makes call to AccountETS_GetPortfolioInfo
         with current user_id and account_id params.
+        If no account_id provided, accounts are taken from related
+        references positions and fetched concurrently.
         For instrument in  mgs 'instruments':
             Create mapping (by position_id) of mgs keys to s2 values
             Call check_values(mgs_instrument, s2_instrument) method
@@ -385,19 +535,36 @@ class MGSHelperBase(MGSRedesignService, UuidMixin):
         curr_instruments = self.parse_response().references.instruments
         instruments = mgs_instruments or curr_instruments
 
+        s2_by_account = {}
+        account_by_position = {}
         if instruments and not s2_data:
-            user_id = self._uid
-            account_id = account_id or self.get_account_id_from_uuid(
-                self.prepared_request.accountUuid)
-            s2_data = get_portfolio_info(account_id, user_id)
+            account_by_position = {
+                position['positionId']: position['accountId']
+                for position in self.parse_response().references.positions}
+            if not account_id and not all(
+                    instrument['positionId'] in account_by_position
+                    for instrument in instruments):
+                account_id = self.get_account_id_from_uuid(
+                    self.prepared_request.accountUuid)
+            if account_id:
+                account_by_position = {}
+                account_ids = [account_id]
+            else:
+                account_ids = [account_by_position[instrument['positionId']]
+                               for instrument in instruments]
+            s2_by_account = self.prefetch_portfolio_info(account_ids)
 
+        pairs = []
         for instrument in instruments:
             position_id = instrument['positionId']
+            instrument_s2_data = s2_data or s2_by_account[
+                account_by_position.get(position_id, account_id)]
 
-            mapping = PositionsInstrumentsMap(s2_data, position_id)
+            mapping = PositionsInstrumentsMap(instrument_s2_data, position_id)
             s2_instrument = mapping.get_instrument()
 
-            self.check_values(mgs_data=instrument, s2_data=s2_instrument)
+            pairs.append((instrument, s2_instrument))
+        self.check_values_batch(pairs)
         logging.info(f'Instruments({len(instruments)}) '
                      f'values verifying ends here')
 
@@ -457,11 +624,10 @@ class MGSHelperBase(MGSRedesignService, UuidMixin):
     @staticmethod
     def extract_dollar_to_num(value):
         """To convert dollar into float value"""
-        val = re.findall(r"(-?\$[\d.,]+)", value)
-        if val:
-            return float("".join(val[0].replace("$", "").split(",")))
-        logging.debug(value)
-        return None
+        val = find_dollar_amount(value)
+        if val is None:
+            logging.debug(value)
+        return val
 
     @log_assertion()
     def check_objects_tags(self, obj_list, tags_set, obj_name):
@@ -472,24 +638,48 @@ class MGSHelperBase(MGSRedesignService, UuidMixin):
         :param obj_name: str
         :return: None
         """
-        for _object in obj_list:
-            self.check_tags(_object, tags_set, obj_name)
+        schema = CompiledTagSchema.compile(tags_set)
+        failures = schema.failures(obj_list)
+        DeferredComments.add(lambda: f"{obj_name}: {len(obj_list) - len(failures)} "
+                                     f"of {len(obj_list)} objects have expected tags",
+                             Verbosity.SUMMARY)
+        for _object, missing_tags, extra_tags in failures:
+            self.check_failed_tags(_object, missing_tags, extra_tags, obj_name)
 
     @log_assertion()
     def check_tags(self, object_to_check: dict, expected_tags: set, message=''):
         """
         Fetch and compare tags sets from two dict-like objects
         Asserts actual_tags >= expected_tags
+        Ids and diff message are only built if check is failed
         """
+        if CompiledTagSchema.compile(expected_tags).is_valid(object_to_check):
+            DeferredComments.add(lambda: Comments.check_tags_comment.format(
+                set(object_to_check.keys())))
+            return
         actual_tags = set(object_to_check.keys())
+        self.assert_tags(object_to_check, expected_tags - actual_tags,
+                         actual_tags - expected_tags, message)
+
+    @log_assertion()
+    def check_failed_tags(self, object_to_check: dict, missing_tags,
+                          extra_tags, message=''):
+        """
+        check_tags for object already failed by CompiledTagSchema.failures,
+        missing/extra tags are taken from failure as is
+        """
+        self.assert_tags(object_to_check, missing_tags, extra_tags, message)
+
+    @staticmethod
+    def assert_tags(object_to_check: dict, missing_tags, extra_tags,
+                    message=''):
         ids = get_ids_message(object_to_check)
-        missing_tags = expected_tags - actual_tags
-        extra_tags = actual_tags - expected_tags
-        message = f"{message}: Missing tags:{missing_tags}, " \
-                  f"extra tags: {extra_tags}\n" \
+        message = f"{message}: Missing tags:{set(missing_tags)}, " \
+                  f"extra tags: {set(extra_tags)}\n" \
                   f"Ids of object: {ids} "
-        Comments.add_comments(Comments.check_tags_comment.format(actual_tags))
-        Assert.log_assert(actual_tags >= expected_tags, message)
+        Comments.add_comments(Comments.check_tags_comment.format(
+            set(object_to_check.keys())))
+        Assert.log_assert(not missing_tags, message)
 
     @log_assertion()
     def verify_account_uuid_values(self):
@@ -562,14 +752,13 @@ class MGSHelperBase(MGSRedesignService, UuidMixin):
                 a_value = a_dict[a_key]
                 b_value = b_dict[a_key]
 
-                ids = get_ids_message(b_dict)
-                msg = f'expected: {a_value}, actual: {b_value}, key:{a_key}, ' + ids
-
-                Assert.log_assert(a_value == b_value, msg)
-                Comments.add_comments(f'validated tags {a_key}: {b_value}')
+                DeferredComments.log_assert(
+                    a_value == b_value,
+                    lambda: f'expected: {a_value}, actual: {b_value}, key:{a_key}, ' + get_ids_message(b_dict))
+                DeferredComments.add(lambda: f'validated tags {a_key}: {b_value}')
             except KeyError:
-                Assert.log_assert(a_key in b_dict, f"No expected key {a_key} found in {b_dict}!")
-                Comments.add_comments(f'validated key: {a_key}')
+                DeferredComments.log_assert(a_key in b_dict, lambda: f"No expected key {a_key} found in {b_dict}!")
+                DeferredComments.add(lambda: f'validated key: {a_key}')
 
             except AssertionError as assertion_error:
                 self.collect_assertions_fails(assertion_error)
@@ -599,29 +788,39 @@ class MGSHelperBase(MGSRedesignService, UuidMixin):
         :param s2_data: dict
         :return: None
         """
-
         ids = get_ids_message(mgs_data)
         not_defined = set(mgs_data.keys()) - set(s2_data.keys())
         logging.debug(ids + f'Skipping not defined keys:{not_defined}')
 
-        for key in s2_data.keys():  # iteration will be done by s2 keys
-
-            mgs_value = mgs_data[key]
-            temp_mgs_value = handle_value_formatting(mgs_value)
-
-            s2_value = s2_data[key]
-            temp_s2_value = handle_value_formatting(s2_value)
+        self.check_values_batch([(mgs_data, s2_data)])
 
-            Comments.add_comments(
-                f"validating key: {key} with mgs value: {temp_mgs_value} and s2 value: {temp_s2_value}")
+    @log_assertion()
+    def check_values_batch(self, pairs):
+        """
+        check_values for whole references list at once:
+        all float values of all pairs are compared with tolerance in one
+        step, only not passed values go to compare_floats/compare_equals
+        for reporting. All not passed assertions will be collected
+        :param pairs: list of (mgs_data: dict, s2_data: dict)
+        :return: None
+        """
+        mismatches = collect_values_mismatches(pairs, format_values)
+        DeferredComments.add(lambda: f"validated values of {len(pairs)} objects, "
+                                     f"mismatches: {len(mismatches)}",
+                             Verbosity.SUMMARY)
+        for row in mismatches:
             try:
-                if isinstance(temp_s2_value, float) or isinstance(temp_mgs_value, float):
-                    self.compare_floats(temp_mgs_value, temp_s2_value)
+                if row.is_float:
+                    self.compare_floats(row.prepared_mgs_value,
+                                        row.prepared_s2_value)
                 else:
-                    self.compare_equals(temp_mgs_value, temp_s2_value)
+                    self.compare_equals(row.prepared_mgs_value,
+                                        row.prepared_s2_value)
 
             except AssertionError as assertion_error:
-                ref = '\n' + ids + f'Key: "{key}", MGS value: "{mgs_value}", S2 value: "{s2_value}";'
+                ref = '\n' + get_ids_message(row.mgs_data) + \
+                      f'Key: "{row.key}", MGS value: "{row.mgs_value}", ' \
+                      f'S2 value: "{row.s2_value}";'
                 self.collect_assertions_fails(assertion_error, ref)
 
     @staticmethod
@@ -632,19 +831,22 @@ class MGSHelperBase(MGSRedesignService, UuidMixin):
         If one of the values is None, asserts that second is also None
         If value is None, bool, str, int, dict - asserts a_val == b_val
         """
-        failed_msg = f'Comparing prepared values:' \
-                     f' mgs: "{prepared_value}"({type(prepared_value)}),' \
-                     f' s2: "{s2_value}"({type(s2_value)}) '
-        prepared_value = handle_value_formatting(prepared_value)
-        s2_value = handle_value_formatting(s2_value)
+        raw_value, raw_s2_value = prepared_value, s2_value
+
+        def failed_msg():
+            return f'Comparing prepared values:' \
+                   f' mgs: "{raw_value}"({type(raw_value)}),' \
+                   f' s2: "{raw_s2_value}"({type(raw_s2_value)}) '
+        prepared_value = format_value(prepared_value)
+        s2_value = format_value(s2_value)
 
         if prepared_value is None or s2_value is None:
-            Assert.log_assert(s2_value is None, failed_msg)
-            Assert.log_assert(prepared_value is None, failed_msg)
+            DeferredComments.log_assert(s2_value is None, failed_msg)
+            DeferredComments.log_assert(prepared_value is None, failed_msg)
         if prepared_value == 'EAS':  # MGS-2982
-            Assert.log_assert(s2_value == "Brokerage", failed_msg)
+            DeferredComments.log_assert(s2_value == "Brokerage", failed_msg)
         else:
-            Assert.log_assert(prepared_value == s2_value, failed_msg)
+            DeferredComments.log_assert(prepared_value == s2_value, failed_msg)
 
     @staticmethod
     @log_assertion()
@@ -666,9 +868,10 @@ class MGSHelperBase(MGSRedesignService, UuidMixin):
         else:
             relative_error = diff
 
-        failed_assert_msg = f'Diff: {diff}({prepared_mgs_value} - {s2_value}),' \
-                            f' relative_error: {relative_error}, tolerance: {tolerance};'
-        Assert.log_assert((relative_error <= tolerance), failed_assert_msg)
+        DeferredComments.log_assert(
+            relative_error <= tolerance,
+            lambda: f'Diff: {diff}({prepared_mgs_value} - {s2_value}),'
+                    f' relative_error: {relative_error}, tolerance: {tolerance};')
 
     def get_portfolio_backend_data(self, account_id) -> dict:
         """
@@ -689,8 +892,8 @@ class MGSHelperBase(MGSRedesignService, UuidMixin):
             days_gain = account['daysGain']
             logging.info(f"{account}")
             employee_ids = mapping.accounts_descriptions[f'{account_no}']['CSGAccountInfo']['CSGRecordDetails']
-            days_gain = handle_value_formatting(days_gain)
-            days_gain = handle_value_formatting(days_gain)
+            days_gain = format_value(days_gain)
+            days_gain = format_value(days_gain)
             for employee in employee_ids:
                 employee_id = employee['OlEmpId']
                 s2_account = mapping.get_balance_for_stock_plan(employee_id)
@@ -700,14 +903,10 @@ class MGSHelperBase(MGSRedesignService, UuidMixin):
 
     @staticmethod
     def from_dollar_to_float(dollar_value: str):
-        _dollar_value = dollar_value
-        for char in ValuesValidationConstants.VALUES_FORMATS_CHARS:
-            _dollar_value = _dollar_value.replace(char, "")
-        try:
-            float_value = float(_dollar_value)
-        except ValueError:
+        float_value = to_float(dollar_value)
+        if float_value is NotNumber:
             logging.error(f'Dollar value "{dollar_value}" -  failed conversion to float')
-            raise
+            raise ValueError(f'could not convert string to float: {dollar_value!r}')
         return float_value
 
     def verify_accoutlist_displaynotification_views_tags(self, account_list_response):
@@ -801,11 +1000,8 @@ class MGSHelperBase(MGSRedesignService, UuidMixin):
 
     def validate_saved_orders_count(self, account_id, userid, saved_orders):
         s2_saved_orders_response = self.get_saved_orders_request(account_id, userid)
-        s2_saved_orders_response_dict = json.loads(
-            json.dumps(xmltodict.parse(s2_saved_orders_response.text))
-        )
-        saved_prep_order_count = s2_saved_orders_response_dict[
-            'OrderETS_ViewOrderPreparedResponse']['PreparedResponse']['PrepOrderCount']
+        saved_prep_order_count = extract_text(s2_saved_orders_response.content, SAVED_ORDERS_COUNT_PATH)
+        Assert.log_assert(saved_prep_order_count is not None, "No PrepOrderCount in s2 response")
         Comments.add_comments("Validating saved order: %s with s2 call: %s" % (saved_orders, saved_prep_order_count))
         Assert.log_assert(
             saved_prep_order_count in saved_orders, "Saved order count didn't match with s2 call"
@@ -813,11 +1009,8 @@ class MGSHelperBase(MGSRedesignService, UuidMixin):
 
     def validate_open_order_count(self, account_id, user_id, open_orders):
         s2_open_orders_count_response = self.get_open_orders_request(account_id, user_id)
-        s2_saved_orders_response_dict = json.loads(
-            json.dumps(xmltodict.parse(s2_open_orders_count_response.text))
-        )
-        open_prep_order_count = s2_saved_orders_response_dict[
-            'OrderETS_GetOpenOrderCountResponse']['Response']['TotalOrderCount']
+        open_prep_order_count = extract_text(s2_open_orders_count_response.content, OPEN_ORDERS_COUNT_PATH)
+        Assert.log_assert(open_prep_order_count is not None, "No TotalOrderCount in s2 response")
         Comments.add_comments('Validating open oder count: %s with s2 call: %s' % (open_orders, open_prep_order_count))
         Assert.log_assert(
             open_prep_order_count in open_orders, "Open order count didn't match with s2 call"
@@ -1056,12 +1249,11 @@ class MGSHelperBase(MGSRedesignService, UuidMixin):
 
     def convert_to_float(self, val):
         """float conversion"""
-        try:
-            val = float(val.replace('$', '').replace(',', '').strip())
-        except ValueError:
+        float_val = to_float(val, '$,')
+        if float_val is NotNumber:
             print(val)
-            val = 0
-        return val
+            float_val = 0
+        return float_val
 
     def validate_account_balances(self, apige_value, account_value):
         """
@@ -1118,8 +1310,8 @@ class MGSHelperBase(MGSRedesignService, UuidMixin):
                 "nonce": "string of characters"
                 }
         headers = {"Content-Type": "application/json"}
-        response = requests.request("POST", sm2_url, headers=headers, data=json.dumps(body), verify=False)
-        access_token = response.json().get('access_token', '')
+        response = transport.request("POST", sm2_url, headers=headers, data=dumps(body), verify=False)
+        access_token = response_json(response).get('access_token', '')
         return access_token
 
     def get_et_auth_details(self, mapped_user_id):
@@ -1152,8 +1344,8 @@ class MGSHelperBase(MGSRedesignService, UuidMixin):
                 ApigeeDataTags.expand: ApigeeDataTags.expand_value}
         headers = {"Content-Type": "application/json", "x-et-auth-details": et_auth,
                    "Authorization": "Bearer {0}".format(access_token)}
-        response = requests.request("POST", url, headers=headers, data=json.dumps(body),
-                                    verify=False)
+        response = transport.request("POST", url, headers=headers, data=dumps(body),
+                                     verify=False)
         return response.json()
 
     def verify_display_positions_tags(self):
@@ -6,9 +6,13 @@ from test_helpers.mgs_backend_service_helpers.backend_requests import get_stock_
 from test_helpers.mgs_validation_helpers.mgs_tag_helper import AccountListAccountsTags, AccountOverviewAccountsTags, \
     CompleteViewAccountsTags, AllBrokerageAccountsTags, IndividualAccountsTags
 from test_helpers.mgs_validation_helpers.references.mgs_objects import Account, AccountUuid
-from test_helpers.utils import _list, _dict_by_id
+from test_helpers.utils import _list, _dict_by_id, cached_index
 from test_helpers.mgs_validation_helpers.uuid_mixin import UuidMixin
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import logging
+import time
 
 INSTITUTION_MAP = {
     '666666': 'ADP',
@@ -88,6 +92,73 @@ class MGSMappingTools(UuidMixin):
     pass
 
 
+class BackendSnapshotStore(object):
+    """
+    Per-user snapshots of s2 accounts responses (AcctCommonGet, GetAllBalances, SPUserBalances,..),
+    shared by all ReferencesAccountsMapping objects created for the same user.
+
+    BackendSnapshotStore.get(user_id, "GetAllBalances", fetch) will call fetch() only if there is no snapshot
+    for this user and source yet, or snapshot is older than ttl seconds.
+    BackendSnapshotStore.invalidate(user_id) drops user's snapshots, invalidate() - all of them.
+    calls_saved/calls_made counters are kept per user until reset_stats()
+    """
+    ttl = 300
+    snapshots = defaultdict(dict)  # {user_id: {source: (created_at, data)}}
+    calls_made = defaultdict(int)
+    calls_saved = defaultdict(int)
+
+    @classmethod
+    def configure(cls, ttl):
+        cls.ttl = ttl
+        cls.invalidate()
+
+    @classmethod
+    def get(cls, user_id, source, fetch):
+        snapshot = cls.snapshots[user_id].get(source)
+        if snapshot and time.monotonic() - snapshot[0] < cls.ttl:
+            cls.calls_saved[user_id] += 1
+            logging.debug(f"Snapshot of {source} for user {user_id} is reused")
+            return snapshot[1]
+
+        data = fetch()
+        cls.put(user_id, source, data)
+        return data
+
+    @classmethod
+    def put(cls, user_id, source, data):
+        """Store freshly fetched data, counted as backend call made"""
+        cls.calls_made[user_id] += 1
+        cls.snapshots[user_id][source] = (time.monotonic(), data)
+
+    @classmethod
+    def missing(cls, user_id, sources) -> list:
+        """Sources from the list without alive snapshot for this user"""
+        now = time.monotonic()
+        user_snapshots = cls.snapshots[user_id]
+        return [source for source in sources
+                if source not in user_snapshots or now - user_snapshots[source][0] >= cls.ttl]
+
+    @classmethod
+    def invalidate(cls, user_id=None, source=None):
+        if user_id is None:
+            cls.snapshots.clear()
+        elif source is None:
+            cls.snapshots.pop(user_id, None)
+        else:
+            cls.snapshots[user_id].pop(source, None)
+
+    @classmethod
+    def report(cls, user_id=None) -> dict:
+        users = [user_id] if user_id is not None else set(cls.calls_made) | set(cls.calls_saved)
+        return {user: {"calls_made": cls.calls_made[user], "calls_saved": cls.calls_saved[user]}
+                for user in users}
+
+    @classmethod
+    def reset_stats(cls):
+        cls.calls_made.clear()
+        cls.calls_saved.clear()
+
+
 class QuotesMapping(MGSMappingTools):
     """
     Class is responsible for providing general methods to return mgs references "positions" and "instruments" objects.
@@ -490,6 +561,10 @@ class PositionsInstrumentsMap(QuotesMapping):
         self.position_by_id = self.get_position_by_id(portfolio_info)
 
     def get_position_by_id(self, portfolio_info):
+        return cached_index(portfolio_info, 'PositionId', lambda: self.build_position_by_id(portfolio_info))
+
+    @staticmethod
+    def build_position_by_id(portfolio_info):
         portfolio_info = portfolio_info['Output']
         position_list = _list(portfolio_info['PositionList'])
         position_by_account = _dict_by_id(position_list, 'PositionId')
@@ -528,6 +603,10 @@ class WatchlistEntryMap(QuotesMapping):
         self.entry_by_id = self.get_element_by_id(portfolio_view_response)
 
     def get_element_by_id(self, response):
+        return cached_index(response, 'EntryId', lambda: self.build_element_by_id(response))
+
+    @staticmethod
+    def build_element_by_id(response):
         output = response['Output']
         entry_list = _list(output["EntryList"])
         entry_by_id = _dict_by_id(entry_list, 'EntryId')
@@ -672,6 +751,10 @@ class ReferencesTaxLotMap(MGSMappingTools):
         self.lot_by_position = self.get_lot_by_position_id(portfolio_info_lot)
 
     def get_lot_by_position_id(self, response):
+        return cached_index(response, 'PositionLotId', lambda: self.build_lot_by_position_id(response))
+
+    @staticmethod
+    def build_lot_by_position_id(response):
         _position_list = response['Output']["PositionList"]
         _lot_list = _list(_position_list['LotList'])
         lot_by_position = _dict_by_id(_lot_list, 'PositionLotId')
@@ -776,17 +859,21 @@ class ReferencesAccountsMapping(MGSMappingTools):
     mapping.get_balances(uuid)
     ...
     mapping.get_account(account_uuid, service_request)
+
+    s2 responses are read through BackendSnapshotStore, so mappings created for the same user
+    share AcctCommonGet, GetAllBalances and SPUserBalances data instead of requesting it again
     """
     _AcctCommonGet_response = None
     _GetAllBalances_response = None
     _SPUserBalances_response = None
-    _GetPortfolioTotals_response = None
+    portfolio_totals_workers = 8
 
     def __init__(self, user_id):
         logging.debug(f"Creating AccountsMapping with {user_id} user id")
         self._user_id = user_id
 
         self._current_acct = None
+        self._portfolio_totals_by_id = {}
 
     @property
     def current_acct(self) -> AccountUuid:
@@ -801,26 +888,58 @@ class ReferencesAccountsMapping(MGSMappingTools):
     @property
     def AcctCommonGet(self):
         if not self._AcctCommonGet_response:
-            self._AcctCommonGet_response = self.prepare_accounts_description()
+            self._AcctCommonGet_response = BackendSnapshotStore.get(
+                self._user_id, "AcctCommonGet", self.prepare_accounts_description)
         return self._AcctCommonGet_response[self.current_acct.accountId]
 
     @property
     def GetAllBalances(self):
         if not self._GetAllBalances_response:
-            self._GetAllBalances_response = self.prepare_accounts_balances()
+            self._GetAllBalances_response = BackendSnapshotStore.get(
+                self._user_id, "GetAllBalances", self.prepare_accounts_balances)
         return self._GetAllBalances_response[self.current_acct.accountId]
 
     @property
     def SPUserBalances(self):
         if not self._SPUserBalances_response:
-            self._SPUserBalances_response = self.get_stock_plan_balance()
+            employee_id = self.CSGAccountInfo['OlEmpId']
+            self._SPUserBalances_response = BackendSnapshotStore.get(
+                self._user_id, f"SPUserBalances-{employee_id}", self.get_stock_plan_balance)
         return self._SPUserBalances_response
 
     @property
     def GetPortfolioTotals(self):
-        if not self._GetPortfolioTotals_response:
-            self._GetPortfolioTotals_response = self.prepare_account_change()
-        return self._GetPortfolioTotals_response
+        account_id = self.current_acct.accountId
+        if account_id not in self._portfolio_totals_by_id:
+            self._portfolio_totals_by_id[account_id] = BackendSnapshotStore.get(
+                self._user_id, f"GetPortfolioTotals-{account_id}", partial(self.prepare_account_change, account_id))
+        return self._portfolio_totals_by_id[account_id]
+
+    def warm_up_portfolio_totals(self, accounts):
+        """
+        Fill GetPortfolioTotals for all brokerage accounts(instType="ADP") from references accounts in one pass.
+        Accounts without snapshot yet are requested concurrently,
+        after this account_change() is just a lookup by accountId
+        :param accounts: list of references accounts
+        """
+        account_ids = list(dict.fromkeys(account['accountId'] for account in accounts
+                                         if account.get('instType') == 'ADP'))
+        sources = {f"GetPortfolioTotals-{account_id}": account_id for account_id in account_ids}
+        to_fetch = [sources[source] for source in BackendSnapshotStore.missing(self._user_id, list(sources))]
+        logging.debug(f"GetPortfolioTotals warm up: {len(account_ids)} accounts, {len(to_fetch)} to request")
+
+        if to_fetch:
+            workers = min(self.portfolio_totals_workers, len(to_fetch))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                totals = executor.map(self.prepare_account_change, to_fetch)
+                for account_id, account_totals in zip(to_fetch, totals):
+                    BackendSnapshotStore.put(self._user_id, f"GetPortfolioTotals-{account_id}", account_totals)
+                    self._portfolio_totals_by_id[account_id] = account_totals
+
+        for source, account_id in sources.items():
+            if account_id not in self._portfolio_totals_by_id:
+                self._portfolio_totals_by_id[account_id] = BackendSnapshotStore.get(
+                    self._user_id, source, partial(self.prepare_account_change, account_id))
 
     @property
     def CSGAccountInfo(self):  # AcctCommonGet
@@ -890,9 +1009,10 @@ class ReferencesAccountsMapping(MGSMappingTools):
         }
         return stock_balances
 
-    def prepare_account_change(self):
+    def prepare_account_change(self, account_id=None):
+        account_id = account_id or self.current_acct.accountId
         change_response = AccountsBackendDataHelper(). \
-            prepare_brokerage_account_change(user_id=self._user_id, account_id=self.current_acct.accountId)
+            prepare_brokerage_account_change(user_id=self._user_id, account_id=account_id)
         change_not_available = {"TodaysGainLoss": 0,
                                 'TodaysGainLossPct': 0,
                                 "TotalGainLoss": 0,
@@ -3,6 +3,42 @@ from dash_common.constants.mgs_mobile_gateway_constants import AccountsTags, Ref
     ReferenceInstrumentsTags, TaxLotsTags, NewWatchlistsServices, BondPositionTags, AccountPositionTags
 
 
+class CompiledTagSchema(object):
+    """
+    Expected tags set prepared once for validation of many objects.
+    schema = CompiledTagSchema.compile(ReferencesTags.position)
+    schema.failures(positions): only objects without some of expected tags,
+    as [(object, missing_tags, extra_tags),..]
+    Object passes when its tags are superset of expected tags,
+    extra tags are reported for failed objects only
+    """
+    _compiled = {}
+
+    def __init__(self, expected_tags):
+        self.expected_tags = frozenset(expected_tags)
+
+    @classmethod
+    def compile(cls, expected_tags) -> 'CompiledTagSchema':
+        key = frozenset(expected_tags)
+        schema = cls._compiled.get(key)
+        if schema is None:
+            schema = cls._compiled[key] = cls(key)
+        return schema
+
+    def is_valid(self, object_to_check: dict) -> bool:
+        return object_to_check.keys() >= self.expected_tags
+
+    def failures(self, objects) -> list:
+        expected_tags = self.expected_tags
+        failed = []
+        for _object in objects:
+            actual_tags = _object.keys()
+            if actual_tags >= expected_tags:
+                continue
+            failed.append((_object, expected_tags - actual_tags, actual_tags - expected_tags))
+        return failed
+
+
 class AccountsTagSchema(object):
     """
     Services with accounts objects:
@@ -0,0 +1,102 @@
+"""Shared HTTP transport for S2 and side-services calls"""
+import logging
+from http.cookiejar import DefaultCookiePolicy
+from functools import partial
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from test_helpers.mgs_service_helpers.cassette import cassette
+
+
+class Transport(object):
+    """
+    Pooled keep-alive transport, one requests.Session for all calls.
+    Connections are pooled per host by urllib3, so consecutive calls to the
+    same S2 endpoint reuse already opened TCP+TLS connection.
+    Session is shared by all users and tests, so its cookie jar rejects all
+    cookies: nothing set by one response is sent with following requests,
+    cookies have to be passed explicitly with request(cookies=...).
+
+    transport.request("POST", url, headers=headers, data=body, verify=False)
+    transport.connection_stats(): {host: {"requests": 10, "connections": 1,
+                                          "reused": 9}}
+    """
+    pool_connections = 10  # number of hosts to keep pools for
+    pool_maxsize = 10  # connections kept alive per host
+    keep_alive = True
+
+    def __init__(self, pool_connections=None, pool_maxsize=None,
+                 keep_alive=None):
+        self.pool_connections = pool_connections or self.pool_connections
+        self.pool_maxsize = pool_maxsize or self.pool_maxsize
+        if keep_alive is not None:
+            self.keep_alive = keep_alive
+        self._session = None
+        self._adapter = None
+        self._closed_stats = {}
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None:
+            self._session = requests.Session()
+            self._session.cookies.set_policy(
+                DefaultCookiePolicy(allowed_domains=[]))
+            self._adapter = HTTPAdapter(pool_connections=self.pool_connections,
+                                        pool_maxsize=self.pool_maxsize)
+            self._session.mount('http://', self._adapter)
+            self._session.mount('https://', self._adapter)
+            if not self.keep_alive:
+                self._session.headers['Connection'] = 'close'
+        return self._session
+
+    def request(self, method, url, **kwargs) -> requests.Response:
+        logging.debug(f"Transport: {method} {urlsplit(url).netloc}")
+        return cassette.serve(method, url, kwargs.get('data'),
+                              partial(self.session.request, method, url,
+                                      **kwargs))
+
+    def get(self, url, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def configure(self, pool_connections=None, pool_maxsize=None,
+                  keep_alive=None):
+        """Apply new pool settings, opened connections are closed"""
+        self.close()
+        self.pool_connections = pool_connections or self.pool_connections
+        self.pool_maxsize = pool_maxsize or self.pool_maxsize
+        if keep_alive is not None:
+            self.keep_alive = keep_alive
+
+    def connection_stats(self) -> dict:
+        """
+        Per host counters: requests sent, connections opened and
+        requests served by reused connections
+        """
+        stats = {host: dict(counters)
+                 for host, counters in self._closed_stats.items()}
+        if self._adapter is not None:
+            pools = self._adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools[key]
+                host = stats.setdefault(f"{pool.host}:{pool.port}",
+                                        {"requests": 0, "connections": 0})
+                host["requests"] += pool.num_requests
+                host["connections"] += pool.num_connections
+        for counters in stats.values():
+            counters["reused"] = counters["requests"] - counters["connections"]
+        return stats
+
+    def close(self):
+        if self._session is not None:
+            self._closed_stats = self.connection_stats()
+            self._session.close()
+        self._session = None
+        self._adapter = None
+
+
+transport = Transport()
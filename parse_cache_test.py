@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+
+from test_helpers.mgs_service_helpers import mgs_base_services
+from test_helpers.mgs_service_helpers.mgs_base_services import \
+    MGSRedesignService
+
+
+def mgs_response(**fields):
+    return dict(mobile_response={'references': []}, **fields)
+
+
+class CachingResponse(object):
+    status_code = 200
+    text = '{}'
+
+    def __init__(self, body):
+        self.content = body.encode()
+
+
+def test_repeated_parse_is_hit():
+    service = MGSRedesignService()
+    service.received_response = mgs_response()
+    parsed = service.parse_response()
+    assert service.parse_response() is parsed
+    assert service.parse_response(service.received_response) is parsed
+    assert service.parse_cache_info() == {'hits': 2, 'misses': 1, 'size': 1}
+
+
+def test_equal_responses_are_parsed_separately():
+    service = MGSRedesignService()
+    first, second = mgs_response(), mgs_response()
+    assert service.parse_response(first) is not \
+        service.parse_response(second)
+    assert service.parse_cache_info() == {'hits': 0, 'misses': 2, 'size': 2}
+
+
+def test_latest_responses_are_kept(monkeypatch):
+    monkeypatch.setattr(mgs_base_services, 'PARSE_CACHE_MAX_SIZE', 2)
+    service = MGSRedesignService()
+    responses = [mgs_response(n=n) for n in range(3)]
+    parsed = [service.parse_response(response) for response in responses]
+    service.parse_response(responses[1])
+    service.parse_response(responses[0])
+    assert service.parse_cache_info() == {'hits': 1, 'misses': 4, 'size': 2}
+    assert service.parse_response(responses[1]) is parsed[1]
+    assert list(service.parse_cache) == [id(responses[0]), id(responses[1])]
+
+
+def test_response_caching_clears_parsed_responses():
+    service = MGSRedesignService()
+    service.parse_response(mgs_response())
+    service.response_caching(
+        SimpleNamespace(get_name=lambda: 'accountList'),
+        CachingResponse('{"mobile_response": {"references": []}}'), True)
+    assert service.parse_cache_info() == {'hits': 0, 'misses': 1, 'size': 0}
+    service.parse_response()
+    service.parse_response()
+    assert service.parse_cache_info() == {'hits': 1, 'misses': 2, 'size': 1}
+
+
+def test_counters_are_per_instance():
+    first, second = MGSRedesignService(), MGSRedesignService()
+    response = mgs_response()
+    first.parse_response(response)
+    first.parse_response(response)
+    second.parse_response(response)
+    assert first.parse_cache_info()['hits'] == 1
+    assert second.parse_cache_info() == {'hits': 0, 'misses': 1, 'size': 1}
@@ -1,3 +1,4 @@
+import os
 from typing import List
 
 import pytest
@@ -9,6 +10,11 @@ PICT_DIR = "configs/pict/mgs/"
 TESTS_DIR = "tests/"
 TEST_FILE_SUFFIX = "_test"
 PICT_FILE_SUFFIX = ".txt"
+PICT_DELIMITERS = ('|', '\t', ' ')
+
+# {(pict_path, mtime, env): (headers, rows, ids)}
+_MISSING = object()
+_parsed_pict_cache = {}
 
 
 def get_fixture_for_test_cases(metafunc):
@@ -17,13 +23,33 @@ def get_fixture_for_test_cases(metafunc):
     Returns data as pytest fixture
     """
     pict_path: str = get_pict_path(metafunc)
-    pict_data: List[dict] = parse_pict(pict_path)
-    result_test_data: List[dict] = expand_with_config_details(pict_data)
-    ids: list = generate_ids_strings(result_test_data)
+    result_test_data, ids = load_pict_cases(pict_path)
 
     return pytest.fixture(params=result_test_data, ids=ids)
 
 
+def load_pict_cases(pict_path) -> tuple:
+    """
+    Parsed and expanded with users details PICT cases and their ids.
+    Parsing is done once per (pict_path, file mtime, env),
+    every call returns new cases dicts
+    """
+    key = (pict_path, os.stat(pict_path).st_mtime_ns, Context.env)
+    parsed = _parsed_pict_cache.get(key)
+    if parsed is None:
+        pict_data: List[dict] = parse_pict(pict_path)
+        result_test_data = expand_with_config_details(pict_data)
+        headers = tuple(dict.fromkeys(header for case in result_test_data
+                                      for header in case))
+        rows = tuple(tuple(case.get(header, _MISSING) for header in headers)
+                     for case in result_test_data)
+        ids = generate_ids_strings(result_test_data)
+        parsed = _parsed_pict_cache[key] = (headers, rows, ids)
+    headers, rows, ids = parsed
+    return [{header: value for header, value in zip(headers, row)
+             if value is not _MISSING} for row in rows], list(ids)
+
+
 def generate_ids_strings(result_test_data) -> list:
     """ List of ids strings, each string represent set of (param=value),
     separated by "-"
@@ -77,19 +103,17 @@ def read_pict_file(pict_path: str) -> list:
     """
     Read PICT file from pict_path and return parameters sets as list of lists
     Supports PICT data delimiters:  '|' , '\t', ' '
+    Delimiter is chosen for every line, in this priority
     """
-    test_cases = []
     with open(pict_path, 'r') as pict_file:
-        for line in pict_file.readlines():
-            if "|" in line:
-                params = line.strip().split('|')
-            elif '\t' in line:
-                params = line.strip().split('\t')
-            else:
-                params = line.strip().split(' ')
+        lines = pict_file.read().splitlines()
+    return [line.strip().split(sniff_delimiter(line)) for line in lines]
+
 
-            test_cases.append(params)
-    return test_cases
+def sniff_delimiter(line) -> str:
+    """First of PICT_DELIMITERS found in line, ' ' if none"""
+    return next((delimiter for delimiter in PICT_DELIMITERS
+                 if delimiter in line), ' ')
 
 
 def parse_pict(pict_path) -> List[dict]:
@@ -131,9 +155,13 @@ def expand_with_config_details(pict_data_list) -> List[dict]:
     Update parameters mapping in pict_data_list with user details from env.json
     return updated pict_data_list
     """
+    users_by_account_type = {}
     for pict in pict_data_list:
         account_type = pict.get(PICT.ACCOUNT_TYPE, "default")
-        user_details: dict = get_user_from_config(account_type)
+        user_details = users_by_account_type.get(account_type)
+        if user_details is None:
+            user_details = get_user_from_config(account_type)
+            users_by_account_type[account_type] = user_details
         pict.update(user_details)
         pict[PICT.USERID] = pict["USER_ID"]
     return pict_data_list
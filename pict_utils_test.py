@@ -0,0 +1,130 @@
+import os
+
+import pytest
+
+from test_helpers import pict_utils
+from test_helpers.pict_utils import load_pict_cases, parse_pict, \
+    read_pict_file, sniff_delimiter
+
+CASES = ("ACCOUNT_TYPE\tSYMBOL\n"
+         "Brokerage\tAAPL\n"
+         "Brokerage\tMSFT\n"
+         "IRA\tAAPL\n")
+MGS_USERS = {'default': {'username': 'default', 'user_id': 1},
+             'Brokerage': {'username': 'broker', 'user_id': 2}}
+
+
+@pytest.fixture
+def pict_file(tmp_path):
+    def write(text):
+        path = tmp_path / 'case.txt'
+        path.write_text(text)
+        return str(path)
+    return write
+
+
+@pytest.mark.parametrize('line, delimiter', [
+    ('A|B C\tD', '|'),
+    ('A B\tC', '\t'),
+    ('A B', ' '),
+    ('A', ' ')])
+def test_sniff_delimiter_priority(line, delimiter):
+    assert sniff_delimiter(line) == delimiter
+
+
+def test_delimiter_is_sniffed_per_line(pict_file):
+    path = pict_file("ACCOUNT_TYPE|SYMBOL\n"
+                     "Brokerage\tBRK B\n"
+                     "Bank|BRK A\n"
+                     "IRA AAPL\n")
+    assert read_pict_file(path) == [['ACCOUNT_TYPE', 'SYMBOL'],
+                                    ['Brokerage', 'BRK B'],
+                                    ['Bank', 'BRK A'],
+                                    ['IRA', 'AAPL']]
+
+
+def test_parse_pict(pict_file):
+    path = pict_file("ACCOUNT_TYPE\tSYMBOL\nBrokerage\tBRK B\n")
+    assert parse_pict(path) == [{'ACCOUNT_TYPE': 'Brokerage',
+                                 'SYMBOL': 'BRK B'}]
+
+
+def test_empty_file(pict_file):
+    assert read_pict_file(pict_file("")) == []
+
+
+@pytest.fixture
+def users(monkeypatch):
+    """Config users and account types requested from config"""
+    requested = []
+    get_user = pict_utils.get_user_from_config
+
+    def get_user_from_config(account_type="default"):
+        requested.append(account_type)
+        return get_user(account_type)
+
+    monkeypatch.setattr(pict_utils, '_parsed_pict_cache', {})
+    monkeypatch.setattr(pict_utils, 'get_user_from_config',
+                        get_user_from_config)
+    monkeypatch.setattr(pict_utils.Context, 'env', 'sit')
+    monkeypatch.setattr(pict_utils.Context, 'config',
+                        {'mgs_users': MGS_USERS})
+    return requested
+
+
+class TestLoadPictCases(object):
+    def test_cases_expanded_with_users(self, pict_file, users):
+        cases, ids = load_pict_cases(pict_file(CASES))
+        assert [case['USERNAME'] for case in cases] == \
+            ['broker', 'broker', 'default']
+        assert [case['USERID'] for case in cases] == [2, 2, 1]
+        assert ids[0] == ('(ACCOUNT_TYPE=Brokerage)-(SYMBOL=AAPL)-'
+                          '(USERNAME=broker)-(USER_ID=2)-(USERID=2)')
+
+    def test_user_resolved_once_per_account_type(self, pict_file, users):
+        load_pict_cases(pict_file(CASES))
+        assert users == ['Brokerage', 'IRA']
+
+    def test_parsed_once(self, pict_file, users):
+        path = pict_file(CASES)
+        first = load_pict_cases(path)
+        assert load_pict_cases(path) == first
+        assert users == ['Brokerage', 'IRA']
+        assert len(pict_utils._parsed_pict_cache) == 1
+
+    def test_new_dicts_every_call(self, pict_file, users):
+        path = pict_file(CASES)
+        cases, ids = load_pict_cases(path)
+        cases[0]['SYMBOL'] = 'TSLA'
+        cases[1].clear()
+        ids.append('extra')
+        again, again_ids = load_pict_cases(path)
+        assert again[0]['SYMBOL'] == 'AAPL'
+        assert again[1]['SYMBOL'] == 'MSFT'
+        assert again[0] is not cases[0]
+        assert len(again_ids) == 3
+
+    def test_reloaded_after_file_change(self, pict_file, users):
+        path = pict_file(CASES)
+        load_pict_cases(path)
+        mtime_ns = os.stat(path).st_mtime_ns
+        pict_file("ACCOUNT_TYPE\tSYMBOL\nIRA\tTSLA\n")
+        os.utime(path, ns=(mtime_ns + 10 ** 9, mtime_ns + 10 ** 9))
+        cases, _ = load_pict_cases(path)
+        assert [case['SYMBOL'] for case in cases] == ['TSLA']
+        assert users == ['Brokerage', 'IRA', 'IRA']
+
+    def test_reloaded_for_other_env(self, pict_file, users, monkeypatch):
+        path = pict_file(CASES)
+        load_pict_cases(path)
+        monkeypatch.setattr(pict_utils.Context, 'env', 'uat')
+        load_pict_cases(path)
+        assert users == ['Brokerage', 'IRA'] * 2
+        assert len(pict_utils._parsed_pict_cache) == 2
+
+    def test_user_keys_kept_per_case(self, pict_file, users):
+        pict_utils.Context.config['mgs_users'] = dict(
+            MGS_USERS, IRA={'username': 'ira', 'user_id': 3, 'pin': 4})
+        cases, _ = load_pict_cases(pict_file(CASES))
+        assert [case.get('PIN') for case in cases] == [None, None, 4]
+        assert 'PIN' not in cases[0]
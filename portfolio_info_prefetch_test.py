@@ -0,0 +1,53 @@
+import threading
+
+import pytest
+
+from test_helpers.mgs_validation_helpers import mgs_helper_base
+from test_helpers.mgs_validation_helpers.mgs_helper_base import MGSHelperBase
+
+
+class PrefetchHelper(MGSHelperBase):
+    _uid = "user"
+
+    def __init__(self):
+        self.received_response = {"mobile_response": {}}
+
+
+@pytest.fixture
+def requested(monkeypatch):
+    requested = []
+    lock = threading.Lock()
+
+    def get_portfolio_info(account_id, user_id):
+        with lock:
+            requested.append((account_id, user_id))
+        return {"Output": {"AccountId": account_id}}
+
+    monkeypatch.setattr(mgs_helper_base, 'get_portfolio_info',
+                        get_portfolio_info)
+    return requested
+
+
+def test_every_account_is_requested_once(requested):
+    helper = PrefetchHelper()
+    by_account = helper.prefetch_portfolio_info(["1", "2", "1", "3"])
+    assert sorted(requested) == [("1", "user"), ("2", "user"), ("3", "user")]
+    assert by_account["2"] == {"Output": {"AccountId": "2"}}
+    helper.prefetch_portfolio_info(["2", "3"])
+    assert len(requested) == 3
+
+
+def test_only_missing_accounts_are_requested(requested):
+    helper = PrefetchHelper()
+    helper.prefetch_portfolio_info(["1"])
+    by_account = helper.prefetch_portfolio_info(["1", "2"])
+    assert requested == [("1", "user"), ("2", "user")]
+    assert set(by_account) == {"1", "2"}
+
+
+def test_new_response_drops_prefetched(requested):
+    helper = PrefetchHelper()
+    helper.prefetch_portfolio_info(["1"])
+    helper.received_response = {"mobile_response": {}}
+    helper.prefetch_portfolio_info(["1"])
+    assert requested == [("1", "user"), ("1", "user")]
@@ -0,0 +1,69 @@
+import copy
+
+from test_helpers.utils import SearchList
+
+POSITIONS = [
+    {"accountId": "1", "symbol": "AAPL", "positionId": "11"},
+    {"accountId": "1", "symbol": "MSFT", "positionId": "12"},
+    {"accountId": "2", "symbol": "AAPL", "positionId": "21"},
+]
+
+
+class TestSearchList(object):
+    def test_single_key(self):
+        positions = SearchList(POSITIONS)
+        assert [p["positionId"] for p in positions(symbol="AAPL")] == \
+            ["11", "21"]
+
+    def test_multi_key_matches_all_keys(self):
+        positions = SearchList(POSITIONS)
+        found = positions(accountId="2", symbol="AAPL")
+        assert list(found) == [POSITIONS[2]]
+        assert list(positions(accountId="2", symbol="MSFT")) == []
+
+    def test_no_kwargs_returns_self(self):
+        positions = SearchList(POSITIONS)
+        assert positions() is positions
+
+    def test_attributes_search(self):
+        class Obj(object):
+            def __init__(self, key):
+                self.key = key
+
+        objects = SearchList([Obj(1), Obj(2), Obj(1)])
+        assert len(objects(key=1)) == 2
+
+    def test_not_hashable_values(self):
+        positions = SearchList([{"ids": ["1"]}, {"ids": ["2"]}])
+        assert list(positions(ids=["2"])) == [{"ids": ["2"]}]
+
+    def test_index_dropped_on_list_change(self):
+        positions = SearchList(POSITIONS)
+        assert len(positions(symbol="AAPL")) == 2
+        positions.append({"accountId": "3", "symbol": "AAPL"})
+        assert len(positions(symbol="AAPL")) == 3
+        positions.pop(0)
+        assert len(positions(symbol="AAPL")) == 2
+
+    def test_index_dropped_on_data_change(self):
+        positions = SearchList(POSITIONS)
+        assert len(positions(symbol="AAPL")) == 2
+        positions.data.append({"accountId": "3", "symbol": "AAPL"})
+        assert len(positions(symbol="AAPL")) == 3
+        positions.data[0] = {"accountId": "1", "symbol": "IBM"}
+        assert len(positions(symbol="AAPL")) == 2
+        assert len(positions(symbol="IBM")) == 1
+
+    def test_convert(self):
+        positions = SearchList(POSITIONS)
+        assert len(positions(symbol="AAPL")) == 2
+        positions.convert(lambda obj: dict(obj, symbol="IBM"))
+        assert len(positions(symbol="AAPL")) == 0
+        assert len(positions(symbol="IBM")) == 3
+
+    def test_copy_is_independent(self):
+        positions = SearchList(POSITIONS)
+        copied = copy.copy(positions)
+        copied.append({"symbol": "AAPL"})
+        assert len(positions(symbol="AAPL")) == 2
+        assert len(copied(symbol="AAPL")) == 3
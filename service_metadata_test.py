@@ -0,0 +1,85 @@
+import gzip
+import json
+
+import pytest
+
+from test_helpers.mgs_service_helpers import mgs_base_services
+from test_helpers.mgs_service_helpers.mgs_base_services import \
+    service_metadata_update, ServiceMetadataStore
+
+URL = 'https://mgs/v1/accounts/accountList'
+SERVICE_ID = 'v1-accounts/accountList'
+
+
+class FakeResponse(object):
+    ok = True
+
+    def __init__(self, text):
+        self.text = text
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = {'services': {}}
+    monkeypatch.setattr(mgs_base_services.Context, 'cache', cache,
+                        raising=False)
+    monkeypatch.setattr(ServiceMetadataStore, 'samples_in_memory', 2)
+    monkeypatch.setattr(ServiceMetadataStore, 'spill_path', None)
+    yield cache
+    ServiceMetadataStore.close()
+
+
+def update(text, body='{}'):
+    service_metadata_update(None, None, FakeResponse(text), {'url': URL},
+                            body)
+
+
+class TestServiceMetadataStore(object):
+    def test_identical_responses_stored_once(self, cache):
+        update('{"a": 1}')
+        update('{"a": 1}')
+        record = cache['services'][SERVICE_ID]
+        assert record['hits'] == 2
+        assert record['response'] == ['{"a": 1}']
+        assert list(record['hashes'].values()) == [2]
+
+    def test_same_response_of_other_request_stored(self, cache):
+        update('{"a": 1}', body='{"r": 1}')
+        update('{"a": 1}', body='{"r": 2}')
+        update('{"a": 1}', body='{"r": 1}')
+        record = cache['services'][SERVICE_ID]
+        assert record['request'] == ['{"r": 1}', '{"r": 2}']
+        assert record['response'] == ['{"a": 1}', '{"a": 1}']
+        assert sorted(record['hashes'].values()) == [1, 2]
+
+    def test_last_samples_kept_and_cache_is_json(self, cache):
+        for index in range(4):
+            update(f'{{"a": {index}}}', body=f'{{"r": {index}}}')
+        record = cache['services'][SERVICE_ID]
+        assert record['response'] == ['{"a": 2}', '{"a": 3}']
+        assert record['request'] == ['{"r": 2}', '{"r": 3}']
+        assert record['spilled'] == 2
+        assert json.loads(json.dumps(cache))['services'][SERVICE_ID][
+            'hits'] == 4
+
+    def test_configure_applies_to_existing_records(self, cache):
+        update('{"a": 1}')
+        update('{"a": 2}')
+        ServiceMetadataStore.configure(samples_in_memory=0)
+        update('{"a": 3}')
+        record = cache['services'][SERVICE_ID]
+        assert record['response'] == []
+        assert record['spilled'] == 3
+
+    def test_spill_to_file(self, cache, tmp_path):
+        spill_path = str(tmp_path / 'logs' / 'metadata.jsonl.gz')
+        ServiceMetadataStore.configure(samples_in_memory=1,
+                                       spill_path=spill_path)
+        for index in range(3):
+            update(f'{{"a": {index}}}')
+        ServiceMetadataStore.close()
+        with gzip.open(spill_path, 'rt', encoding='utf-8') as spill_log:
+            samples = [json.loads(line) for line in spill_log]
+        assert [sample['response'] for sample in samples] == \
+            ['{"a": 0}', '{"a": 1}']
+        assert {sample['service_id'] for sample in samples} == {SERVICE_ID}
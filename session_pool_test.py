@@ -0,0 +1,91 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from test_helpers.mgs_service_helpers import mgs_base_services
+from test_helpers.mgs_service_helpers.mgs_base_services import SessionPool
+
+
+class FakeClient(object):
+    logins = []
+    passwords = {"user1": "secret"}
+
+    def __init__(self):
+        self.user = None
+        self.session = requests.Session()
+
+    def mobile_authenticate(self, username=None, password=None):
+        FakeClient.logins.append(username)
+        if FakeClient.passwords.get(username) != password:
+            return False
+        self.user = SimpleNamespace(token=f"token-{len(FakeClient.logins)}")
+        return self.user.token
+
+
+@pytest.fixture(autouse=True)
+def pool(monkeypatch):
+    monkeypatch.setattr(mgs_base_services, 'BaseAPIClient', FakeClient)
+    FakeClient.logins = []
+    SessionPool.clear()
+    yield SessionPool
+    SessionPool.clear()
+
+
+def test_same_user_is_logged_in_once(pool):
+    client, token = pool.authenticate(username="user1", password="secret")
+    assert pool.authenticate("user1", "secret") == (client, token)
+    assert FakeClient.logins == ["user1"]
+    assert pool.report() == dict(hits=1, misses=1, refreshes=0, failures=0,
+                                 sessions=1)
+
+
+def test_password_is_part_of_key(pool):
+    pool.authenticate(username="user1", password="secret")
+    client, result = pool.authenticate(username="user1", password="wrong")
+    assert result is False
+    assert FakeClient.logins == ["user1", "user1"]
+    assert "secret" not in str(list(pool._sessions))
+
+
+def test_failed_login_is_not_pooled(pool):
+    pool.authenticate(username="user1", password="wrong")
+    pool.authenticate(username="user1", password="wrong")
+    assert FakeClient.logins == ["user1", "user1"]
+    assert pool.report()["sessions"] == 0
+    assert pool.report()["failures"] == 2
+
+
+def test_login_exception_is_not_pooled(pool, monkeypatch):
+    def broken_login(self, **kwargs):
+        raise ConnectionError("login failed")
+
+    monkeypatch.setattr(FakeClient, 'mobile_authenticate', broken_login)
+    with pytest.raises(ConnectionError):
+        pool.authenticate(username="user1", password="secret")
+    assert pool.report()["sessions"] == 0
+
+
+def test_refresh_before_cookie_expiry(pool, monkeypatch):
+    def login_with_cookie(self, username=None, password=None):
+        FakeClient.logins.append(username)
+        self.user = SimpleNamespace(token="token")
+        self.session.cookies.set("SMSESSION", "1",
+                                 expires=int(time.time()) + 30)
+        return "token"
+
+    monkeypatch.setattr(FakeClient, 'mobile_authenticate', login_with_cookie)
+    client, _ = pool.authenticate(username="user1", password="secret")
+    refreshed, _ = pool.authenticate(username="user1", password="secret")
+    assert refreshed is client
+    assert pool.report()["refreshes"] == 1
+    assert FakeClient.logins == ["user1", "user1"]
+
+
+def test_ttl_without_cookies_expiry(pool, monkeypatch):
+    pool.authenticate(username="user1", password="secret")
+    expired = time.time() + pool.ttl
+    monkeypatch.setattr(mgs_base_services.time, 'time', lambda: expired)
+    pool.authenticate(username="user1", password="secret")
+    assert pool.report()["refreshes"] == 1
@@ -0,0 +1,71 @@
+from dash_common.constants.mgs_mobile_gateway_constants import \
+    ReferencesObjectTypes
+
+from test_helpers.mgs_service_helpers.json_stream import StreamedObject
+from test_helpers.mgs_validation_helpers.mgs_helper_base import MGSHelperBase
+from test_helpers.mgs_validation_helpers.mgs_tag_helper import ReferencesTags
+
+
+class StreamingHelper(MGSHelperBase):
+    view_types = ()
+    reference_types = ()
+
+    def __init__(self):
+        self.checked = []
+        self.views_checked = None
+        self.special_references = None
+
+    def check_tags(self, obj, expected_tags, obj_name=None):
+        self.checked.append((obj_name, expected_tags))
+
+    def verify_views_tags(self):
+        self.views_checked = self.received_response["mobile_response"][
+            "views"]
+
+    def special_tags_verifications(self):
+        self.special_references = self.received_response["mobile_response"][
+            "references"]
+
+
+def position(**tags):
+    return StreamedObject('references', ReferencesObjectTypes.POSITIONS,
+                          tags, 0)
+
+
+def test_bond_without_maturity_has_both_tag_sets():
+    helper = StreamingHelper()
+    assert helper.get_streamed_reference_tags(position(typeCode='BOND')) == \
+        (ReferencesTags.position, ReferencesTags.position_bond)
+    assert helper.get_streamed_reference_tags(
+        position(typeCode='BOND', maturity='2030-01-01')) == \
+        (ReferencesTags.position_bond,)
+    assert helper.get_streamed_reference_tags(
+        position(typeCode='EQ', maturity='2030-01-01')) == ()
+
+
+def test_bond_without_maturity_is_checked_twice():
+    helper = StreamingHelper()
+    helper.verify_response_tags_streaming([position(typeCode='BOND')])
+    assert helper.checked == [
+        (ReferencesObjectTypes.POSITIONS, ReferencesTags.position),
+        (ReferencesObjectTypes.POSITIONS, ReferencesTags.position_bond)]
+
+
+def test_views_and_special_verifications_run():
+    view = {"type": "net_assets_summary", "data": {}}
+    helper = StreamingHelper()
+    count = helper.verify_response_tags_streaming([
+        StreamedObject('views', view["type"], view, 0),
+        position(typeCode='EQ', maturity='2030-01-01')])
+    assert count == 2
+    assert helper.views_checked == [view]
+    assert helper.special_references == [
+        {"type": ReferencesObjectTypes.POSITIONS,
+         "data": [{"typeCode": 'EQ', "maturity": '2030-01-01'}]}]
+
+
+def test_references_are_not_kept_when_switched_off():
+    helper = StreamingHelper()
+    helper.streaming_keeps_references = False
+    helper.verify_response_tags_streaming([position(maturity='2030-01-01')])
+    assert helper.special_references == []
@@ -1,47 +1,107 @@
+import json
 from collections import defaultdict
 
-import dictdiffer
-
-from test_helpers.mgs_validation_helpers.references.mgs_objects import \
-    MobileResponse
-
 
 class TagCoverage(object):
+    """
+    Tags are interned to bit positions, tags of every
+    (request_type, reference_name) are kept as int bitsets:
+    actual[request_type][reference_name] - tags seen in responses
+    covered[request_type][reference_name] - tags having tests
+    """
     scope = set()
     actual = defaultdict(dict)
     covered = defaultdict(dict)
+    _tag_bits = {}
+    _tag_names = []
+
+    def tag_bit(self, tag_name) -> int:
+        bit = self._tag_bits.get(tag_name)
+        if bit is None:
+            bit = self._tag_bits[tag_name] = 1 << len(self._tag_names)
+            self._tag_names.append(tag_name)
+        return bit
+
+    def tags_bits(self, tag_names) -> int:
+        bits = 0
+        for tag_name in tag_names:
+            bits |= self.tag_bit(tag_name)
+        return bits
+
+    def tag_names(self, bits) -> list:
+        return [name for index, name in enumerate(self._tag_names)
+                if bits >> index & 1]
 
     def update_actual(self, response, request_type):
         request_section = self.actual[request_type]
-        ref_dict = MobileResponse(response).references.raw_data
-        for reference_name, references_list in ref_dict.items():
+        mobile_response = response.get('mobile_response') or {}
+        references = mobile_response.get('references') or []
+        for reference in references:
+            reference_name = reference.get('type')
             if reference_name not in self.scope:
                 continue
-            reference_section = request_section.get(reference_name, {})
-            if not reference_section:
-                request_section[reference_name] = set()
-            for reference in references_list:
-                request_section[reference_name].update(set(reference))
+            keys = set()
+            for reference_object in reference.get('data') or []:
+                keys.update(reference_object)
+            request_section[reference_name] = \
+                request_section.get(reference_name, 0) | self.tags_bits(keys)
 
     def update_covered(self, request_type, reference_name, tag_name):
         self.scope.add(reference_name)
         request_section = self.covered[request_type]
-        reference_section = request_section.get(reference_name, {})
-        if not reference_section:
-            request_section[reference_name] = set()
-        request_section[reference_name].add(tag_name)
+        request_section[reference_name] = \
+            request_section.get(reference_name, 0) | self.tag_bit(tag_name)
 
     def tag_report(self):
-        actual_tags = self.actual
-        covered_tags = self.covered
-        dif_content = list((dictdiffer.diff(covered_tags, actual_tags)))
+        uncovered, deprecated = [], []
+        for request_type in sorted(set(self.actual) | set(self.covered)):
+            actual_section = self.actual.get(request_type, {})
+            covered_section = self.covered.get(request_type, {})
+            for reference_name in sorted(set(actual_section) |
+                                         set(covered_section)):
+                actual_bits = actual_section.get(reference_name, 0)
+                covered_bits = covered_section.get(reference_name, 0)
+                combination = f"{request_type}.{reference_name}"
+                if actual_bits & ~covered_bits:
+                    uncovered.append(f"{combination} : {set(self.tag_names(actual_bits & ~covered_bits))}")
+                if covered_bits & ~actual_bits:
+                    deprecated.append(f"{combination} : {set(self.tag_names(covered_bits & ~actual_bits))}")
         report = {
-            "References": self.scope,  # dif=('add', 'all.accounts', [(0, {'daysGain'})])
-            "Uncovered": [f"{dif[1]} : {dif[2][0][1]}" for dif in dif_content if dif[0] == "add"],
-            "Deprecated": [f"{dif[1]} : {dif[2][0][1]}" for dif in dif_content if dif[0] == "remove"]
+            "References": self.scope,
+            "Uncovered": uncovered,
+            "Deprecated": deprecated
         }
         return report
 
+    def shard(self) -> str:
+        """
+        Compact json of collected scope/actual/covered tags,
+        sent by pytest-xdist worker to be merged on controller.
+        Tag names are sent, as bit positions differ between processes
+        """
+        return json.dumps({"scope": sorted(self.scope),
+                           "actual": self._named_sections(self.actual),
+                           "covered": self._named_sections(self.covered)},
+                          separators=(',', ':'))
+
+    def merge_shard(self, shard: str):
+        """Add worker's shard data to this process data"""
+        data = json.loads(shard)
+        self.scope.update(data["scope"])
+        for name, sections in (("actual", self.actual),
+                               ("covered", self.covered)):
+            for request_type, references in data[name].items():
+                request_section = sections[request_type]
+                for reference_name, tags in references.items():
+                    request_section[reference_name] = \
+                        request_section.get(reference_name, 0) | \
+                        self.tags_bits(tags)
+
+    def _named_sections(self, sections) -> dict:
+        return {request_type: {reference_name: sorted(self.tag_names(bits))
+                               for reference_name, bits in references.items()}
+                for request_type, references in sections.items()}
+
 
 def tag_coverage_report(reporter):
     tag_report = MgsContext.references_tag.tag_report()
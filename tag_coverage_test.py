@@ -0,0 +1,90 @@
+from collections import defaultdict
+
+import pytest
+
+from test_helpers.tag_coverage import TagCoverage
+
+
+def new_coverage() -> TagCoverage:
+    """TagCoverage keeps data in class attributes, every process has own"""
+    class ProcessTagCoverage(TagCoverage):
+        scope = set()
+        actual = defaultdict(dict)
+        covered = defaultdict(dict)
+        _tag_bits = {}
+        _tag_names = []
+    return ProcessTagCoverage()
+
+
+def response(*references):
+    return {"mobile_response": {"references": [
+        {"type": reference_type, "data": data}
+        for reference_type, data in references]}}
+
+
+@pytest.fixture
+def coverage():
+    return new_coverage()
+
+
+def test_tags_are_interned_to_bits(coverage):
+    assert coverage.tag_bit("accountId") == 1
+    assert coverage.tag_bit("symbol") == 2
+    assert coverage.tag_bit("accountId") == 1
+    assert coverage.tags_bits(["symbol", "quantity"]) == 0b110
+    assert coverage.tag_names(0b101) == ["accountId", "quantity"]
+
+
+def test_report(coverage):
+    coverage.update_covered("completeView", "positions", "symbol")
+    coverage.update_covered("completeView", "positions", "oldTag")
+    coverage.update_actual(response(
+        ("positions", [{"symbol": "A"}, {"symbol": "B", "quantity": 1}]),
+        ("accounts", [{"accountId": "1"}])), "completeView")
+    report = coverage.tag_report()
+    assert report["References"] == {"positions"}
+    assert report["Uncovered"] == ["completeView.positions : {'quantity'}"]
+    assert report["Deprecated"] == ["completeView.positions : {'oldTag'}"]
+
+
+def test_merge_shard_with_other_bit_positions(coverage):
+    worker = new_coverage()
+    worker.tag_bit("quantity")  # other interning order than on controller
+    worker.update_covered("completeView", "positions", "symbol")
+    worker.update_actual(response(("positions", [{"quantity": 1}])),
+                         "completeView")
+    coverage.update_covered("completeView", "positions", "quantity")
+    coverage.update_actual(response(("positions", [{"symbol": "A"}])),
+                           "completeView")
+
+    coverage.merge_shard(worker.shard())
+    report = coverage.tag_report()
+    assert report["References"] == {"positions"}
+    assert report["Uncovered"] == []
+    assert report["Deprecated"] == []
+    assert coverage.tag_names(coverage.actual["completeView"]["positions"]) \
+        == ["quantity", "symbol"]
+
+
+def test_shard_round_trip(coverage):
+    coverage.update_covered("allBrokerage", "accounts", "accountId")
+    coverage.update_actual(response(("accounts", [{"accountId": "1",
+                                                   "acctType": "ADP"}])),
+                           "allBrokerage")
+    merged = new_coverage()
+    merged.merge_shard(coverage.shard())
+    assert merged.shard() == coverage.shard()
+
+
+@pytest.mark.parametrize("mgs_response", [
+    {},
+    {"mobile_response": None},
+    {"mobile_response": {}},
+    {"mobile_response": {"references": None}},
+    {"error": {"code": 500}}])
+def test_response_without_references(coverage, mgs_response):
+    coverage.update_covered("completeView", "positions", "symbol")
+    coverage.update_actual(mgs_response, "completeView")
+    assert coverage.actual["completeView"] == {}
+    assert coverage.tag_report()["Deprecated"] == \
+        ["completeView.positions : {'symbol'}"]
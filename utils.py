@@ -1,12 +1,16 @@
 import logging
 import re
-from collections import UserList
+from collections import OrderedDict, UserList
 
-import requests
 from dash_common.constants.mgs_mobile_gateway_constants import ReferenceIds
 from dash_core.conftest import ConfigVars
 from dash_core.utils.common.context import Context
 
+from test_helpers.mgs_service_helpers.mgs_transport import transport
+
+ID_INDEXES_MAX_SIZE = 32
+_id_indexes = OrderedDict()
+
 
 def get_ids_message(reference: dict) -> str:
     """
@@ -38,13 +42,61 @@ def _list(value):
     return value if isinstance(value, list) else [value]
 
 
+def _invalidating(method):
+    """Wrap UserList method changing self.data to drop SearchList indexes"""
+
+    def wrapper(self, *args, **kwargs):
+        self.invalidate()
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = method.__name__
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
 class SearchList(UserList):
     """
     Call this SearchList with **kwargs to get filtered list by this arguments
     If elements are dicts, the **kwargs will be used as key=value
     Else: **kwargs will be used as attribute_name=attribute_value
+    Several **kwargs are combined, element should match all of them
     Convert underlying elements by self.convert(func)
+
+    On first search by some key, index {value: [positions]} for this key is
+    built, so repeated searches are dict lookups.
+    Indexes are dropped on any list change through SearchList methods and
+    on every access to .data, as the list can be changed through it,
+    but not on changes inside elements themselves.
     """
+    _indexes = None
+    _entries_are_dicts = None
+
+    @property
+    def data(self) -> list:
+        self.invalidate()
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self.invalidate()
+        self._data = value
+
+    def __len__(self):
+        return len(self._data)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __contains__(self, item):
+        return item in self._data
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self.__class__(self._data[i])
+        return self._data[i]
+
+    def __copy__(self):
+        return self.__class__(self._data)
 
     def __call__(self, **kwargs):
         if kwargs:
@@ -53,25 +105,81 @@ class SearchList(UserList):
         else:
             return self
 
+    def invalidate(self):
+        self._indexes = None
+        self._entries_are_dicts = None
+
+    __setitem__ = _invalidating(UserList.__setitem__)
+    __delitem__ = _invalidating(UserList.__delitem__)
+    __iadd__ = _invalidating(UserList.__iadd__)
+    __imul__ = _invalidating(UserList.__imul__)
+    append = _invalidating(UserList.append)
+    insert = _invalidating(UserList.insert)
+    pop = _invalidating(UserList.pop)
+    remove = _invalidating(UserList.remove)
+    clear = _invalidating(UserList.clear)
+    reverse = _invalidating(UserList.reverse)
+    sort = _invalidating(UserList.sort)
+    extend = _invalidating(UserList.extend)
+
     def convert(self, method):
         _l = self.data[:]
         self.data = [method(obj) for obj in _l]
+        self.invalidate()
 
     @property
     def entries_are_dicts(self):
-        return all([isinstance(entry, dict) for entry in self.data])
+        if self._entries_are_dicts is None:
+            self._entries_are_dicts = all(
+                isinstance(entry, dict) for entry in self._data)
+        return self._entries_are_dicts
+
+    def _getter(self, key):
+        if self.entries_are_dicts:
+            return lambda entry: entry.get(key)
+        return lambda entry: getattr(entry, key)
+
+    def _index_for(self, key):
+        """
+        {value: [positions of elements with this value]} for key,
+        None if some of values are not hashable
+        """
+        if self._indexes is None:
+            self._indexes = {}
+        if key not in self._indexes:
+            getter = self._getter(key)
+            index = {}
+            try:
+                for position, entry in enumerate(self._data):
+                    index.setdefault(getter(entry), []).append(position)
+            except TypeError:
+                index = None
+            self._indexes[key] = index
+        return self._indexes[key]
+
+    def _positions_by(self, key, value) -> list:
+        index = self._index_for(key)
+        if index is not None:
+            try:
+                return index.get(value, [])
+            except TypeError:  # value to search is not hashable
+                pass
+        getter = self._getter(key)
+        return [position for position, entry in enumerate(self._data)
+                if getter(entry) == value]
 
     def search_by(self, **kwargs) -> list:
-        list_to_search = self.data[:]
-        result = []
-        if self.entries_are_dicts:  # list of dicts
-            for key, value in kwargs.items():
-                result = filter(lambda x: x.get(key) == value, list_to_search)
-        else:
-            for attr, value in kwargs.items():
-                result = filter(lambda x: getattr(x, attr) == value,
-                                list_to_search)
-        return list(result)
+        matches = [self._positions_by(key, value)
+                   for key, value in kwargs.items()]
+        if not matches:
+            return self._data[:]
+        matches.sort(key=len)
+        positions = matches[0]
+        for other_positions in matches[1:]:
+            other_positions = set(other_positions)
+            positions = [position for position in positions
+                         if position in other_positions]
+        return [self._data[position] for position in positions]
 
 
 def map_instrument_on_position(instruments, positions):
@@ -115,6 +223,32 @@ def _dict_by_id(objects: list, id_key: str) -> dict:
     return id_dict
 
 
+def cached_index(payload, index_name: str, build) -> dict:
+    """
+    Build index of payload objects once per payload object and index name,
+    all later calls for same payload will return the same index.
+    Indexes are kept for ID_INDEXES_MAX_SIZE latest payloads,
+    payload itself is kept with index, so its id can't be reused meanwhile
+    E.g.: cached_index(portfolio_info, 'PositionId',
+                       lambda: _dict_by_id(positions, 'PositionId'))
+    :param payload: parsed s2 response
+    :param index_name: str, to have different indexes over same payload
+    :param build: callable without arguments returning index
+    :return: dict
+    """
+    key = (id(payload), index_name)
+    cached = _id_indexes.get(key)
+    if cached and cached[0] is payload:
+        _id_indexes.move_to_end(key)
+        return cached[1]
+
+    index = build()
+    _id_indexes[key] = (payload, index)
+    if len(_id_indexes) > ID_INDEXES_MAX_SIZE:
+        _id_indexes.popitem(last=False)
+    return index
+
+
 def build_url(service, request, platform, node, api_v):
     """Build and return url from service:BaseService,
     request:DataExchangeEntity and other kwargs provided"""
@@ -163,4 +297,4 @@ def update_mvp_result():
             test_name = test_name.lstrip("Test")
         payload = f"http://uatdashboard.etrade.com/cgi-bin/wpmStatus.cgi?action=post&heading=" \
             f"{heading}&test={test_name}&status={test_stat}&perf={duration}&msg={error}"
-        requests.get(payload, timeout=2.001)
+        transport.get(payload, timeout=2.001)
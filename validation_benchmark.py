@@ -0,0 +1,311 @@
+"""
+Benchmark of validation stages on synthetic responses.
+Synthetic MGS references (accounts, positions, instruments, tax lots) are
+built from expected tags schemas for tags stages.
+Values stages run real verify_references_*_values methods on S2-shaped
+payloads (GetPortfolioInfo PositionList/LotList), MGS objects are mapped
+from the same payloads, so all checks pass and only validation cost is
+measured.
+
+    python validation_benchmark.py --sizes 10 100 1000 10000
+    python validation_benchmark.py --update_baseline
+    python validation_benchmark.py --check
+
+Exit code is 1 if seconds per object of some stage exceed stored baseline
+by more than --threshold. With --check missing baseline is an error
+(exit code 2), otherwise regressions are not checked without baseline.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+from dash_common.constants.mgs_mobile_gateway_constants import \
+    ReferencesObjectTypes
+
+from test_helpers.mgs_service_helpers.json_stream import StreamedObject
+from test_helpers.mgs_validation_helpers.deferred_comments import \
+    DeferredComments, Verbosity
+from test_helpers.mgs_validation_helpers.mgs_helper_base import MGSHelperBase
+from test_helpers.mgs_validation_helpers.mgs_mapping_helpers import \
+    PositionsInstrumentsMap, ReferencesTaxLotMap
+from test_helpers.mgs_validation_helpers.mgs_tag_helper import \
+    CompleteViewAccountsTags, ReferencesTags
+
+SIZES = (10, 100, 1000, 10000)
+THRESHOLD = 0.25
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             'validation_benchmark_baseline.json')
+
+_text_tags = {'accountId', 'accountUuid', 'acctType', 'instType',
+              'positionId', 'positionLotId', 'symbol', 'typeCode'}
+
+
+class _BenchmarkRequest(object):
+    """prepared_request stand-in, only request name is used by tags checks"""
+
+    @staticmethod
+    def get_name():
+        return 'completeView'
+
+
+def synthetic_object(tags, index, **ids) -> dict:
+    """Object with all expected tags, money-like values and given ids"""
+    obj = {}
+    for tag in sorted(tags):
+        if tag in _text_tags:
+            obj[tag] = f"{tag}{index}"
+        elif tag == 'maturity':
+            obj[tag] = None
+        else:
+            obj[tag] = f"${index * 1.5 + len(tag):,.2f}"
+    obj.update(ids)
+    return obj
+
+
+def synthetic_response(size) -> dict:
+    """size accounts, positions, instruments and tax lots"""
+    account_tags = CompleteViewAccountsTags.brokerage_account \
+        .account_tags_set()
+    accounts = [synthetic_object(account_tags, index,
+                                 accountId=str(10000000 + index),
+                                 acctType='Brokerage', instType='ADP')
+                for index in range(size)]
+    positions = [synthetic_object(ReferencesTags.position, index,
+                                  accountId=str(10000000 + index),
+                                  positionId=str(index), typeCode='EQ')
+                 for index in range(size)]
+    instruments = [synthetic_object(ReferencesTags.account_instrument, index,
+                                    positionId=str(index))
+                   for index in range(size)]
+    lots = [synthetic_object(ReferencesTags.tax_lot, index,
+                             positionLotId=str(index))
+            for index in range(size)]
+    return {"mobile_response": {"views": [], "references": [
+        {"type": 'accounts', "data": accounts},
+        {"type": ReferencesObjectTypes.POSITIONS, "data": positions},
+        {"type": ReferencesObjectTypes.INSTRUMENTS, "data": instruments},
+        {"type": ReferencesObjectTypes.TAXLOTS, "data": lots}]}}
+
+
+def s2_position(index, account_id) -> dict:
+    """One PositionList item of parsed GetPortfolioInfo response"""
+    price = f"{10 + index % 90}.25"
+    return {
+        "PositionId": str(index), "AccountId": account_id,
+        "PfAddlInfo": {"InstrumentId": str(index)},
+        "Portfolios": {"Commissions": "0.0", "OtherFees": "0.0",
+                       "Quantity": "100", "PricePaid": price,
+                       "MarketValue": f"{(10 + index % 90) * 100}.0",
+                       "DaysGainVal": "1.5", "TotalGainVal": "12.5",
+                       "DaysGainPct": "0.15", "TotalGainPct": "1.25"},
+        "BasicQuote": {"Symbol": f"SYM{index}", "DisplaySymbol": f"SYM{index}",
+                       "SymbolDesc": f"SYM{index} INC", "TypeCode": "EQ",
+                       "LastTrade": price, "MarkToMarket": price,
+                       "LastTradeTime": "1577836800", "PreviousClose": price,
+                       "Volume": "1000", "IsPriceAdjusted": "0",
+                       "AdjLastTrade": price, "AdjPreviousClose": price,
+                       "ChangeVal": "0.25", "ChangePct": "0.5"},
+        "DetailedQuote": {"Exchange": "NSDQ", "Bid": price, "Ask": price,
+                          "MarketCap": "1000000.0", "Week52High": price,
+                          "Week52Low": price},
+        "Options": {"BaseSymbolPrice": "0", "InTheMoneyFlag": "0",
+                    "OptionUnderlier": None, "StrikePrice": "0",
+                    "IvPct": "0", "Delta": "0", "Premium": "0",
+                    "Gamma": "0", "Vega": "0", "Theta": "0",
+                    "DaysExpiration": "0",
+                    "Expiration": {"Month": "0", "Day": "0", "Year": "0"}},
+        "Fundamentals": {"PeRatio": "20.5", "Eps": "1.25"}}
+
+
+def s2_lot(index, position_id) -> dict:
+    """One LotList item of parsed GetPortfolioInfo response for a position"""
+    return {
+        "DaysGainVal": "1.5", "DaysGainPct": "0.15", "MarketValue": "1025.0",
+        "TotalCost": "1000.0", "TotalCostGainPct": "2.5",
+        "TotalGainVal": "25.0",
+        "Lot": {"PositionLotId": f"{position_id}{index:06d}",
+                "PositionId": position_id, "TermCd": "1", "Price": "10.0",
+                "LotSourceCd": "1", "OriginalQty": "100",
+                "RemainingQty": "100", "AvailableQty": "100",
+                "CreateOrderNo": str(index), "CreateLegNo": "1",
+                "AdjCreatePsnDt": "1577836800", "LocationCd": "1",
+                "CommPerShare": "0.0", "FeesPerShare": "0.0",
+                "ExchgRate": {"Rate": "1.0", "SettlementCurrency": "USD",
+                              "PaymentCurrency": "USD"}}}
+
+
+def s2_payloads(size) -> dict:
+    """Parsed S2 responses: positions portfolio info and one position lots"""
+    return {
+        "portfolio_info": {"Output": {"PositionList": [
+            s2_position(index, str(10000000 + index))
+            for index in range(size)]}},
+        "lots_info": {"Output": {"PositionList": {"LotList": [
+            s2_lot(index, '0') for index in range(size)]}}}}
+
+
+def mgs_values_objects(payloads) -> dict:
+    """MGS positions, instruments and tax lots mapped from S2 payloads"""
+    portfolio_info = payloads["portfolio_info"]
+    position_ids = [position["PositionId"] for position
+                    in portfolio_info["Output"]["PositionList"]]
+    lot_ids = [lot["Lot"]["PositionLotId"] for lot
+               in payloads["lots_info"]["Output"]["PositionList"]["LotList"]]
+    return {
+        "positions": [PositionsInstrumentsMap(portfolio_info, position_id)
+                      .get_position() for position_id in position_ids],
+        "instruments": [PositionsInstrumentsMap(portfolio_info, position_id)
+                        .get_instrument() for position_id in position_ids],
+        "lots": [ReferencesTaxLotMap(payloads["lots_info"], lot_id)
+                 .get_tax_lot() for lot_id in lot_ids]}
+
+
+class BenchmarkHelper(MGSHelperBase):
+    view_types = ()
+    reference_types = ()
+    expected_tags = CompleteViewAccountsTags
+
+    def __init__(self, size):
+        self.received_response = synthetic_response(size)
+        self.prepared_request = _BenchmarkRequest()
+        self.s2 = s2_payloads(size)
+        self.mgs = mgs_values_objects(self.s2)
+        self.tagged = [
+            (obj, expected_tags, reference["type"])
+            for reference in self.received_response["mobile_response"][
+                "references"]
+            for index, obj in enumerate(reference["data"])
+            for expected_tags in self.get_streamed_reference_tags(
+                StreamedObject('references', reference["type"], obj, index))]
+        self.pairs = [(dict(obj), obj) for objects in self.mgs.values()
+                      for obj in objects]
+
+    def objects_count(self, stage) -> int:
+        if stage in ('verify_response_tags', 'check_tags'):
+            return len(self.tagged)
+        return len(self.pairs)
+
+    def stage_verify_response_tags(self):
+        self.verify_response_tags()
+
+    def stage_check_tags(self):
+        for mgs_data, expected_tags, reference_type in self.tagged:
+            self.check_tags(mgs_data, expected_tags, reference_type)
+
+    def stage_check_values(self):
+        for mgs_data, s2_data in self.pairs:
+            self.check_values(mgs_data, s2_data)
+
+    def stage_check_values_batch(self):
+        self.check_values_batch(self.pairs)
+
+    def stage_verify_references_values(self):
+        """Real positions, instruments and tax lots values validations"""
+        portfolio_info = self.s2["portfolio_info"]
+        self.verify_references_positions_values(
+            mgs_positions=self.mgs["positions"], s2_data=portfolio_info)
+        self.verify_references_instruments_values(
+            mgs_instruments=self.mgs["instruments"], s2_data=portfolio_info)
+        self.verify_references_tax_lots_values(
+            mgs_lots=self.mgs["lots"], s2_data=self.s2["lots_info"])
+
+    stages = ('verify_response_tags', 'check_tags', 'check_values',
+              'check_values_batch', 'verify_references_values')
+
+
+def measure(size) -> dict:
+    """{stage: {seconds, objects, per_second, seconds_per_object, peak_kb}}"""
+    helper = BenchmarkHelper(size)
+    results = {}
+    for stage in BenchmarkHelper.stages:
+        run = getattr(helper, f'stage_{stage}')
+        helper.clear_parse_cache()
+        start = time.perf_counter()
+        run()
+        seconds = time.perf_counter() - start
+
+        helper.clear_parse_cache()
+        tracemalloc.start()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        objects = helper.objects_count(stage)
+        results[stage] = {"seconds": seconds,
+                          "objects": objects,
+                          "per_second": objects / seconds if seconds else 0,
+                          "seconds_per_object": seconds / objects,
+                          "peak_kb": peak / 1024}
+    helper.verify_assertions_fail_list()
+    return results
+
+
+def find_regressions(results, baseline, threshold) -> list:
+    regressions = []
+    for size, stages in results.items():
+        for stage, stats in stages.items():
+            base = baseline.get(size, {}).get(stage)
+            if not base:
+                continue
+            limit = base["seconds_per_object"] * (1 + threshold)
+            if stats["seconds_per_object"] > limit:
+                regressions.append(
+                    f"{stage}[{size}]: {stats['seconds_per_object']:.3e} "
+                    f"s/object, baseline {base['seconds_per_object']:.3e}")
+    return regressions
+
+
+def report(results) -> str:
+    lines = [f"{'size':>6} {'stage':<22} {'seconds':>9} "
+             f"{'objects/s':>11} {'peak KB':>9}"]
+    for size, stages in results.items():
+        for stage, stats in stages.items():
+            lines.append(f"{size:>6} {stage:<22} {stats['seconds']:>9.4f} "
+                         f"{stats['per_second']:>11.0f} "
+                         f"{stats['peak_kb']:>9.0f}")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--threshold', type=float, default=THRESHOLD)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update_baseline', action='store_true')
+    parser.add_argument('--check', action='store_true',
+                        help="fail if baseline is missing")
+    parser.add_argument('--comments_verbosity', type=int,
+                        default=Verbosity.FAILURES)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    DeferredComments.set_verbosity(args.comments_verbosity)
+
+    results = {str(size): measure(size) for size in args.sizes}
+    print(report(results))
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        if args.check:
+            print(f"No baseline {args.baseline}, run with --update_baseline "
+                  f"first")
+            return 2
+        print(f"No baseline {args.baseline}, regressions are not checked")
+        return 0
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    regressions = find_regressions(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -12,8 +12,8 @@ from test_helpers.mgs_validation_helpers.mgs_mapping_helpers import \
     ReferencesAccountsMapping
 from test_helpers.mgs_validation_helpers.mgs_tag_helper import \
     CompleteViewAccountsTags
-from test_helpers.mgs_validation_helpers.references.values_formats import \
-    handle_value_formatting
+from test_helpers.mgs_validation_helpers.references.value_parsing import \
+    format_value, format_values
 
 
 class CompleteViewHelper(AccountsBaseHelper):
@@ -26,6 +26,7 @@ class CompleteViewHelper(AccountsBaseHelper):
     streamable_values = ViewsObjectStreamableValue.COMPLETEVIEW
     streamable_labels = ViewsObjectDataLabel.COMPLETEVIEW
     expected_tags = CompleteViewAccountsTags
+    streaming_keeps_references = False
 
     def verify_views_tags(self):
         Comments.add_comments(Comments.view_net_asset_summary_comment)
@@ -143,27 +144,25 @@ class CompleteViewHelper(AccountsBaseHelper):
         net_assets = value['initial']
         _net_assets = self.from_dollar_to_float(net_assets)
 
-        s2_calculated_net_assets = 0
+        s2_account_values = []
         logging.info(f"verification on Tag:: {tag} ....")
+        ReferencesAccountsMapping(self._uid).warm_up_portfolio_totals(accounts)
         for account in self.parse_response().references.accounts():
             if account['accountId'] == "83851862":  # MGS-2982
                 continue
             mapping = ReferencesAccountsMapping(self._uid)
             if self.is_linked_bank_account_type(account):
-                val = self.get_s2_account_value(account)
-                s2_account_value = handle_value_formatting(val)
-                s2_calculated_net_assets += s2_account_value
-                logging.info(f"added account Value::{s2_account_value}")
+                s2_account_values.append(self.get_s2_account_value(account))
             else:
                 account_uuid = account['accountUuid']
                 s2_account, s2_calls = mapping.get_account(
                     account_uuid,
                     request=self.prepared_request,
                     proofs=True)
-                val = s2_account['accountValue']
-                s2_account_value = handle_value_formatting(val)
-                s2_calculated_net_assets += s2_account_value
-                logging.info(f"added account Value::{s2_account_value}")
+                s2_account_values.append(s2_account['accountValue'])
+        s2_account_values = format_values(s2_account_values)
+        logging.info(f"added account Values::{s2_account_values}")
+        s2_calculated_net_assets = sum(s2_account_values)
         self.compare_floats(_net_assets, s2_calculated_net_assets)
         logging.info(
             f'Completed verification on Net assets : {_net_assets} S2 Net '
@@ -179,10 +178,12 @@ class CompleteViewHelper(AccountsBaseHelper):
         val = net_gain_summary['account_summary_streamable_value']
         net_gain = val['initial']
         account_uuids = net_gain_summary['account_uuids']
-        _net_gain = handle_value_formatting(net_gain)
-        s2_calculated_net_gain = 0
+        _net_gain = format_value(net_gain)
+        s2_days_gains = []
 
         logging.info(f"verification on Tag:: {tag} based ")
+        ReferencesAccountsMapping(self._uid).warm_up_portfolio_totals(
+            references_accounts)
         for account in references_accounts:
             if account['accountId'] == "83851862":  # MGS-2982
                 continue
@@ -192,11 +193,11 @@ class CompleteViewHelper(AccountsBaseHelper):
                     account['accountUuid'],
                     request=self.prepared_request,
                     proofs=True)
-                s2_net_gain = handle_value_formatting(s2_account['daysGain'])
-                s2_calculated_net_gain += s2_net_gain
-                logging.info(
-                    f"s2 Net Gain  :: {s2_calculated_net_gain} dayGain added "
-                    f"{s2_net_gain}")
+                s2_days_gains.append(s2_account['daysGain'])
+        s2_days_gains = format_values(s2_days_gains)
+        s2_calculated_net_gain = sum(s2_days_gains)
+        logging.info(f"s2 Net Gain  :: {s2_calculated_net_gain} dayGains "
+                     f"added {s2_days_gains}")
         self.compare_floats(_net_gain, s2_calculated_net_gain)
         logging.info(
             f"Completed Verification on Tag:: {tag} Net Asset::{_net_gain}  "
@@ -220,7 +221,7 @@ class CompleteViewHelper(AccountsBaseHelper):
                 "account_name and accountShortName is not matching.")
             if self.is_account_type(account, tag):
                 continue
-            mgs_data = handle_value_formatting(account.get(tag, 0))
+            mgs_data = format_value(account.get(tag, 0))
             if self.verify_blank_value(mgs_data):
                 continue
             self.verify_views_values_account_summary_based_tag(summary,
@@ -244,7 +245,7 @@ class CompleteViewHelper(AccountsBaseHelper):
             request=self.prepared_request,
             proofs=True)
         s2_data = s2_account[f'{tag}']
-        mgs_data = handle_value_formatting(account[f'{tag}'])
+        mgs_data = format_value(account[f'{tag}'])
         mgs_account_id = account["accountId"]
         day_gain_tag = {"daysGain", "daysGainPercent"}
         total_gain_tag = {"totalGain", "totalGainPercent"}
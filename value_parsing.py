@@ -0,0 +1,154 @@
+"""
+Shared parsing of mgs numeric strings to float.
+to_float - strict conversion of validation helpers: format chars ("$", ",",
+"%") are removed and the rest is parsed by float(), so "1e5" and "inf" are
+numbers, while "$1.5K" or "12 (3.4%)" are not.
+parse_number - lenient grammar of displayed values:
+"$10,125,057.36", "+26.47%", "-$1.5K", "19,051", "-- (--)",
+used by values comparing of views/references with s2.
+parse_numbers/format_values - same for whole column of values in one call.
+Parsed strings are kept in bounded LRU caches, as same values are
+repeated across views, references and s2 mappings.
+"""
+import re
+from functools import lru_cache
+
+from dash_common.constants.mgs_mobile_gateway_constants import \
+    ValuesValidationConstants
+
+from test_helpers.mgs_validation_helpers.references.values_formats import \
+    handle_value_formatting
+
+PARSE_CACHE_SIZE = 8192
+MUTED_VALUE = '--'
+
+_multipliers = ValuesValidationConstants.MULTIPLIER_MAP
+_formats_chars = ''.join(ValuesValidationConstants.VALUES_FORMATS_CHARS)
+_number_pattern = re.compile(
+    r'^\s*([+-]?)\s*\$?\s*([+-]?)\s*(\d[\d,]*(?:\.\d*)?|\.\d+)\s*'
+    r'([' + ''.join(_multipliers) + r'])?\s*%?\s*(?:\(.*\))?\s*$')
+_dollar_pattern = re.compile(r'(-?\$[\d.,]+)')
+
+
+class NotNumber(object):
+    """Marker of not parsed value, to keep None a valid default"""
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def to_float(value: str, chars: str = _formats_chars):
+    """
+    Strict conversion: chars are removed from value, the rest is parsed by
+    float()
+    :param value: str
+    :param chars: str, every char is removed, VALUES_FORMATS_CHARS by default
+    :return: float, NotNumber if value is not a number
+    """
+    for char in chars:
+        value = value.replace(char, '')
+    try:
+        return float(value)
+    except ValueError:
+        return NotNumber
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_string(value: str):
+    if value.strip().startswith(MUTED_VALUE):
+        return None
+    match = _number_pattern.match(value)
+    if not match:
+        return NotNumber
+    sign, inner_sign, digits, suffix = match.groups()
+    try:
+        number = float(digits.replace(',', ''))
+    except ValueError:
+        return NotNumber
+    if suffix:
+        number *= _multipliers[suffix]
+    if (sign == '-') != (inner_sign == '-'):
+        number = -number
+    return number
+
+
+def parse_number(value, default=None, muted=None):
+    """
+    Parse money/percent/count string or number to float with lenient
+    grammar of displayed values: multipliers ("1.5K"), signs around "$",
+    trailing "(...)" are accepted, exponents and "inf" are not
+    :param value: str, int, float
+    :param default: returned if value is not a number
+    :param muted: returned for muted values ("--", "-- (--)")
+    :return: float
+    """
+    if isinstance(value, bool):
+        return default
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str):
+        return default
+    number = _parse_string(value)
+    if number is NotNumber:
+        return default
+    if number is None:
+        return muted
+    return number
+
+
+def parse_numbers(values, default=None, muted=None) -> list:
+    """parse_number for whole column of values in one call"""
+    parse = _parse_string
+    numbers = []
+    for value in values:
+        if type(value) is float:
+            number = value
+        elif isinstance(value, str):
+            number = parse(value)
+            if number is NotNumber:
+                number = default
+            elif number is None:
+                number = muted
+        else:
+            number = parse_number(value, default, muted)
+        numbers.append(number)
+    return numbers
+
+
+def is_number(value) -> bool:
+    return parse_number(value, default=NotNumber, muted=NotNumber) \
+        is not NotNumber
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def find_dollar_amount(text: str):
+    """First "$1,234.56"-like amount inside of text, None if not found"""
+    found = _dollar_pattern.search(text)
+    if not found:
+        return None
+    return float(found.group(0).replace('$', '').replace(',', ''))
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _format_string(value: str):
+    return handle_value_formatting(value)
+
+
+def format_value(value):
+    """
+    handle_value_formatting with LRU cache for str values,
+    other types are passed to handle_value_formatting as they are
+    """
+    if isinstance(value, str):
+        return _format_string(value)
+    return handle_value_formatting(value)
+
+
+def format_values(values) -> list:
+    """format_value for whole column of values in one call"""
+    return [format_value(value) for value in values]
+
+
+def cache_info() -> dict:
+    return {"strict": to_float.cache_info(),
+            "parse": _parse_string.cache_info(),
+            "dollar": find_dollar_amount.cache_info(),
+            "format": _format_string.cache_info()}
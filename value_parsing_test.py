@@ -0,0 +1,65 @@
+import math
+
+import pytest
+
+from test_helpers.mgs_validation_helpers.references.value_parsing import \
+    find_dollar_amount, format_values, NotNumber, parse_number, \
+    parse_numbers, to_float
+
+
+class TestToFloat(object):
+    @pytest.mark.parametrize('value, expected', [
+        ("$10,125,057.36", 10125057.36),
+        ("-$1,234.50", -1234.5),
+        ("26.47%", 26.47),
+        (" 19,051 ", 19051.0),
+        ("1e5", 100000.0),
+        ("inf", math.inf),
+    ])
+    def test_numbers(self, value, expected):
+        assert to_float(value) == expected
+
+    @pytest.mark.parametrize('value', [
+        "$1.5K", "12 (3.4%)", "1K%", "--", "-- (--)", "", "N/A"])
+    def test_not_numbers(self, value):
+        assert to_float(value) is NotNumber
+
+    def test_chars(self):
+        assert to_float("$1,000", '$,') == 1000.0
+        assert to_float("5%", '$,') is NotNumber
+
+
+class TestParseNumber(object):
+    @pytest.mark.parametrize('value, expected', [
+        ("$10,125,057.36", 10125057.36),
+        ("+26.47%", 26.47),
+        ("-$1.5K", -1500.0),
+        ("$-2M", -2e6),
+        ("12 (3.4%)", 12.0),
+        (".5", 0.5),
+        (7, 7.0),
+    ])
+    def test_numbers(self, value, expected):
+        assert parse_number(value) == pytest.approx(expected)
+
+    @pytest.mark.parametrize('value', ["1e5", "inf", "N/A", True, None, []])
+    def test_not_numbers(self, value):
+        assert parse_number(value, default='default') == 'default'
+
+    @pytest.mark.parametrize('value', ["--", "-- (--)", " --"])
+    def test_muted(self, value):
+        assert parse_number(value, muted='muted') == 'muted'
+
+    def test_column(self):
+        assert parse_numbers(["$1.5K", 2, "--", "N/A", True],
+                             default='default', muted='muted') == \
+            [1500.0, 2.0, 'muted', 'default', 'default']
+
+
+def test_format_values_keeps_column_order():
+    assert format_values(["$1.00", 2, None]) == ["$1.00", 2, None]
+
+
+def test_find_dollar_amount():
+    assert find_dollar_amount("Gain -$1,234.50 today") == -1234.5
+    assert find_dollar_amount("no amount") is None
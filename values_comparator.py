@@ -0,0 +1,122 @@
+"""Batch comparing of mgs and s2 values for whole references lists"""
+from dash_common.constants.mgs_mobile_gateway_constants import \
+    ValuesValidationConstants
+
+from test_helpers.mgs_validation_helpers.references.value_parsing import \
+    NotNumber, parse_numbers
+
+try:
+    import numpy
+except ImportError:  # pure python comparing is used
+    numpy = None
+
+
+class ValueRow(object):
+    """One compared key of one reference object"""
+    __slots__ = ('order', 'mgs_data', 'key', 'mgs_value', 's2_value',
+                 'prepared_mgs_value', 'prepared_s2_value')
+
+    def __init__(self, order, mgs_data, key, mgs_value, s2_value,
+                 prepared_mgs_value, prepared_s2_value):
+        self.order = order
+        self.mgs_data = mgs_data
+        self.key = key
+        self.mgs_value = mgs_value
+        self.s2_value = s2_value
+        self.prepared_mgs_value = prepared_mgs_value
+        self.prepared_s2_value = prepared_s2_value
+
+    @property
+    def is_float(self):
+        return isinstance(self.prepared_s2_value, float) or \
+            isinstance(self.prepared_mgs_value, float)
+
+
+def relative_errors_exceed(mgs_values, s2_values, tolerance) -> list:
+    """
+    Same rule as MGSHelperBase.compare_floats, applied to whole columns:
+    relative_error = abs(mgs - s2) / s2, if both values are not 0,
+    abs(mgs - s2) otherwise
+    :return: list of bool, True where relative_error > tolerance
+    """
+    if numpy is not None:
+        mgs_array = numpy.asarray(mgs_values, dtype=float)
+        s2_array = numpy.asarray(s2_values, dtype=float)
+        diff = numpy.abs(mgs_array - s2_array)
+        not_zero = (mgs_array != 0) & (s2_array != 0)
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            relative_error = numpy.where(not_zero,
+                                         diff / numpy.where(not_zero, s2_array, 1),
+                                         diff)
+        return (~(relative_error <= tolerance)).tolist()
+
+    exceed = []
+    for mgs_value, s2_value in zip(mgs_values, s2_values):
+        diff = abs(mgs_value - s2_value)
+        if s2_value != 0 and mgs_value != 0:
+            relative_error = diff / s2_value
+        else:
+            relative_error = diff
+        exceed.append(not relative_error <= tolerance)
+    return exceed
+
+
+def collect_values_mismatches(pairs, format_column, tolerance=None) -> list:
+    """
+    Compare all values of (mgs_data, s2_data) pairs, iterating by s2 keys.
+    Values are prepared by format_column and float values are parsed by
+    parse_numbers column at once, then compared in one step for all pairs,
+    other values are compared with ==.
+    Rows, which values are not passed, or can't be compared in batch
+    (not parsed as number, muted, special cases), are returned in s2 keys
+    order for per-key checking and reporting
+    :param pairs: list of (mgs_data: dict, s2_data: dict)
+    :param format_column: callable, prepares list of raw values for
+        comparing, value_parsing.format_values
+    :param tolerance: float, ValuesValidationConstants.TOLERANCE by default
+    :return: list of ValueRow
+    """
+    tolerance = ValuesValidationConstants.TOLERANCE \
+        if tolerance is None else tolerance
+    mgs_column, s2_column = [], []
+    for mgs_data, s2_data in pairs:
+        for key, s2_value in s2_data.items():
+            mgs_column.append(mgs_data[key])
+            s2_column.append(s2_value)
+    prepared = zip(format_column(mgs_column), format_column(s2_column))
+
+    to_report, float_rows = [], []
+    order = 0
+    for mgs_data, s2_data in pairs:
+        for key, s2_value in s2_data.items():
+            mgs_prepared, s2_prepared = next(prepared)
+            row = ValueRow(order, mgs_data, key, mgs_data[key], s2_value,
+                           mgs_prepared, s2_prepared)
+            order += 1
+            if row.is_float:
+                float_rows.append(row)
+            elif row.prepared_mgs_value == 'EAS' or \
+                    row.prepared_mgs_value != row.prepared_s2_value:
+                to_report.append(row)
+
+    if float_rows:
+        mgs_floats = parse_numbers([row.prepared_mgs_value
+                                    for row in float_rows],
+                                   NotNumber, NotNumber)
+        s2_floats = parse_numbers([row.prepared_s2_value
+                                   for row in float_rows],
+                                  NotNumber, NotNumber)
+        comparable = []
+        for row, mgs_float, s2_float in zip(float_rows, mgs_floats,
+                                            s2_floats):
+            if mgs_float is NotNumber or s2_float is NotNumber:
+                to_report.append(row)
+            else:
+                comparable.append((row, mgs_float, s2_float))
+        exceed = relative_errors_exceed([values[1] for values in comparable],
+                                        [values[2] for values in comparable],
+                                        tolerance)
+        to_report.extend(values[0] for values, failed
+                         in zip(comparable, exceed) if failed)
+        to_report.sort(key=lambda row: row.order)
+    return to_report
@@ -0,0 +1,74 @@
+import math
+
+import pytest
+
+from test_helpers.mgs_validation_helpers import values_comparator
+from test_helpers.mgs_validation_helpers.values_comparator import \
+    collect_values_mismatches, relative_errors_exceed
+
+
+def to_float(value):
+    if isinstance(value, str) and value.startswith('$'):
+        return float(value[1:].replace(',', ''))
+    return value
+
+
+def to_floats(values):
+    return [to_float(value) for value in values]
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def backend(request, monkeypatch):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(values_comparator, 'numpy', None)
+    return request.param
+
+
+class TestRelativeErrorsExceed(object):
+    def test_tolerance(self, backend):
+        assert relative_errors_exceed([100.0, 106.0], [100.0, 100.0],
+                                      0.05) == [False, True]
+
+    def test_zero_values_use_absolute_difference(self, backend):
+        assert relative_errors_exceed([0.0, 0.04, 0.0], [0.0, 0.0, 1.0],
+                                      0.05) == [False, False, True]
+
+    def test_nan_exceeds(self, backend):
+        assert relative_errors_exceed([math.nan], [1.0], 0.05) == [True]
+
+
+class TestCollectValuesMismatches(object):
+    def test_all_passed(self, backend):
+        pairs = [({"marketValue": "$100.00", "symbol": "AAPL"},
+                  {"marketValue": "$101.00", "symbol": "AAPL"})]
+        assert collect_values_mismatches(pairs, to_floats) == []
+
+    def test_mismatches_in_s2_keys_order(self, backend):
+        mgs = {"symbol": "AAPL", "marketValue": "$200.00", "qty": "EAS"}
+        s2 = {"qty": "EAS", "marketValue": "$100.00", "symbol": "MSFT"}
+        rows = collect_values_mismatches([(mgs, s2)], to_floats)
+        assert [row.key for row in rows] == ["qty", "marketValue", "symbol"]
+        assert all(row.mgs_data is mgs for row in rows)
+
+    def test_not_convertible_float_row_is_reported(self, backend):
+        pairs = [({"price": None}, {"price": "$1.00"})]
+        rows = collect_values_mismatches(pairs, to_floats)
+        assert [(row.key, row.prepared_s2_value) for row in rows] == \
+            [("price", 1.0)]
+
+    def test_tolerance_argument(self, backend):
+        pairs = [({"price": "$104.00"}, {"price": "$100.00"})]
+        assert collect_values_mismatches(pairs, to_floats) == []
+        assert len(collect_values_mismatches(pairs, to_floats, 0.01)) == 1
+
+    def test_float_values_are_parsed_leniently(self, backend):
+        pairs = [({"value": "1.5K", "gain": "$1,000.00 (2%)"},
+                  {"value": 1500.0, "gain": 1000.0})]
+        assert collect_values_mismatches(pairs, list) == []
+
+    def test_muted_float_value_is_reported(self, backend):
+        pairs = [({"gain": "--"}, {"gain": 1.0})]
+        rows = collect_values_mismatches(pairs, list)
+        assert [row.key for row in rows] == ["gain"]
@@ -0,0 +1,97 @@
+"""
+Path targeted extraction from S2 XML responses.
+Document is parsed incrementally with XMLPullParser, only texts of
+requested elements are kept, parsed elements are cleared, and parsing
+stops as soon as all requested elements are found.
+Paths are tuples of local names, namespaces/prefixes are ignored:
+
+    counts = extract_texts(response.content, {
+        "saved": ("OrderETS_ViewOrderPreparedResponse", "PreparedResponse",
+                  "PrepOrderCount")})
+    for lot in iter_records(response.content, ("Envelope", "Body",..,
+                                               "Lot")):
+        lot["Quantity"]
+"""
+from xml.etree.ElementTree import XMLPullParser
+
+CHUNK_SIZE = 64 * 1024
+
+
+def local_name(tag: str) -> str:
+    """'{http://ns}Sellable' or 'ns3:Sellable' -> 'Sellable'"""
+    return tag.rsplit('}', 1)[-1].rsplit(':', 1)[-1]
+
+
+def _chunks(source, chunk_size=CHUNK_SIZE):
+    """str/bytes are sliced to chunks, other iterables are used as is"""
+    if isinstance(source, (str, bytes)):
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+    else:
+        yield from source
+
+
+def _events(source):
+    parser = XMLPullParser(events=('start', 'end'))
+    for chunk in _chunks(source):
+        parser.feed(chunk)
+        yield from parser.read_events()
+    parser.close()
+    yield from parser.read_events()
+
+
+def _path(path) -> tuple:
+    return tuple(local_name(name) for name in path)
+
+
+def _walk(source, records_depth=None):
+    """
+    (path, element) for every closed element. Element is removed from its
+    parent after consumer's step, so tree is not growing; children of
+    elements at records_depth are kept until their record is closed
+    """
+    path, elements = [], []
+    for event, element in _events(source):
+        if event == 'start':
+            path.append(local_name(element.tag))
+            elements.append(element)
+            continue
+        yield tuple(path), element
+        path.pop()
+        elements.pop()
+        if elements and len(path) != records_depth:
+            elements[-1].remove(element)
+
+
+def extract_texts(source, paths: dict) -> dict:
+    """
+    Texts of first elements found by paths
+    :param source: str, bytes or iterable of chunks (response.iter_content)
+    :param paths: {name: (tag, tag,..)}, path starts from root element
+    :return: {name: text}, None for not found elements
+    """
+    wanted = {_path(path): name for name, path in paths.items()}
+    found = dict.fromkeys(paths)
+    for path, element in _walk(source):
+        name = wanted.pop(path, None)
+        if name is not None:
+            found[name] = element.text
+            if not wanted:
+                break
+    return found
+
+
+def extract_text(source, path):
+    """Text of first element found by path, None if not found"""
+    return extract_texts(source, {'text': path})['text']
+
+
+def iter_records(source, path):
+    """
+    {child local name: text} for every element found by path,
+    only current record is kept in memory
+    """
+    record_path = _path(path)
+    for element_path, element in _walk(source, len(record_path)):
+        if element_path == record_path:
+            yield {local_name(child.tag): child.text for child in element}
@@ -0,0 +1,56 @@
+import pytest
+
+from test_helpers.mgs_service_helpers.xml_extract import extract_text, \
+    extract_texts, iter_records, local_name
+
+XML = """<?xml version="1.0" encoding="UTF-8"?>
+<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/"
+               xmlns:ns3="http://s2/portfolio">
+  <soap:Body>
+    <ns3:PortfolioInfoResponse>
+      <ns3:Output>
+        <ns3:Count>2</ns3:Count>
+        <ns3:Lot><ns3:Quantity>10</ns3:Quantity><ns3:Price>1.5</ns3:Price>
+        </ns3:Lot>
+        <ns3:Lot><ns3:Quantity>20</ns3:Quantity><ns3:Price>2.5</ns3:Price>
+        </ns3:Lot>
+      </ns3:Output>
+    </ns3:PortfolioInfoResponse>
+  </soap:Body>
+</soap:Envelope>"""
+OUTPUT = ("Envelope", "Body", "PortfolioInfoResponse", "Output")
+
+
+def chunked(text, size):
+    return [text[start:start + size] for start in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize('tag, name', [
+    ('{http://s2/portfolio}Sellable', 'Sellable'),
+    ('ns3:Sellable', 'Sellable'),
+    ('Sellable', 'Sellable')])
+def test_local_name(tag, name):
+    assert local_name(tag) == name
+
+
+@pytest.mark.parametrize('source', [XML, XML.encode(),
+                                    chunked(XML.encode(), 7)])
+def test_extract_texts(source):
+    assert extract_texts(source, {
+        "count": OUTPUT + ("Count",),
+        "missing": OUTPUT + ("Missing",)}) == {"count": "2", "missing": None}
+
+
+def test_extract_text_takes_first_element():
+    assert extract_text(XML, OUTPUT + ("Lot", "Quantity")) == "10"
+
+
+def test_parsing_stops_when_all_found():
+    broken_tail = XML.replace("</soap:Envelope>", "<not closed")
+    assert extract_text(broken_tail, OUTPUT + ("Count",)) == "2"
+
+
+def test_iter_records():
+    records = list(iter_records(chunked(XML, 5), OUTPUT + ("Lot",)))
+    assert records == [{"Quantity": "10", "Price": "1.5"},
+                       {"Quantity": "20", "Price": "2.5"}]